@@ -1,14 +1,87 @@
 from functools import lru_cache
+from typing import Optional
 
 from pydantic import BaseSettings, Field
 
 
 class Settings(BaseSettings):
+    database_read_url: Optional[str] = Field(default=None, env="DATABASE_READ_URL")
+    db_pool_size: int = Field(default=5, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(default=30.0, env="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(default=1800, env="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(default=True, env="DB_POOL_PRE_PING")
+    sqlite_busy_timeout_ms: int = Field(default=5000, env="SQLITE_BUSY_TIMEOUT_MS")
     jwt_secret: str = Field(default="change-me", env="JWT_SECRET")
     jwt_algorithm: str = Field(default="HS256", env="JWT_ALGORITHM")
     access_token_expire_minutes: int = Field(default=30, env="JWT_ACCESS_EXPIRES")
     refresh_token_expire_minutes: int = Field(default=60 * 24 * 7, env="JWT_REFRESH_EXPIRES")
+    bcrypt_rounds: int = Field(default=12, env="BCRYPT_ROUNDS")
+    password_hash_workers: int = Field(default=2, env="PASSWORD_HASH_WORKERS")
+    password_hash_max_pending: int = Field(default=32, env="PASSWORD_HASH_MAX_PENDING")
+    password_hash_admission_timeout: float = Field(default=2.0, env="PASSWORD_HASH_ADMISSION_TIMEOUT")
+    auth_cache_ttl_seconds: float = Field(default=30.0, env="AUTH_CACHE_TTL_SECONDS")
+    auth_cache_max_entries: int = Field(default=10_000, env="AUTH_CACHE_MAX_ENTRIES")
     cors_origins: str = Field(default="*", env="CORS_ORIGINS")
+    dashboard_materialized_summary: bool = Field(default=True, env="DASHBOARD_MATERIALIZED_SUMMARY")
+    summary_reconcile_interval_minutes: int = Field(
+        default=60, env="SUMMARY_RECONCILE_INTERVAL_MINUTES"
+    )
+    snapshot_min_interval_minutes: int = Field(default=15, env="SNAPSHOT_MIN_INTERVAL_MINUTES")
+    snapshot_daily_hour_utc: int = Field(default=0, env="SNAPSHOT_DAILY_HOUR_UTC")
+    history_max_points: int = Field(default=730, env="HISTORY_MAX_POINTS")
+    import_batch_size: int = Field(default=500, env="IMPORT_BATCH_SIZE")
+    import_max_errors: int = Field(default=1000, env="IMPORT_MAX_ERRORS")
+    export_chunk_rows: int = Field(default=1000, env="EXPORT_CHUNK_ROWS")
+    projection_max_path_years: int = Field(default=5_000_000, env="PROJECTION_MAX_PATH_YEARS")
+    projection_parallel_threshold: int = Field(default=1_000_000, env="PROJECTION_PARALLEL_THRESHOLD")
+    projection_chunk_paths: int = Field(default=2000, env="PROJECTION_CHUNK_PATHS")
+    projection_workers: int = Field(default=2, env="PROJECTION_WORKERS")
+    price_provider: Optional[str] = Field(default=None, env="PRICE_PROVIDER")
+    price_batch_size: int = Field(default=100, env="PRICE_BATCH_SIZE")
+    price_refresh_interval_minutes: int = Field(default=15, env="PRICE_REFRESH_INTERVAL_MINUTES")
+    events_queue_size: int = Field(default=100, env="EVENTS_QUEUE_SIZE")
+    events_keepalive_seconds: float = Field(default=15.0, env="EVENTS_KEEPALIVE_SECONDS")
+    rentcast_api_key: str = Field(default="", env="RENTCAST_API_KEY")
+    rentcast_base_url: str = Field(default="https://api.rentcast.io", env="RENTCAST_BASE_URL")
+    rentcast_timeout: float = Field(default=20.0, env="RENTCAST_TIMEOUT")
+    rentcast_max_connections: int = Field(default=20, env="RENTCAST_MAX_CONNECTIONS")
+    rentcast_max_keepalive_connections: int = Field(default=10, env="RENTCAST_MAX_KEEPALIVE")
+    rentcast_keepalive_expiry: float = Field(default=30.0, env="RENTCAST_KEEPALIVE_EXPIRY")
+    rentcast_max_retries: int = Field(default=3, env="RENTCAST_MAX_RETRIES")
+    rentcast_backoff_base: float = Field(default=0.5, env="RENTCAST_BACKOFF_BASE")
+    rentcast_backoff_max: float = Field(default=8.0, env="RENTCAST_BACKOFF_MAX")
+    rentcast_cache_enabled: bool = Field(default=True, env="RENTCAST_CACHE_ENABLED")
+    rentcast_cache_max_entries: int = Field(default=2048, env="RENTCAST_CACHE_MAX_ENTRIES")
+    rentcast_cache_path: Optional[str] = Field(default=None, env="RENTCAST_CACHE_PATH")
+    rentcast_cache_ttl_details: int = Field(default=60 * 60 * 24 * 7, env="RENTCAST_CACHE_TTL_DETAILS")
+    rentcast_cache_ttl_estimate: int = Field(default=60 * 60 * 24, env="RENTCAST_CACHE_TTL_ESTIMATE")
+    rentcast_cache_ttl_comps: int = Field(default=60 * 60 * 24, env="RENTCAST_CACHE_TTL_COMPS")
+    rentcast_refresh_concurrency: int = Field(default=8, env="RENTCAST_REFRESH_CONCURRENCY")
+    rentcast_refresh_batch_size: int = Field(default=25, env="RENTCAST_REFRESH_BATCH_SIZE")
+    rentcast_refresh_max_age_hours: int = Field(default=24, env="RENTCAST_REFRESH_MAX_AGE_HOURS")
+    refresh_job_retention_hours: int = Field(default=72, env="REFRESH_JOB_RETENTION_HOURS")
+    refresh_job_heartbeat_seconds: int = Field(default=60, env="REFRESH_JOB_HEARTBEAT_SECONDS")
+    rentcast_monthly_quota: int = Field(default=1000, env="RENTCAST_MONTHLY_QUOTA")
+    rentcast_per_minute_quota: int = Field(default=60, env="RENTCAST_PER_MINUTE_QUOTA")
+    rentcast_background_reserve: float = Field(default=0.2, env="RENTCAST_BACKGROUND_RESERVE")
+    rentcast_background_pace_days: float = Field(default=3.0, env="RENTCAST_BACKGROUND_PACE_DAYS")
+    rentcast_background_max_wait_seconds: float = Field(
+        default=120.0, env="RENTCAST_BACKGROUND_MAX_WAIT_SECONDS"
+    )
+    comps_min_local: int = Field(default=5, env="COMPS_MIN_LOCAL")
+    comps_max_age_days: int = Field(default=90, env="COMPS_MAX_AGE_DAYS")
+    comps_fetch_limit: int = Field(default=25, env="COMPS_FETCH_LIMIT")
+    local_estimate_neighbors: int = Field(default=10, env="LOCAL_ESTIMATE_NEIGHBORS")
+    local_estimate_radius_mi: float = Field(default=2.0, env="LOCAL_ESTIMATE_RADIUS_MI")
+    local_estimate_min_comps: int = Field(default=3, env="LOCAL_ESTIMATE_MIN_COMPS")
+    rent_estimate_retention_days: int = Field(default=180, env="RENT_ESTIMATE_RETENTION_DAYS")
+    rent_estimate_compaction_interval_hours: int = Field(
+        default=24, env="RENT_ESTIMATE_COMPACTION_INTERVAL_HOURS"
+    )
+    rent_estimate_compaction_batch_size: int = Field(
+        default=500, env="RENT_ESTIMATE_COMPACTION_BATCH_SIZE"
+    )
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,72 @@
+"""Geohash encoding and radius covers for indexed proximity queries."""
+import math
+from typing import List, Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS_MI = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+MAX_PRECISION = 9
+
+
+def _quantize(value: float, low: float, span: float) -> int:
+    return min(max(int((value - low) / span * 2**32), 0), 2**32 - 1)
+
+
+def _spread(value: int) -> int:
+    """Move bit ``i`` of a 32-bit integer to bit ``2i``."""
+    value = (value | (value << 16)) & 0x0000FFFF0000FFFF
+    value = (value | (value << 8)) & 0x00FF00FF00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value << 2)) & 0x3333333333333333
+    return (value | (value << 1)) & 0x5555555555555555
+
+
+def encode(latitude: float, longitude: float, precision: int = MAX_PRECISION) -> str:
+    # interleave quantized longitude (even bits) and latitude (odd bits), longitude first
+    code = (_spread(_quantize(longitude, -180.0, 360.0)) << 1) | _spread(
+        _quantize(latitude, -90.0, 180.0)
+    )
+    code >>= 64 - 5 * precision
+    return "".join(BASE32[(code >> shift) & 31] for shift in range(5 * (precision - 1), -1, -5))
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(height, width) of a cell in degrees."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lon_bits
+
+
+def haversine_mi(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_MI * math.asin(math.sqrt(min(1.0, a)))
+
+
+def cover(latitude: float, longitude: float, radius_mi: float) -> List[str]:
+    """Geohash prefixes whose cells together contain every point within ``radius_mi``.
+
+    Picks the finest precision whose cells are at least ``radius_mi`` on each
+    side, then returns the cell holding the point plus its eight neighbours.
+    Each prefix becomes one B-tree range scan on the stored geohash.
+    """
+    # measure longitude where degrees are narrowest, at the poleward edge of the circle
+    edge = min(abs(latitude) + radius_mi / MILES_PER_DEGREE_LAT, 89.9)
+    miles_per_degree_lon = MILES_PER_DEGREE_LAT * math.cos(math.radians(edge))
+    precision = 1
+    for candidate in range(MAX_PRECISION, 0, -1):
+        height, width = cell_size(candidate)
+        if height * MILES_PER_DEGREE_LAT >= radius_mi and width * miles_per_degree_lon >= radius_mi:
+            precision = candidate
+            break
+    height, width = cell_size(precision)
+    prefixes = set()
+    for d_lat in (-height, 0.0, height):
+        for d_lon in (-width, 0.0, width):
+            lat = min(max(latitude + d_lat, -90.0), 90.0 - 1e-9)
+            lon = (longitude + d_lon + 180.0) % 360.0 - 180.0
+            prefixes.add(encode(lat, lon, precision))
+    return sorted(prefixes)
@@ -0,0 +1,42 @@
+import base64
+import binascii
+import json
+from typing import Any, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select
+from sqlalchemy.sql.elements import ColumnElement
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+def keyset_page(
+    stmt: Select, id_column: ColumnElement, cursor: Optional[str], page: int, page_size: int
+) -> Select:
+    """Order by ``id DESC`` and fetch one extra row to detect a next page.
+
+    With a cursor the page starts right after the last id seen, so deep pages
+    cost the same as the first; without one the legacy ``page`` offset is used.
+    """
+    stmt = stmt.order_by(id_column.desc()).limit(page_size + 1)
+    if cursor is not None:
+        return stmt.where(id_column < decode_cursor(cursor))
+    return stmt.offset((page - 1) * page_size)
+
+
+def split_page(rows: Sequence[Any], page_size: int) -> Tuple[Sequence[Any], Optional[str]]:
+    if len(rows) <= page_size:
+        return rows, None
+    items = rows[:page_size]
+    return items, encode_cursor(items[-1].id)
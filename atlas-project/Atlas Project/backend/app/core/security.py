@@ -1,5 +1,8 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 
 import jwt
 from fastapi import HTTPException, status
@@ -8,7 +11,18 @@ from passlib.context import CryptContext
 from app.core.config import settings
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pinning min/max to the configured cost makes needs_update() flag hashes made
+# with any other work factor, so logins migrate them in either direction.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds,
+)
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_admission: Optional[asyncio.Semaphore] = None
 
 
 def hash_password(password: str) -> str:
@@ -19,30 +33,89 @@ def verify_password(password: str, hashed_password: str) -> bool:
     return pwd_context.verify(password, hashed_password)
 
 
-def _create_token(subject: str, expires_delta: timedelta, token_type: str) -> str:
+def verify_and_update_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify, returning a replacement hash when the stored one uses another work factor."""
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=settings.password_hash_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _hash_pool
+
+
+async def _run_hashing(fn, *args):
+    """Run bcrypt on the dedicated process pool behind its own admission limit.
+
+    Keeps login bursts off the shared request threadpool; callers beyond
+    ``password_hash_max_pending`` wait briefly and are then turned away with 503.
+    """
+    global _hash_admission
+    if _hash_admission is None:
+        _hash_admission = asyncio.Semaphore(settings.password_hash_max_pending)
+    try:
+        await asyncio.wait_for(_hash_admission.acquire(), settings.password_hash_admission_timeout)
+    except asyncio.TimeoutError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests, retry shortly",
+            headers={"Retry-After": "1"},
+        ) from exc
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_hash_pool(), fn, *args)
+    finally:
+        _hash_admission.release()
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hashing(hash_password, password)
+
+
+async def verify_and_update_password_async(
+    password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    return await _run_hashing(verify_and_update_password, password, hashed_password)
+
+
+def shutdown_password_hashing() -> None:
+    global _hash_pool, _hash_admission
+    if _hash_pool is not None:
+        _hash_pool.shutdown(cancel_futures=True)
+    _hash_pool = None
+    _hash_admission = None
+
+
+def _create_token(subject: str, expires_delta: timedelta, token_type: str, token_version: int) -> str:
     now = datetime.now(timezone.utc)
     payload: Dict[str, Any] = {
         "sub": subject,
         "type": token_type,
+        "ver": token_version,
         "iat": int(now.timestamp()),
         "exp": int((now + expires_delta).timestamp()),
     }
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
 
-def create_access_token(subject: str) -> str:
+def create_access_token(subject: str, token_version: int = 0) -> str:
     return _create_token(
         subject,
         expires_delta=timedelta(minutes=settings.access_token_expire_minutes),
         token_type="access",
+        token_version=token_version,
     )
 
 
-def create_refresh_token(subject: str) -> str:
+def create_refresh_token(subject: str, token_version: int = 0) -> str:
     return _create_token(
         subject,
         expires_delta=timedelta(minutes=settings.refresh_token_expire_minutes),
         token_type="refresh",
+        token_version=token_version,
     )
 
 
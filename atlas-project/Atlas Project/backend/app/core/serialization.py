@@ -0,0 +1,40 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+@lru_cache
+def schema_columns(model: type, schema: Type[BaseModel]) -> Tuple[InstrumentedAttribute, ...]:
+    """The mapped columns backing ``schema``'s fields, in field order."""
+    return tuple(getattr(model, name) for name in schema.__fields__)
+
+
+@lru_cache
+def _field_names(schema: Type[BaseModel]) -> Tuple[str, ...]:
+    return tuple(schema.__fields__)
+
+
+def rows_to_dicts(rows: Sequence[Any], schema: Type[BaseModel]) -> List[Dict[str, Any]]:
+    """Zip rows selected with ``schema_columns`` into plain dicts, skipping validation."""
+    names = _field_names(schema)
+    return [dict(zip(names, row)) for row in rows]
+
+
+def list_page(
+    items: List[Dict[str, Any]],
+    total: Optional[int],
+    page: int,
+    page_size: int,
+    next_cursor: Optional[str],
+) -> Dict[str, Any]:
+    """Same shape and key order as the ``*List`` response schemas."""
+    return {
+        "items": items,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+    }
+
@@ -1,11 +1,105 @@
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar, Union
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 
 import os
 
+from app.core.config import settings
+
+T = TypeVar("T")
+
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./dev.db")
+# Optional read replica for GET traffic; without it reads go to the primary.
+DATABASE_READ_URL = settings.database_read_url or None
+
+_url = make_url(DATABASE_URL)
+# An async driver in the URL (sqlite+aiosqlite, postgresql+asyncpg) switches
+# request handling to AsyncSession; the sync engine stays for background jobs.
+ASYNC_DATABASE = _url.get_dialect().is_async
+
+
+def _sync_url(url: URL) -> URL:
+    return url.set(drivername=url.get_backend_name()) if url.get_dialect().is_async else url
+
+
+SYNC_DATABASE_URL = _sync_url(_url)
+
+
+def _engine_options(url: URL) -> Dict[str, Any]:
+    if url.get_backend_name() == "sqlite":
+        # SQLite picks its own pool per driver / database; only tune the connection.
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def _set_sqlite_pragmas(dbapi_connection: Any, _: Any) -> None:
+    """WAL lets readers run alongside the single writer instead of blocking on it."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    cursor.close()
 
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, echo=False, future=True, connect_args=connect_args)
+
+def _create_engines(url: URL) -> Tuple[Engine, Optional[AsyncEngine]]:
+    """Sync engine for ``url`` plus an async one when its driver is async."""
+    sync_engine = create_engine(_sync_url(url), echo=False, future=True, **_engine_options(url))
+    async_engine = None
+    if url.get_dialect().is_async:
+        async_engine = create_async_engine(url, echo=False, **_engine_options(url))
+    if url.get_backend_name() == "sqlite":
+        event.listen(sync_engine, "connect", _set_sqlite_pragmas)
+        if async_engine is not None:
+            event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return sync_engine, async_engine
+
+
+engine, async_engine = _create_engines(_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
+
+if DATABASE_READ_URL:
+    read_engine, async_read_engine = _create_engines(make_url(DATABASE_READ_URL))
+else:
+    read_engine, async_read_engine = engine, async_engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine, future=True)
+
+AsyncSessionLocal: Optional[async_sessionmaker[AsyncSession]] = None
+AsyncReadSessionLocal: Optional[async_sessionmaker[AsyncSession]] = None
+if async_engine is not None:
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+if async_read_engine is not None:
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+DbSession = Union[Session, AsyncSession]
+
+
+async def dispose_engines() -> None:
+    """Close pooled connections of every engine created above."""
+    engine.dispose()
+    if read_engine is not engine:
+        read_engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
+    if async_read_engine is not None and async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+
+
+async def run_db(db: DbSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run sync ORM code ``fn(session, *args)`` without blocking the event loop.
+
+    With an ``AsyncSession`` the work runs on the loop through ``run_sync``;
+    with a plain ``Session`` it is handed to the threadpool as before.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
@@ -1,35 +1,178 @@
-from collections.abc import Generator
-from typing import Annotated
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Annotated, Any, Dict, Optional, Tuple
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
+from app.core.config import settings
 from app.core.security import decode_token
-from app.db import SessionLocal
+from app.db import (
+    AsyncReadSessionLocal,
+    AsyncSessionLocal,
+    DbSession,
+    ReadSessionLocal,
+    SessionLocal,
+    run_db,
+)
 from app.models import User
+from app.services import versions
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-def get_db() -> Generator[Session, None, None]:
-    db = SessionLocal()
+@dataclass(frozen=True)
+class Principal:
+    """Authenticated caller as asserted by a verified access token."""
+
+    id: int
+    token_version: int
+
+
+class _TokenVersionCache:
+    """Short-lived, bounded map of user id -> current token version."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Tuple[float, int]]" = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def set(self, user_id: int, token_version: int) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + settings.auth_cache_ttl_seconds, token_version)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.auth_cache_max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+_token_versions = _TokenVersionCache()
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Forget the cached token version, e.g. after revoking a user's tokens."""
+    _token_versions.discard(user_id)
+
+
+async def _session_scope(
+    sync_factory: sessionmaker, async_factory: Optional[async_sessionmaker]
+) -> AsyncIterator[DbSession]:
+    if async_factory is not None:
+        async with async_factory() as db:
+            yield db
+        return
+    db = sync_factory()
     try:
         yield db
     finally:
-        db.close()
+        await run_in_threadpool(db.close)
 
 
-def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    db: Annotated[Session, Depends(get_db)],
-) -> User:
-    payload = decode_token(token, expected_type="access")
+async def get_db() -> AsyncIterator[DbSession]:
+    """Request-scoped session: ``AsyncSession`` for async database URLs, ``Session`` otherwise."""
+    async for db in _session_scope(SessionLocal, AsyncSessionLocal):
+        yield db
+
+
+async def get_read_db() -> AsyncIterator[DbSession]:
+    """Session for GET handlers; bound to the read replica when ``DATABASE_READ_URL`` is set.
+
+    Replicas may lag the primary, so anything that writes or must see the
+    caller's own just-committed changes belongs on ``get_db``.
+    """
+    async for db in _session_scope(ReadSessionLocal, AsyncReadSessionLocal):
+        yield db
+
+
+def _token_claims(payload: Dict[str, Any]) -> Tuple[int, int]:
     user_id = payload.get("sub")
     if user_id is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
-    user = db.get(User, int(user_id))
-    if not user:
+    return int(user_id), int(payload.get("ver", 0))
+
+
+def _check_token_version(token_version: int, current_version: Optional[int]) -> None:
+    if current_version is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    if token_version != current_version:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+
+
+def _load_token_version(db: Session, user_id: int) -> Optional[int]:
+    return db.scalar(select(User.token_version).where(User.id == user_id))
+
+
+async def _fetch_token_version(user_id: int) -> Optional[int]:
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            return await run_db(db, _load_token_version, user_id)
+
+    def load() -> Optional[int]:
+        with SessionLocal() as db:
+            return _load_token_version(db, user_id)
+
+    return await run_in_threadpool(load)
+
+
+async def get_current_principal(token: Annotated[str, Depends(oauth2_scheme)]) -> Principal:
+    """Trust the verified JWT claims; only hit the database on a cache miss."""
+    user_id, token_version = _token_claims(decode_token(token, expected_type="access"))
+    current_version = _token_versions.get(user_id)
+    if current_version is None:
+        current_version = await _fetch_token_version(user_id)
+        if current_version is not None:
+            _token_versions.set(user_id, current_version)
+    _check_token_version(token_version, current_version)
+    return Principal(id=user_id, token_version=token_version)
+
+
+async def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Annotated[DbSession, Depends(get_db)],
+) -> User:
+    user_id, token_version = _token_claims(decode_token(token, expected_type="access"))
+    user = await run_db(db, lambda session: session.get(User, user_id))
+    _check_token_version(token_version, user.token_version if user else None)
+    _token_versions.set(user.id, user.token_version)
     return user
+
+
+async def get_data_etag(
+    request: Request,
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_read_db)],
+) -> str:
+    """ETag of the caller's current data version, checked before the handler queries anything.
+
+    Answers ``304 Not Modified`` when ``If-None-Match`` already carries it.
+    Shares the request's read session, so the version matches the data served.
+    """
+    etag = versions.make_etag(
+        current_user.id, await run_db(db, versions.load_data_version, current_user.id)
+    )
+    if versions.etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=versions.cache_headers(etag)
+        )
+    return etag
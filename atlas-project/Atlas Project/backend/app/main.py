@@ -1,20 +1,63 @@
+import asyncio
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core import security
 from app.core.config import settings
 from app.routers import (
     auth as auth_router,
+    bootstrap as bootstrap_router,
     dashboard as dashboard_router,
+    events as events_router,
     portfolios as portfolios_router,
     properties as properties_router,
     rentcast as rentcast_router,
     stocks as stocks_router,
 )
-from app.db import engine
+from app.db import dispose_engines, engine
+from app import migrations
 from app.models import Base
+from app.providers import prices as price_providers, rentcast as rentcast_provider
+from app.services import (
+    events,
+    price_refresh,
+    projections,
+    refresh_jobs,
+    rent_history,
+    snapshots,
+    summary,
+)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    await rentcast_provider.open_client()
+    background = [
+        asyncio.create_task(snapshots.run_daily_snapshots()),
+        asyncio.create_task(rent_history.run_periodic_compaction()),
+        asyncio.create_task(summary.run_periodic_reconcile()),
+        asyncio.create_task(refresh_jobs.run_periodic_sweep()),
+    ]
+    price_provider = price_providers.get_price_provider()
+    if price_provider is not None:
+        background.append(asyncio.create_task(price_refresh.run_periodic_refresh(price_provider)))
+    try:
+        yield
+    finally:
+        for task in background:
+            task.cancel()
+        events.broker.close()
+        await refresh_jobs.shutdown()
+        await rentcast_provider.close_client()
+        rentcast_provider.close_response_cache()
+        security.shutdown_password_hashing()
+        projections.shutdown_projection_pool()
+        await dispose_engines()
+
 
-app = FastAPI(title="Cross-Asset Portfolio API", version="0.1.0")
+app = FastAPI(title="Cross-Asset Portfolio API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,6 +69,8 @@ app.add_middleware(
 
 # Create tables automatically for dev (use Alembic for prod)
 Base.metadata.create_all(bind=engine)
+# ... and add columns/indexes that tables created by older versions lack
+migrations.upgrade(engine)
 
 @app.get("/health")
 def health(): return {"status":"ok"}
@@ -36,4 +81,6 @@ app.include_router(portfolios_router.router)
 app.include_router(properties_router.router)
 app.include_router(stocks_router.router)
 app.include_router(dashboard_router.router)
+app.include_router(bootstrap_router.router)
+app.include_router(events_router.router)
 app.include_router(rentcast_router.router)
@@ -0,0 +1,54 @@
+"""Idempotent startup upgrade for databases created by an older version.
+
+``Base.metadata.create_all`` creates missing tables but never alters an
+existing one, so columns and indexes added to existing tables since would
+be missing there. ``upgrade`` adds them: ``ALTER TABLE ... ADD COLUMN`` for
+each missing column, ``CREATE INDEX`` for each missing index. Columns that
+are ``NOT NULL`` need a server default to be added this way.
+"""
+import logging
+
+from sqlalchemy import Engine, inspect
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateColumn
+
+from app.models import Base
+
+logger = logging.getLogger(__name__)
+
+
+def _add_column(engine: Engine, table_name: str, column) -> None:
+    ddl = CreateColumn(column).compile(dialect=engine.dialect)
+    try:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {ddl}")
+    except DBAPIError:
+        # another worker upgrading at the same time may have added it first
+        if column.name not in {c["name"] for c in inspect(engine).get_columns(table_name)}:
+            raise
+    logger.info("Added column %s.%s", table_name, column.name)
+
+
+def _create_index(engine: Engine, table_name: str, index) -> None:
+    try:
+        with engine.begin() as conn:
+            index.create(conn)
+    except DBAPIError:
+        if index.name not in {i["name"] for i in inspect(engine).get_indexes(table_name)}:
+            raise
+    logger.info("Created index %s", index.name)
+
+
+def upgrade(engine: Engine) -> None:
+    existing = set(inspect(engine).get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        columns = {column["name"] for column in inspect(engine).get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                _add_column(engine, table.name, column)
+        indexes = {index["name"] for index in inspect(engine).get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                _create_index(engine, table.name, index)
@@ -1,7 +1,8 @@
 
+from datetime import date, datetime
 from typing import List, Optional
 
-from sqlalchemy import String, Integer, Float, ForeignKey, Date, DateTime, func
+from sqlalchemy import JSON, String, Integer, Float, ForeignKey, Date, DateTime, Index, Text, func
 from sqlalchemy.orm import Mapped, declarative_base, mapped_column, relationship
 
 Base = declarative_base()
@@ -11,13 +12,17 @@ class User(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
     password_hash: Mapped[str] = mapped_column(String(255))
-    created_at: Mapped[DateTime] = mapped_column(server_default=func.now())
+    token_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # bumped by every write to the user's data; conditional GETs derive their ETag from it
+    data_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     portfolios: Mapped[List["Portfolio"]] = relationship(
         back_populates="owner", cascade="all, delete-orphan"
     )
 
 class Portfolio(Base):
     __tablename__="portfolios"
+    __table_args__ = (Index("ix_portfolios_user_id_id", "user_id", "id"),)
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
     name: Mapped[str] = mapped_column(String(120), default="My Portfolio")
@@ -31,6 +36,7 @@ class Portfolio(Base):
 
 class Property(Base):
     __tablename__="properties"
+    __table_args__ = (Index("ix_properties_portfolio_id_id", "portfolio_id", "id"),)
     id: Mapped[int] = mapped_column(primary_key=True)
     portfolio_id: Mapped[int] = mapped_column(ForeignKey("portfolios.id", ondelete="CASCADE"))
     address: Mapped[str] = mapped_column(String(255))
@@ -38,10 +44,10 @@ class Property(Base):
     state: Mapped[str] = mapped_column(String(8))
     zip: Mapped[str] = mapped_column(String(16))
     purchase_price: Mapped[float] = mapped_column(Float, default=0.0)
-    purchase_date: Mapped[Date] = mapped_column(nullable=True)
+    purchase_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
     valuation_method: Mapped[str] = mapped_column(String(32), default="manual")
     last_valuation: Mapped[float] = mapped_column(Float, default=0.0)
-    last_valuation_at: Mapped[DateTime] = mapped_column(nullable=True)
+    last_valuation_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     monthly_rent: Mapped[float] = mapped_column(Float, default=0.0)
     monthly_operating_expenses: Mapped[float] = mapped_column(Float, default=0.0)
     monthly_mortgage: Mapped[float] = mapped_column(Float, default=0.0)
@@ -51,9 +57,11 @@ class Property(Base):
     bathrooms: Mapped[float] = mapped_column(Float, default=0.0)
     living_area_sqft: Mapped[float] = mapped_column(Float, default=0.0)
     year_built: Mapped[int] = mapped_column(Integer, nullable=True)
-    rc_last_checked_at: Mapped[DateTime] = mapped_column(nullable=True)
+    rc_last_checked_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     rc_confidence: Mapped[float] = mapped_column(Float, default=0.0)
     rc_source_id: Mapped[str] = mapped_column(String(64), nullable=True)
+    latitude: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    longitude: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     portfolio: Mapped["Portfolio"] = relationship(back_populates="properties")
     rent_estimates: Mapped[List["RentEstimate"]] = relationship(
         back_populates="property", cascade="all, delete-orphan"
@@ -61,22 +69,58 @@ class Property(Base):
     rent_comps: Mapped[List["RentComp"]] = relationship(
         back_populates="property", cascade="all, delete-orphan"
     )
+    latest_rent_estimates: Mapped[List["LatestRentEstimate"]] = relationship(
+        cascade="all, delete-orphan"
+    )
+    rent_estimate_rollups: Mapped[List["RentEstimateRollup"]] = relationship(
+        cascade="all, delete-orphan"
+    )
 
 class RentEstimate(Base):
     __tablename__="rent_estimates"
+    __table_args__ = (Index("ix_rent_estimates_property_id_as_of", "property_id", "as_of"),)
     id: Mapped[int] = mapped_column(primary_key=True)
     property_id: Mapped[int] = mapped_column(ForeignKey("properties.id", ondelete="CASCADE"))
     estimate: Mapped[float] = mapped_column(Float)
     low: Mapped[float] = mapped_column(Float)
     high: Mapped[float] = mapped_column(Float)
-    as_of: Mapped[DateTime] = mapped_column(server_default=func.now())
+    confidence: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    as_of: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     provider: Mapped[str] = mapped_column(String(32), default="rentcast")
     property: Mapped["Property"] = relationship(back_populates="rent_estimates")
 
+class LatestRentEstimate(Base):
+    """Newest estimate per property and provider, written alongside every ``rent_estimates`` row."""
+    __tablename__ = "latest_rent_estimates"
+    property_id: Mapped[int] = mapped_column(
+        ForeignKey("properties.id", ondelete="CASCADE"), primary_key=True
+    )
+    provider: Mapped[str] = mapped_column(String(32), primary_key=True)
+    estimate: Mapped[float] = mapped_column(Float)
+    low: Mapped[float] = mapped_column(Float)
+    high: Mapped[float] = mapped_column(Float)
+    confidence: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    as_of: Mapped[datetime] = mapped_column(DateTime)
+
+class RentEstimateRollup(Base):
+    """One month of compacted ``rent_estimates`` rows, kept as sums so months merge exactly."""
+    __tablename__ = "rent_estimate_rollups"
+    property_id: Mapped[int] = mapped_column(
+        ForeignKey("properties.id", ondelete="CASCADE"), primary_key=True
+    )
+    provider: Mapped[str] = mapped_column(String(32), primary_key=True)
+    month: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    samples: Mapped[int] = mapped_column(Integer, default=0)
+    estimate_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    low_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    high_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    estimate_min: Mapped[float] = mapped_column(Float)
+    estimate_max: Mapped[float] = mapped_column(Float)
+
 class RentComp(Base):
     __tablename__="rent_comps"
     id: Mapped[int] = mapped_column(primary_key=True)
-    property_id: Mapped[int] = mapped_column(ForeignKey("properties.id", ondelete="CASCADE"))
+    property_id: Mapped[int] = mapped_column(ForeignKey("properties.id", ondelete="CASCADE"), index=True)
     address: Mapped[str] = mapped_column(String(255))
     distance_mi: Mapped[float] = mapped_column(Float, default=0.0)
     monthly_rent: Mapped[float] = mapped_column(Float, default=0.0)
@@ -84,18 +128,111 @@ class RentComp(Base):
     bath: Mapped[float] = mapped_column(Float, default=0.0)
     sqft: Mapped[float] = mapped_column(Float, default=0.0)
     days_on_market: Mapped[int] = mapped_column(Integer, default=0)
-    as_of: Mapped[DateTime] = mapped_column(server_default=func.now())
+    as_of: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     provider: Mapped[str] = mapped_column(String(32), default="rentcast")
     property: Mapped["Property"] = relationship(back_populates="rent_comps")
 
+class CompListing(Base):
+    """Rental comp shared by every property near it, deduplicated by normalized address."""
+    __tablename__ = "comp_listings"
+    # covers the local rent model's batch scan, so it never touches the table
+    __table_args__ = (
+        Index(
+            "ix_comp_listings_geohash",
+            "geohash",
+            "latitude",
+            "longitude",
+            "last_seen_at",
+            "monthly_rent",
+            "bed",
+            "bath",
+            "sqft",
+        ),
+    )
+    id: Mapped[int] = mapped_column(primary_key=True)
+    address_key: Mapped[str] = mapped_column(String(255), unique=True)
+    address: Mapped[str] = mapped_column(String(255))
+    latitude: Mapped[float] = mapped_column(Float)
+    longitude: Mapped[float] = mapped_column(Float)
+    geohash: Mapped[str] = mapped_column(String(12))
+    monthly_rent: Mapped[float] = mapped_column(Float, default=0.0)
+    bed: Mapped[float] = mapped_column(Float, default=0.0)
+    bath: Mapped[float] = mapped_column(Float, default=0.0)
+    sqft: Mapped[float] = mapped_column(Float, default=0.0)
+    days_on_market: Mapped[int] = mapped_column(Integer, default=0)
+    provider: Mapped[str] = mapped_column(String(32), default="rentcast")
+    last_seen_at: Mapped[datetime] = mapped_column(DateTime)
+
 class StockHolding(Base):
     __tablename__ = "stock_holdings"
+    __table_args__ = (
+        Index("ix_stock_holdings_portfolio_id_id", "portfolio_id", "id"),
+        Index("ix_stock_holdings_symbol", "symbol"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     portfolio_id: Mapped[int] = mapped_column(ForeignKey("portfolios.id", ondelete="CASCADE"))
     symbol: Mapped[str] = mapped_column(String(16))
     shares: Mapped[float] = mapped_column(Float, default=0.0)
     average_cost: Mapped[float] = mapped_column(Float, default=0.0)
     last_price: Mapped[float] = mapped_column(Float, default=0.0)
-    last_price_at: Mapped[Optional[DateTime]] = mapped_column(nullable=True)
+    last_price_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     notes: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     portfolio: Mapped["Portfolio"] = relationship(back_populates="stock_holdings")
+
+class UserSummary(Base):
+    __tablename__ = "user_summaries"
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    properties_value: Mapped[float] = mapped_column(Float, default=0.0)
+    stocks_value: Mapped[float] = mapped_column(Float, default=0.0)
+    monthly_cashflow: Mapped[float] = mapped_column(Float, default=0.0)
+    property_count: Mapped[int] = mapped_column(Integer, default=0)
+    stock_count: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now()
+    )
+
+class PortfolioValueSnapshot(Base):
+    __tablename__ = "portfolio_value_snapshots"
+    __table_args__ = (
+        Index("ix_portfolio_value_snapshots_user_id_as_of", "user_id", "as_of"),
+    )
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    as_of: Mapped[datetime] = mapped_column(DateTime)
+    net_worth: Mapped[float] = mapped_column(Float, default=0.0)
+    properties_value: Mapped[float] = mapped_column(Float, default=0.0)
+    stocks_value: Mapped[float] = mapped_column(Float, default=0.0)
+
+class RentCastUsage(Base):
+    """RentCast calls made in one calendar month (UTC), shared by every worker."""
+    __tablename__ = "rentcast_usage"
+    month: Mapped[str] = mapped_column(String(7), primary_key=True)
+    interactive_calls: Mapped[int] = mapped_column(Integer, default=0)
+    background_calls: Mapped[int] = mapped_column(Integer, default=0)
+
+class JobLease(Base):
+    """Which worker runs a periodic job until ``expires_at``; one row per job."""
+    __tablename__ = "job_leases"
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    holder: Mapped[str] = mapped_column(String(128))
+    expires_at: Mapped[datetime] = mapped_column(DateTime)
+
+class PortfolioRefreshJob(Base):
+    """Progress of a portfolio-wide RentCast refresh, so any worker can answer a status poll."""
+    __tablename__ = "portfolio_refresh_jobs"
+    __table_args__ = (Index("ix_portfolio_refresh_jobs_finished_at", "finished_at"),)
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    portfolio_id: Mapped[int] = mapped_column(ForeignKey("portfolios.id", ondelete="CASCADE"))
+    status: Mapped[str] = mapped_column(String(16))
+    total: Mapped[int] = mapped_column(Integer, default=0)
+    refreshed: Mapped[int] = mapped_column(Integer, default=0)
+    skipped: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+    deferred: Mapped[int] = mapped_column(Integer, default=0)
+    errors: Mapped[dict] = mapped_column(JSON, default=dict)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # renewed by the worker running the job; a stale one means that worker died
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
@@ -0,0 +1,208 @@
+
+import asyncio, json, re, sqlite3, threading, time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+from .rental_base import IAsyncRentalDataProvider
+
+ENDPOINTS = ("details", "estimate", "comps")
+
+_SUFFIXES = {
+    "street": "st",
+    "avenue": "ave",
+    "road": "rd",
+    "drive": "dr",
+    "boulevard": "blvd",
+    "lane": "ln",
+    "court": "ct",
+    "place": "pl",
+    "terrace": "ter",
+    "parkway": "pkwy",
+    "highway": "hwy",
+    "circle": "cir",
+    "apartment": "apt",
+    "suite": "ste",
+    "north": "n",
+    "south": "s",
+    "east": "e",
+    "west": "w",
+}
+
+
+def normalize_address(address: str) -> str:
+    """Canonical form used for cache keys: lowercase, no punctuation, short suffixes."""
+    text = address.lower().replace("#", " apt ")
+    parts = [part.split() for part in re.sub(r"[^a-z0-9,\s]", " ", text).split(",")]
+    return ",".join(
+        " ".join(_SUFFIXES.get(word, word) for word in words) for words in parts if words
+    )
+
+
+@dataclass
+class CacheCounters:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    stale: int = 0
+
+
+class SqliteResponseStore:
+    """On-disk tier so cached lookups survive restarts."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS rentcast_cache ("
+                "key TEXT PRIMARY KEY, expires_at REAL NOT NULL, payload TEXT NOT NULL)"
+            )
+
+    def get(self, key: str, now: float) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at, payload FROM rentcast_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[0] <= now:
+            return None
+        return row[0], json.loads(row[1])
+
+    def set(self, key: str, expires_at: float, value: Any) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rentcast_cache (key, expires_at, payload) VALUES (?, ?, ?)",
+                (key, expires_at, json.dumps(value)),
+            )
+            self._conn.execute("DELETE FROM rentcast_cache WHERE expires_at <= ?", (time.time(),))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RentalResponseCache:
+    """Process-wide TTL + LRU store shared by every cached provider instance.
+
+    Expired entries stay in memory until evicted: when a reload fails with
+    one of ``stale_errors`` (a refused or rate-limited call), the expired
+    value is served instead. Only the memory tier falls back this way; the
+    disk tier prunes expired rows on every write. Concurrent loads of a key
+    are merged only within one ``lane``, so a caller never waits on a load
+    that is queued behind a lower-priority budget.
+    """
+
+    def __init__(
+        self,
+        ttls: Dict[str, float],
+        max_entries: int,
+        store: Optional[SqliteResponseStore] = None,
+        stale_errors: Tuple[Type[BaseException], ...] = (),
+    ):
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self.store = store
+        self.stale_errors = stale_errors
+        self.counters = {endpoint: CacheCounters() for endpoint in ENDPOINTS}
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], "asyncio.Task[Any]"] = {}
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_load(
+        self, endpoint: str, key: str, loader: Callable[[], Awaitable[Any]], lane: str = ""
+    ) -> Any:
+        counters = self.counters[endpoint]
+        cached = self._entries.get(key)
+        if cached is not None and cached[0] > time.time():
+            self._entries.move_to_end(key)
+            counters.hits += 1
+            return cached[1]
+
+        flight = (lane, key)
+        task = self._inflight.get(flight)
+        if task is not None:
+            counters.coalesced += 1
+        else:
+            # the load is its own task: a caller that goes away takes nobody else's lookup with it
+            task = asyncio.create_task(self._load(endpoint, key, loader, cached))
+            self._inflight[flight] = task
+            task.add_done_callback(lambda done: self._landed(flight, done))
+        return await asyncio.shield(task)
+
+    def _landed(self, flight: Tuple[str, str], task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(flight) is task:
+            del self._inflight[flight]
+        if not task.cancelled():
+            task.exception()  # every waiter may have left; silence "never retrieved"
+
+    async def _load(
+        self,
+        endpoint: str,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        cached: Optional[Tuple[float, Any]],
+    ) -> Any:
+        counters = self.counters[endpoint]
+        stored = await asyncio.to_thread(self.store.get, key, time.time()) if self.store else None
+        if stored is not None:
+            counters.disk_hits += 1
+            expires_at, value = stored
+        else:
+            counters.misses += 1
+            try:
+                value = await loader()
+            except self.stale_errors:
+                if cached is None:
+                    raise
+                counters.stale += 1
+                return cached[1]
+            expires_at = time.time() + self.ttls[endpoint]
+            if self.store:
+                await asyncio.to_thread(self.store.set, key, expires_at, value)
+        self._remember(key, expires_at, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "endpoints": {endpoint: asdict(counter) for endpoint, counter in self.counters.items()},
+            "upstream_calls_saved": sum(
+                c.hits + c.disk_hits + c.coalesced for c in self.counters.values()
+            ),
+        }
+
+    def close(self) -> None:
+        if self.store:
+            self.store.close()
+
+
+class CachedRentalDataProvider(IAsyncRentalDataProvider):
+    def __init__(self, inner: IAsyncRentalDataProvider, cache: RentalResponseCache, lane: str = ""):
+        self.inner = inner
+        self.cache = cache
+        self.lane = lane
+
+    async def get_property_details(self, address: str)->Dict[str, Any]:
+        key = f"details:{normalize_address(address)}"
+        return await self.cache.get_or_load(
+            "details", key, lambda: self.inner.get_property_details(address), lane=self.lane
+        )
+
+    async def get_rent_estimate(self, address: str)->Dict[str, Any]:
+        key = f"estimate:{normalize_address(address)}"
+        return await self.cache.get_or_load(
+            "estimate", key, lambda: self.inner.get_rent_estimate(address), lane=self.lane
+        )
+
+    async def get_rent_comps(self, address: str, limit: int = 10)->List[Dict[str, Any]]:
+        key = f"comps:{limit}:{normalize_address(address)}"
+        return await self.cache.get_or_load(
+            "comps", key, lambda: self.inner.get_rent_comps(address, limit=limit), lane=self.lane
+        )
@@ -0,0 +1,20 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Sequence
+
+
+@dataclass(frozen=True)
+class Quote:
+    symbol: str
+    price: float
+    as_of: datetime
+
+
+class IAsyncPriceProvider(ABC):
+    # symbols a single get_quotes call may ask for
+    max_batch_size: int = 100
+
+    @abstractmethod
+    async def get_quotes(self, symbols: Sequence[str]) -> Dict[str, Quote]:
+        """Latest quote per symbol; unknown symbols are simply left out."""
@@ -0,0 +1,46 @@
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from .price_base import IAsyncPriceProvider, Quote
+
+_provider: Optional[IAsyncPriceProvider] = None
+
+
+class FakePriceProvider(IAsyncPriceProvider):
+    """Local, deterministic quotes for tests and offline development.
+
+    Prices come from ``prices`` when given, otherwise from a stable hash of
+    the symbol. Every call is recorded in ``calls`` so tests can assert how
+    many lookups a refresh made.
+    """
+
+    def __init__(self, prices: Optional[Dict[str, float]] = None, max_batch_size: int = 100):
+        self.prices = {symbol.upper(): price for symbol, price in (prices or {}).items()}
+        self.max_batch_size = max_batch_size
+        self.calls: List[List[str]] = []
+
+    def _price(self, symbol: str) -> Optional[float]:
+        if self.prices:
+            return self.prices.get(symbol)
+        digest = hashlib.sha256(symbol.encode()).digest()
+        return round(10 + int.from_bytes(digest[:4], "big") % 49_000 / 100, 2)
+
+    async def get_quotes(self, symbols: Sequence[str]) -> Dict[str, Quote]:
+        self.calls.append(list(symbols))
+        now = datetime.utcnow()
+        quotes = {}
+        for symbol in symbols:
+            price = self._price(symbol)
+            if price is not None:
+                quotes[symbol] = Quote(symbol=symbol, price=price, as_of=now)
+        return quotes
+
+
+def get_price_provider() -> Optional[IAsyncPriceProvider]:
+    """Provider named by ``PRICE_PROVIDER``; ``None`` leaves prices to manual entry."""
+    global _provider
+    if _provider is None and settings.price_provider == "fake":
+        _provider = FakePriceProvider(max_batch_size=settings.price_batch_size)
+    return _provider
@@ -0,0 +1,229 @@
+import asyncio
+import calendar
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models import RentCastUsage
+from .rental_base import IAsyncRentalDataProvider, QuotaExceeded, RateLimited
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+# a person is waiting on interactive calls; past this they are better off with an error
+INTERACTIVE_MAX_WAIT_SECONDS = 5.0
+WINDOW_SECONDS = 60.0
+
+
+@dataclass
+class BudgetCounters:
+    calls: int = 0
+    refused: int = 0
+    waits: int = 0
+
+
+def _month(now: datetime) -> str:
+    return now.strftime("%Y-%m")
+
+
+def _seconds_until_next_month(now: datetime) -> float:
+    days = calendar.monthrange(now.year, now.month)[1]
+    return (datetime(now.year, now.month, 1) + timedelta(days=days) - now).total_seconds()
+
+
+def monthly_limit(priority: str, now: datetime) -> Optional[int]:
+    """Calls this priority may have used so far this month (``None`` when unmetered).
+
+    Interactive calls may spend the whole quota. Background calls leave
+    ``rentcast_background_reserve`` of it to interactive ones and follow an
+    even pace through the month, ``rentcast_background_pace_days`` ahead, so
+    one batch job cannot burn the month on its first day.
+    """
+    quota = settings.rentcast_monthly_quota
+    if quota <= 0:
+        return None
+    if priority == INTERACTIVE:
+        return quota
+    days = calendar.monthrange(now.year, now.month)[1]
+    elapsed = (now - datetime(now.year, now.month, 1)).total_seconds() / 86400
+    share = min(1.0, (elapsed + settings.rentcast_background_pace_days) / days)
+    return int(quota * (1 - settings.rentcast_background_reserve) * share)
+
+
+def _minute_limit(priority: str) -> Optional[int]:
+    quota = settings.rentcast_per_minute_quota
+    if quota <= 0:
+        return None
+    if priority == INTERACTIVE:
+        return quota
+    return max(1, int(quota * (1 - settings.rentcast_background_reserve)))
+
+
+def _reserve_call(priority: str, limit: Optional[int]) -> Optional[int]:
+    """Count one call against this month unless the month's total already reached ``limit``.
+
+    The check and the increment are one ``UPDATE``, so workers sharing the
+    database never overspend together. Returns the new total, or ``None``
+    when refused.
+    """
+    month = _month(datetime.utcnow())
+    column = getattr(RentCastUsage, f"{priority}_calls")
+    used = RentCastUsage.interactive_calls + RentCastUsage.background_calls
+    stmt = (
+        update(RentCastUsage)
+        .where(RentCastUsage.month == month)
+        .values({column: column + 1})
+        .returning(used)
+    )
+    if limit is not None:
+        stmt = stmt.where(used < limit)
+    with SessionLocal() as db:
+        for _ in range(2):
+            total = db.scalar(stmt)
+            if total is not None:
+                db.commit()
+                return total
+            if db.get(RentCastUsage, month) is not None:
+                return None
+            try:
+                db.add(RentCastUsage(month=month, interactive_calls=0, background_calls=0))
+                db.commit()
+            except IntegrityError:  # another worker opened the month first
+                db.rollback()
+    return None
+
+
+def _load_usage() -> Dict[str, int]:
+    with SessionLocal() as db:
+        row = db.get(RentCastUsage, _month(datetime.utcnow()))
+        if row is None:
+            return {"interactive_calls": 0, "background_calls": 0}
+        return {"interactive_calls": row.interactive_calls, "background_calls": row.background_calls}
+
+
+class RentCastBudget:
+    """Calls used against the monthly and per-minute RentCast budgets.
+
+    The monthly count lives in ``rentcast_usage``; the per-minute window is
+    per process. Background calls never take the last
+    ``rentcast_background_reserve`` of either budget, so interactive calls
+    find room first. Over the per-minute rate a call waits for a slot, up to
+    ``INTERACTIVE_MAX_WAIT_SECONDS`` or ``rentcast_background_max_wait_seconds``,
+    and is refused with ``QuotaExceeded`` beyond that or past its monthly limit.
+    """
+
+    def __init__(self) -> None:
+        self._window: Deque[float] = deque()
+        self._cooldown_until = 0.0
+        self.counters = {priority: BudgetCounters() for priority in PRIORITIES}
+
+    def _prune(self, now: float) -> None:
+        while self._window and self._window[0] <= now - WINDOW_SECONDS:
+            self._window.popleft()
+
+    def _wait_for_slot(self, priority: str, now: float) -> float:
+        self._prune(now)
+        wait = 0.0
+        if priority == BACKGROUND:
+            wait = self._cooldown_until - now
+        limit = _minute_limit(priority)
+        if limit is not None and len(self._window) >= limit:
+            wait = max(wait, self._window[len(self._window) - limit] + WINDOW_SECONDS - now)
+        return wait
+
+    async def acquire(self, priority: str) -> None:
+        """Reserve one upstream call for ``priority`` or raise ``QuotaExceeded``."""
+        counters = self.counters[priority]
+        max_wait = (
+            INTERACTIVE_MAX_WAIT_SECONDS
+            if priority == INTERACTIVE
+            else settings.rentcast_background_max_wait_seconds
+        )
+        deadline = time.monotonic() + max_wait
+        while True:
+            now = time.monotonic()
+            wait = self._wait_for_slot(priority, now)
+            if wait <= 0:
+                break
+            if now + wait > deadline:
+                counters.refused += 1
+                raise QuotaExceeded("RentCast per-minute budget in use", retry_after=wait)
+            counters.waits += 1
+            await asyncio.sleep(wait)
+        # hold the minute slot while the monthly reservation is in flight
+        self._window.append(now)
+        today = datetime.utcnow()
+        limit = monthly_limit(priority, today)
+        if await asyncio.to_thread(_reserve_call, priority, limit) is None:
+            self._window.remove(now)
+            counters.refused += 1
+            raise QuotaExceeded(
+                f"RentCast monthly budget for {priority} calls is used up",
+                retry_after=_seconds_until_next_month(today),
+            )
+        counters.calls += 1
+
+    def cool_down(self, seconds: Optional[float]) -> None:
+        """Hold background calls back after the provider itself rate limited us."""
+        pause = WINDOW_SECONDS if seconds is None else max(seconds, 1.0)
+        self._cooldown_until = max(self._cooldown_until, time.monotonic() + pause)
+
+    async def usage(self) -> Dict[str, Any]:
+        month = await asyncio.to_thread(_load_usage)
+        now = datetime.utcnow()
+        used = month["interactive_calls"] + month["background_calls"]
+        quota = settings.rentcast_monthly_quota
+        background_limit = monthly_limit(BACKGROUND, now)
+        monotonic = time.monotonic()
+        self._prune(monotonic)
+        return {
+            "month": _month(now),
+            "monthly_quota": quota if quota > 0 else None,
+            "used": used,
+            **month,
+            "remaining": max(quota - used, 0) if quota > 0 else None,
+            "background_limit": background_limit,
+            "background_remaining": (
+                max(background_limit - used, 0) if background_limit is not None else None
+            ),
+            "per_minute_quota": _minute_limit(INTERACTIVE),
+            "used_last_minute": len(self._window),
+            "cooldown_seconds": round(max(self._cooldown_until - monotonic, 0.0), 1),
+            "process": {priority: asdict(counter) for priority, counter in self.counters.items()},
+        }
+
+
+budget = RentCastBudget()
+
+
+class BudgetedRentalDataProvider(IAsyncRentalDataProvider):
+    """Spends ``budget`` at ``priority`` for every call that reaches the wrapped provider."""
+
+    def __init__(self, inner: IAsyncRentalDataProvider, budget: RentCastBudget, priority: str):
+        self.inner = inner
+        self.budget = budget
+        self.priority = priority
+
+    async def _call(self, load: Callable[[], Awaitable[Any]]) -> Any:
+        await self.budget.acquire(self.priority)
+        try:
+            return await load()
+        except RateLimited as exc:
+            self.budget.cool_down(exc.retry_after)
+            raise
+
+    async def get_property_details(self, address: str)->Dict[str, Any]:
+        return await self._call(lambda: self.inner.get_property_details(address))
+
+    async def get_rent_estimate(self, address: str)->Dict[str, Any]:
+        return await self._call(lambda: self.inner.get_rent_estimate(address))
+
+    async def get_rent_comps(self, address: str, limit: int = 10)->List[Dict[str, Any]]:
+        return await self._call(lambda: self.inner.get_rent_comps(address, limit=limit))
@@ -1,11 +1,89 @@
 
+import asyncio
+import math
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Set
 
-class IRentalDataProvider(ABC):
+class QuotaExceeded(RuntimeError):
+    """A call was refused before reaching the provider, to stay within its usage budget."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimited(RuntimeError):
+    """The provider kept answering 429/503 after every retry."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def retry_after_headers(retry_after: Optional[float]) -> Optional[Dict[str, str]]:
+    """``Retry-After`` for a 429 answered on the budget's behalf, in whole seconds."""
+    if not retry_after:
+        return None
+    return {"Retry-After": str(math.ceil(retry_after))}
+
+
+class IAsyncRentalDataProvider(ABC):
     @abstractmethod
-    def get_property_details(self, address:str)->Dict[str,Any]: ...
+    async def get_property_details(self, address:str)->Dict[str,Any]: ...
     @abstractmethod
-    def get_rent_estimate(self, address:str)->Dict[str,Any]: ...
+    async def get_rent_estimate(self, address:str)->Dict[str,Any]: ...
     @abstractmethod
-    def get_rent_comps(self, address:str, limit:int=10)->List[Dict[str,Any]]: ...
+    async def get_rent_comps(self, address:str, limit:int=10)->List[Dict[str,Any]]: ...
+
+
+@dataclass
+class RentalLookup:
+    """Combined result of the three provider calls for one address.
+
+    A failed call leaves its slot empty and records the error message under
+    the call name (``details``, ``estimate`` or ``comps``); calls the quota
+    budget refused are also listed in ``refused``, with ``retry_after`` the
+    longest wait any of those refusals asked for.
+    """
+
+    details: Dict[str, Any] = field(default_factory=dict)
+    estimate: Dict[str, Any] = field(default_factory=dict)
+    comps: List[Dict[str, Any]] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+    refused: Set[str] = field(default_factory=set)
+    retry_after: Optional[float] = None
+
+    @property
+    def failed(self) -> bool:
+        return len(self.errors) == 3
+
+    @property
+    def deferred(self) -> bool:
+        """Nothing came back because the budget refused every call; worth retrying later."""
+        return self.failed and len(self.refused) == 3
+
+
+async def fetch_rental_lookup(
+    provider: IAsyncRentalDataProvider, address: str, comps_limit: int = 8
+) -> RentalLookup:
+    """Run the details, estimate and comps lookups concurrently."""
+    details, estimate, comps = await asyncio.gather(
+        provider.get_property_details(address),
+        provider.get_rent_estimate(address),
+        provider.get_rent_comps(address, limit=comps_limit),
+        return_exceptions=True,
+    )
+    lookup = RentalLookup()
+    for name, result in (("details", details), ("estimate", estimate), ("comps", comps)):
+        if isinstance(result, BaseException):
+            if not isinstance(result, Exception):
+                raise result
+            lookup.errors[name] = str(result) or result.__class__.__name__
+            if isinstance(result, QuotaExceeded):
+                lookup.refused.add(name)
+                if result.retry_after is not None:
+                    lookup.retry_after = max(lookup.retry_after or 0.0, result.retry_after)
+        elif result:
+            setattr(lookup, name, result)
+    return lookup
@@ -1,30 +1,145 @@
 
-import os, httpx, time
-from typing import Dict, Any, List
-from .rental_base import IRentalDataProvider
-
-RENTCAST_URL = os.getenv("RENTCAST_BASE_URL", "https://api.rentcast.io")
-API_KEY = os.getenv("RENTCAST_API_KEY", "")
-
-class RentCastProvider(IRentalDataProvider):
-    def __init__(self, client: httpx.Client | None = None):
-        headers = {"X-Api-Key": API_KEY} if API_KEY else {}
-        self.client = client or httpx.Client(headers=headers, timeout=20)
-
-    def _get(self, path: str, params: Dict[str, Any]):
-        for i in range(3):
-            r = self.client.get(f"{RENTCAST_URL}{path}", params=params)
-            if r.status_code == 429:
-                time.sleep(2**i); continue
+import httpx, asyncio, random
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+from app.core.config import settings
+from .cache import CachedRentalDataProvider, RentalResponseCache, SqliteResponseStore
+from .quota import BACKGROUND, INTERACTIVE, BudgetedRentalDataProvider, budget
+from .rental_base import IAsyncRentalDataProvider, QuotaExceeded, RateLimited
+
+RETRY_STATUSES = {429, 503}
+
+_client: Optional[httpx.AsyncClient] = None
+_providers: Dict[str, IAsyncRentalDataProvider] = {}
+_provider_client: Optional[httpx.AsyncClient] = None
+_cache: Optional[RentalResponseCache] = None
+
+
+def _client_kwargs() -> Dict[str, Any]:
+    headers = {"X-Api-Key": settings.rentcast_api_key} if settings.rentcast_api_key else {}
+    return {
+        "base_url": settings.rentcast_base_url,
+        "headers": headers,
+        "timeout": settings.rentcast_timeout,
+    }
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Seconds to wait before retrying: ``Retry-After`` when given, else full-jitter backoff."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None:
+            return min(max(delay, 0.0), settings.rentcast_backoff_max)
+    ceiling = min(settings.rentcast_backoff_max, settings.rentcast_backoff_base * 2**attempt)
+    return random.uniform(0, ceiling)
+
+
+async def open_client() -> httpx.AsyncClient:
+    """Create the process-wide pooled client; called from the app lifespan."""
+    global _client
+    if _client is None or _client.is_closed:
+        limits = httpx.Limits(
+            max_connections=settings.rentcast_max_connections,
+            max_keepalive_connections=settings.rentcast_max_keepalive_connections,
+            keepalive_expiry=settings.rentcast_keepalive_expiry,
+        )
+        _client = httpx.AsyncClient(limits=limits, **_client_kwargs())
+    return _client
+
+
+async def close_client() -> None:
+    global _client, _provider_client
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _providers.clear()
+    _provider_client = None
+
+
+def get_response_cache() -> RentalResponseCache:
+    global _cache
+    if _cache is None:
+        store = SqliteResponseStore(settings.rentcast_cache_path) if settings.rentcast_cache_path else None
+        _cache = RentalResponseCache(
+            ttls={
+                "details": settings.rentcast_cache_ttl_details,
+                "estimate": settings.rentcast_cache_ttl_estimate,
+                "comps": settings.rentcast_cache_ttl_comps,
+            },
+            max_entries=settings.rentcast_cache_max_entries,
+            store=store,
+            # refused or rate-limited lookups fall back to an expired entry when there is one
+            stale_errors=(QuotaExceeded, RateLimited),
+        )
+    return _cache
+
+
+def close_response_cache() -> None:
+    global _cache, _provider_client
+    if _cache is not None:
+        _cache.close()
+    _cache = None
+    _providers.clear()
+    _provider_client = None
+
+
+async def _budgeted_provider(priority: str) -> IAsyncRentalDataProvider:
+    global _provider_client
+    client = await open_client()
+    if _provider_client is not client:
+        _providers.clear()
+        _provider_client = client
+    if priority not in _providers:
+        provider: IAsyncRentalDataProvider = BudgetedRentalDataProvider(
+            AsyncRentCastProvider(client), budget, priority
+        )
+        if settings.rentcast_cache_enabled:
+            # one lane per priority: interactive lookups never wait on a background load
+            provider = CachedRentalDataProvider(provider, get_response_cache(), lane=priority)
+        _providers[priority] = provider
+    return _providers[priority]
+
+
+async def get_rentcast_provider() -> IAsyncRentalDataProvider:
+    """Provider bound to the shared pooled client, spending the budget at interactive priority."""
+    return await _budgeted_provider(INTERACTIVE)
+
+
+async def get_background_rentcast_provider() -> IAsyncRentalDataProvider:
+    """Same provider for bulk work: background priority, so it yields to interactive calls."""
+    return await _budgeted_provider(BACKGROUND)
+
+
+class AsyncRentCastProvider(IAsyncRentalDataProvider):
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+
+    async def _get(self, path: str, params: Dict[str, Any]):
+        # a setting of 0 still makes the request once
+        attempts = max(1, settings.rentcast_max_retries)
+        for i in range(attempts):
+            r = await self.client.get(path, params=params)
+            if r.status_code in RETRY_STATUSES:
+                delay = _retry_delay(r, i)
+                if i == attempts - 1:
+                    raise RateLimited("RentCast rate limited repeatedly", retry_after=delay)
+                await asyncio.sleep(delay); continue
             r.raise_for_status()
             return r.json()
-        raise RuntimeError("RentCast rate limited repeatedly")
 
-    def get_property_details(self, address: str)->Dict[str, Any]:
-        return self._get("/v1/properties", {"address": address})
+    async def get_property_details(self, address: str)->Dict[str, Any]:
+        return await self._get("/v1/properties", {"address": address})
 
-    def get_rent_estimate(self, address: str)->Dict[str, Any]:
-        return self._get("/v1/rents/estimate", {"address": address})
+    async def get_rent_estimate(self, address: str)->Dict[str, Any]:
+        return await self._get("/v1/rents/estimate", {"address": address})
 
-    def get_rent_comps(self, address: str, limit: int = 10)->List[Dict[str, Any]]:
-        return self._get("/v1/rents/comps", {"address": address, "limit": limit})
+    async def get_rent_comps(self, address: str, limit: int = 10)->List[Dict[str, Any]]:
+        return await self._get("/v1/rents/comps", {"address": address, "limit": limit})
@@ -1,17 +1,18 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
 from app.core.security import (
     create_access_token,
     create_refresh_token,
     decode_token,
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_and_update_password_async,
 )
-from app.deps import get_current_user, get_db
+from app.db import DbSession, run_db
+from app.deps import Principal, get_current_principal, get_current_user, get_db, invalidate_principal
 from app import schemas
 from app.models import User
 
@@ -20,48 +21,81 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 def _issue_tokens(user: User) -> schemas.TokenPair:
     return schemas.TokenPair(
-        access_token=create_access_token(str(user.id)),
-        refresh_token=create_refresh_token(str(user.id)),
+        access_token=create_access_token(str(user.id), user.token_version),
+        refresh_token=create_refresh_token(str(user.id), user.token_version),
     )
 
 
+def _get_user_by_email(db: Session, email: str) -> User | None:
+    return db.scalar(select(User).where(User.email == email))
+
+
+def _save_user(db: Session, user: User) -> User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
 @router.post("/register", response_model=schemas.AuthResponse, status_code=status.HTTP_201_CREATED)
-def register(payload: schemas.UserCreate, db: Session = Depends(get_db)) -> schemas.AuthResponse:
+async def register(payload: schemas.UserCreate, db: DbSession = Depends(get_db)) -> schemas.AuthResponse:
     email = payload.email.lower()
-    existing = db.scalar(select(User).where(User.email == email))
+    existing = await run_db(db, _get_user_by_email, email)
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Account already exists for this email",
         )
-    user = User(email=email, password_hash=hash_password(payload.password))
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    user = User(email=email, password_hash=await hash_password_async(payload.password))
+    user = await run_db(db, _save_user, user)
     return schemas.AuthResponse(user=user, tokens=_issue_tokens(user))
 
 
 @router.post("/login", response_model=schemas.AuthResponse)
-def login(payload: schemas.UserLogin, db: Session = Depends(get_db)) -> schemas.AuthResponse:
+async def login(payload: schemas.UserLogin, db: DbSession = Depends(get_db)) -> schemas.AuthResponse:
     email = payload.email.lower()
-    user = db.scalar(select(User).where(User.email == email))
-    if not user or not verify_password(payload.password, user.password_hash):
+    user = await run_db(db, _get_user_by_email, email)
+    if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    valid, new_hash = await verify_and_update_password_async(payload.password, user.password_hash)
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if new_hash:
+        # stored hash used a different work factor; migrate it transparently
+        user.password_hash = new_hash
+        user = await run_db(db, _save_user, user)
     return schemas.AuthResponse(user=user, tokens=_issue_tokens(user))
 
 
 @router.post("/refresh", response_model=schemas.TokenPair)
-def refresh(payload: schemas.TokenRefreshRequest, db: Session = Depends(get_db)) -> schemas.TokenPair:
+async def refresh(payload: schemas.TokenRefreshRequest, db: DbSession = Depends(get_db)) -> schemas.TokenPair:
     decoded = decode_token(payload.refresh_token, expected_type="refresh")
     user_id = decoded.get("sub")
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
-    user = db.get(User, int(user_id))
+    user = await run_db(db, lambda session: session.get(User, int(user_id)))
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    if int(decoded.get("ver", 0)) != user.token_version:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
     return _issue_tokens(user)
 
 
 @router.get("/me", response_model=schemas.UserRead)
-def me(current_user: Annotated[User, Depends(get_current_user)]) -> schemas.UserRead:
+async def me(current_user: Annotated[User, Depends(get_current_user)]) -> schemas.UserRead:
     return current_user
+
+
+def _bump_token_version(db: Session, user_id: int) -> None:
+    db.execute(update(User).where(User.id == user_id).values(token_version=User.token_version + 1))
+    db.commit()
+
+
+@router.post("/revoke", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_tokens(
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_db)],
+) -> None:
+    """Invalidate every access and refresh token issued to the caller so far."""
+    await run_db(db, _bump_token_version, current_user.id)
+    invalidate_principal(current_user.id)
@@ -0,0 +1,50 @@
+from typing import Annotated, Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.db import DbSession, run_db
+from app.deps import Principal, get_current_principal, get_data_etag, get_db, get_read_db
+from app.routers.dashboard import _build_dashboard_summary
+from app.routers.portfolios import _list_portfolios
+from app.routers.properties import _list_properties
+from app.routers.stocks import _list_stocks
+from app.services import summary, versions
+
+router = APIRouter(prefix="/bootstrap", tags=["bootstrap"])
+
+
+def _bootstrap(
+    db: Session, user_id: int, page_size: int, totals: Optional[summary.SummaryTotals]
+) -> Optional[Dict[str, Any]]:
+    """Dashboard plus the first page of every list in one pass over one session.
+
+    Returns ``None`` when the summary row is missing so the caller can
+    backfill it on the primary and call again with the fresh totals.
+    """
+    totals = totals or summary.read_summary(db, user_id)
+    if totals is None:
+        return None
+    return {
+        "dashboard": _build_dashboard_summary(db, user_id, totals),
+        "portfolios": _list_portfolios(db, user_id, 1, page_size, None, False),
+        "properties": _list_properties(db, user_id, 1, page_size, None, None, False),
+        "stocks": _list_stocks(db, user_id, 1, page_size, None, None, False),
+    }
+
+
+@router.get("/", response_model=schemas.Bootstrap)
+async def get_bootstrap(
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    read_db: Annotated[DbSession, Depends(get_read_db)],
+    db: Annotated[DbSession, Depends(get_db)],
+    etag: Annotated[str, Depends(get_data_etag)],
+    page_size: int = Query(20, ge=1, le=100),
+) -> ORJSONResponse:
+    payload = await run_db(read_db, _bootstrap, current_user.id, page_size, None)
+    if payload is None:
+        totals = await run_db(db, summary.backfill_summary, current_user.id)
+        payload = await run_db(read_db, _bootstrap, current_user.id, page_size, totals)
+    return ORJSONResponse(payload, headers=versions.cache_headers(etag))
@@ -1,63 +1,80 @@
 from datetime import datetime, timedelta
-from typing import Annotated
+from typing import Annotated, Any, Dict, Optional
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 
 from app import schemas
-from app.deps import get_current_user, get_db
-from app.models import Portfolio, Property, StockHolding, User
+from app.core.serialization import rows_to_dicts
+from app.db import DbSession, run_db
+from app.deps import Principal, get_current_principal, get_data_etag, get_db, get_read_db
+from app.services import snapshots, summary, versions
+from app.services.timeseries import RESOLUTIONS
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
+TIMELINE_DAYS = 183
 
-@router.get("/", response_model=schemas.DashboardSummary)
-def get_dashboard_summary(
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
-) -> schemas.DashboardSummary:
-    properties = db.scalars(
-        select(Property).join(Portfolio).where(Portfolio.user_id == current_user.id)
-    ).all()
-    stocks = db.scalars(
-        select(StockHolding).join(Portfolio).where(Portfolio.user_id == current_user.id)
-    ).all()
-
-    properties_value = sum((prop.last_valuation or prop.purchase_price or 0.0) for prop in properties)
-    stocks_value = sum((holding.last_price or 0.0) * (holding.shares or 0.0) for holding in stocks)
-    total_net_worth = round(properties_value + stocks_value, 2)
-
-    liquid_cashflow = sum(
-        (prop.monthly_rent or 0.0)
-        - (prop.monthly_operating_expenses or 0.0)
-        - (prop.monthly_mortgage or 0.0)
-        for prop in properties
+
+def _build_dashboard_summary(
+    db: Session, user_id: int, totals: summary.SummaryTotals
+) -> Dict[str, Any]:
+    """``DashboardSummary`` as plain JSON-ready data, in the schema's key order."""
+    payload = summary.totals_payload(totals)
+
+    # trailing 6-month timeline, one point per month from recorded snapshots
+    history = snapshots.net_worth_history(
+        db, user_id, "monthly", start=datetime.utcnow() - timedelta(days=TIMELINE_DAYS)
     )
+    timeline = [
+        {"as_of": point.as_of, "net_worth": round(float(point.net_worth), 2)} for point in history
+    ] or [{"as_of": datetime.utcnow(), "net_worth": payload["total_net_worth"]}]
+
+    return {**payload, "timeline": timeline}
+
 
-    # simple trailing 6-month timeline
-    now = datetime.utcnow()
-    timeline: list[schemas.DashboardTimelinePoint] = []
-    for months_back in range(5, -1, -1):
-        as_of = now - timedelta(days=30 * months_back)
-        trend_factor = 0.94 + (0.01 * (5 - months_back))
-        timeline.append(
-            schemas.DashboardTimelinePoint(
-                as_of=as_of,
-                net_worth=round(total_net_worth * trend_factor if total_net_worth else 0.0, 2),
-            )
-        )
-
-    allocation = schemas.DashboardAllocation(
-        stocks_value=round(stocks_value, 2),
-        properties_value=round(properties_value, 2),
+def _net_worth_history(
+    db: Session,
+    user_id: int,
+    resolution: str,
+    start: Optional[datetime],
+    end: Optional[datetime],
+) -> Dict[str, Any]:
+    points = snapshots.net_worth_history(db, user_id, resolution, start=start, end=end)
+    return {
+        "resolution": resolution,
+        "points": rows_to_dicts(points, schemas.NetWorthHistoryPoint),
+    }
+
+
+@router.get("/", response_model=schemas.DashboardSummary)
+async def get_dashboard_summary(
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    read_db: Annotated[DbSession, Depends(get_read_db)],
+    db: Annotated[DbSession, Depends(get_db)],
+    etag: Annotated[str, Depends(get_data_etag)],
+) -> ORJSONResponse:
+    totals = await run_db(read_db, summary.read_summary, current_user.id)
+    if totals is None:
+        # the primary session only connects when the summary row needs a backfill
+        totals = await run_db(db, summary.backfill_summary, current_user.id)
+    return ORJSONResponse(
+        await run_db(read_db, _build_dashboard_summary, current_user.id, totals),
+        headers=versions.cache_headers(etag),
     )
 
-    return schemas.DashboardSummary(
-        total_net_worth=total_net_worth,
-        liquid_cashflow_monthly=round(liquid_cashflow, 2),
-        property_count=len(properties),
-        stock_count=len(stocks),
-        allocation=allocation,
-        timeline=timeline,
+
+@router.get("/history", response_model=schemas.NetWorthHistory)
+async def get_net_worth_history(
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_read_db)],
+    etag: Annotated[str, Depends(get_data_etag)],
+    resolution: str = Query("daily", regex=f"^({'|'.join(RESOLUTIONS)})$"),
+    start: Optional[datetime] = Query(default=None),
+    end: Optional[datetime] = Query(default=None),
+) -> ORJSONResponse:
+    return ORJSONResponse(
+        await run_db(db, _net_worth_history, current_user.id, resolution, start, end),
+        headers=versions.cache_headers(etag),
     )
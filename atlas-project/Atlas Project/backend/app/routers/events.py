@@ -0,0 +1,42 @@
+import asyncio
+from typing import Annotated, AsyncIterator
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.deps import Principal, get_current_principal
+from app.services import events
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+async def _stream(user_id: int) -> AsyncIterator[bytes]:
+    async with events.broker.subscribe(user_id) as queue:
+        yield b": connected\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), settings.events_keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if event is None:
+                return
+            yield events.encode_event(event)
+
+
+@router.get("/")
+async def stream_events(
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+) -> StreamingResponse:
+    """Server-Sent Events with the caller's valuation, rent estimate and price changes.
+
+    Each ``changes`` event lists ``{entity, id, fields}`` deltas plus the new
+    dashboard totals; ``resync`` means rows were added or removed, or events
+    were dropped, and cached data should be refetched.
+    """
+    return StreamingResponse(
+        _stream(current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
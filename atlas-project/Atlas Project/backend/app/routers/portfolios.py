@@ -1,12 +1,32 @@
-from typing import Annotated
+import csv
+from typing import Annotated, Any, Dict, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app import schemas
-from app.deps import get_current_user, get_db
-from app.models import Portfolio, User
+from app.core.config import settings
+from app.core.pagination import keyset_page, split_page
+from app.core.serialization import list_page, rows_to_dicts, schema_columns
+from app.db import DbSession, run_db
+from app.deps import Principal, get_current_principal, get_data_etag, get_db, get_read_db
+from app.models import Portfolio, PortfolioRefreshJob
+from app.providers.rental_base import IAsyncRentalDataProvider
+from app.providers.rentcast import get_background_rentcast_provider
+from app.services import (
+    analytics,
+    events,
+    exports,
+    imports,
+    projections,
+    refresh_jobs,
+    rent_model,
+    snapshots,
+    summary,
+    versions,
+)
 
 router = APIRouter(prefix="/portfolios", tags=["portfolios"])
 
@@ -18,71 +38,239 @@ def _get_portfolio_or_404(db: Session, portfolio_id: int, user_id: int) -> Portf
     return portfolio
 
 
+def _list_portfolios(
+    db: Session, user_id: int, page: int, page_size: int, cursor: Optional[str], include_total: bool
+) -> Dict[str, Any]:
+    total = None
+    if include_total:
+        total = db.scalar(
+            select(func.count()).select_from(Portfolio).where(Portfolio.user_id == user_id)
+        ) or 0
+    stmt = keyset_page(
+        select(*schema_columns(Portfolio, schemas.PortfolioRead)).where(
+            Portfolio.user_id == user_id
+        ),
+        Portfolio.id,
+        cursor,
+        page,
+        page_size,
+    )
+    rows, next_cursor = split_page(db.execute(stmt).all(), page_size)
+    return list_page(rows_to_dicts(rows, schemas.PortfolioRead), total, page, page_size, next_cursor)
+
+
+def _create_portfolio(db: Session, user_id: int, payload: schemas.PortfolioCreate) -> Portfolio:
+    portfolio = Portfolio(user_id=user_id, name=payload.name)
+    db.add(portfolio)
+    versions.bump_data_version(db, user_id)
+    db.commit()
+    db.refresh(portfolio)
+    events.publish_resync([user_id])
+    return portfolio
+
+
+def _update_portfolio(
+    db: Session, portfolio_id: int, user_id: int, payload: schemas.PortfolioUpdate
+) -> Portfolio:
+    portfolio = _get_portfolio_or_404(db, portfolio_id, user_id)
+    if payload.name is not None:
+        portfolio.name = payload.name
+    db.add(portfolio)
+    versions.bump_data_version(db, user_id)
+    db.commit()
+    db.refresh(portfolio)
+    events.publish_resync([user_id])
+    return portfolio
+
+
+def _delete_portfolio(db: Session, portfolio_id: int, user_id: int) -> None:
+    portfolio = _get_portfolio_or_404(db, portfolio_id, user_id)
+    db.delete(portfolio)
+    summary.invalidate_summary(db, user_id)
+    snapshots.record_snapshot(db, user_id)
+    versions.bump_data_version(db, user_id)
+    db.commit()
+    events.publish_resync([user_id])
+
+
 @router.get("/", response_model=schemas.PortfolioList)
-def list_portfolios(
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+async def list_portfolios(
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_read_db)],
+    etag: Annotated[str, Depends(get_data_etag)],
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-) -> schemas.PortfolioList:
-    total = db.scalar(
-        select(func.count()).select_from(Portfolio).where(Portfolio.user_id == current_user.id)
-    )
-    stmt = (
-        select(Portfolio)
-        .where(Portfolio.user_id == current_user.id)
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .order_by(Portfolio.id.desc())
+    cursor: Optional[str] = Query(default=None),
+    include_total: bool = Query(default=True),
+) -> ORJSONResponse:
+    page_payload = await run_db(
+        db, _list_portfolios, current_user.id, page, page_size, cursor, include_total
     )
-    items = db.scalars(stmt).all()
-    return schemas.PortfolioList(items=items, total=total or 0, page=page, page_size=page_size)
+    return ORJSONResponse(page_payload, headers=versions.cache_headers(etag))
 
 
 @router.post("/", response_model=schemas.PortfolioRead, status_code=status.HTTP_201_CREATED)
-def create_portfolio(
+async def create_portfolio(
     payload: schemas.PortfolioCreate,
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_db)],
 ) -> Portfolio:
-    portfolio = Portfolio(user_id=current_user.id, name=payload.name)
-    db.add(portfolio)
-    db.commit()
-    db.refresh(portfolio)
-    return portfolio
+    return await run_db(db, _create_portfolio, current_user.id, payload)
 
 
 @router.get("/{portfolio_id}", response_model=schemas.PortfolioRead)
-def get_portfolio(
+async def get_portfolio(
     portfolio_id: int,
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_read_db)],
 ) -> Portfolio:
-    return _get_portfolio_or_404(db, portfolio_id, current_user.id)
+    return await run_db(db, _get_portfolio_or_404, portfolio_id, current_user.id)
 
 
 @router.put("/{portfolio_id}", response_model=schemas.PortfolioRead)
-def update_portfolio(
+async def update_portfolio(
     portfolio_id: int,
     payload: schemas.PortfolioUpdate,
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_db)],
 ) -> Portfolio:
-    portfolio = _get_portfolio_or_404(db, portfolio_id, current_user.id)
-    if payload.name is not None:
-        portfolio.name = payload.name
-    db.add(portfolio)
-    db.commit()
-    db.refresh(portfolio)
-    return portfolio
+    return await run_db(db, _update_portfolio, portfolio_id, current_user.id, payload)
 
 
 @router.delete("/{portfolio_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_portfolio(
+async def delete_portfolio(
     portfolio_id: int,
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_db)],
 ) -> None:
-    portfolio = _get_portfolio_or_404(db, portfolio_id, current_user.id)
-    db.delete(portfolio)
-    db.commit()
+    await run_db(db, _delete_portfolio, portfolio_id, current_user.id)
+
+
+@router.post("/{portfolio_id}/import", response_model=schemas.ImportReportRead)
+async def import_portfolio_records(
+    portfolio_id: int,
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_db)],
+    file: UploadFile = File(...),
+    kind: str = Query(..., regex=f"^({'|'.join(imports.KINDS)})$"),
+    fmt: Optional[str] = Query(
+        default=None, alias="format", regex=f"^({'|'.join(imports.FORMATS)})$"
+    ),
+) -> imports.ImportReport:
+    """Bulk load stock holdings or properties from a CSV or NDJSON upload into the portfolio."""
+    fmt = fmt or imports.detect_format(file.filename, file.content_type)
+    await run_db(db, _get_portfolio_or_404, portfolio_id, current_user.id)
+    try:
+        return await imports.import_records(
+            db, current_user.id, portfolio_id, kind, fmt, file.file
+        )
+    except (UnicodeDecodeError, csv.Error) as exc:
+        # batches committed before the unreadable part stay imported
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Could not parse upload: {exc}"
+        ) from exc
+
+
+def _portfolio_analytics(db: Session, portfolio_id: int, user_id: int) -> Dict[str, Any]:
+    _get_portfolio_or_404(db, portfolio_id, user_id)
+    return analytics.portfolio_analytics(db, portfolio_id)
+
+
+@router.get("/{portfolio_id}/analytics", response_model=schemas.PortfolioAnalytics)
+async def get_portfolio_analytics(
+    portfolio_id: int,
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_read_db)],
+) -> ORJSONResponse:
+    """Cap rate, cash-on-cash, equity and P&L per line plus state/city/symbol allocation."""
+    return ORJSONResponse(
+        await run_db(db, _portfolio_analytics, portfolio_id, current_user.id)
+    )
+
+
+def _projection_inputs(db: Session, portfolio_id: int, user_id: int) -> projections.ProjectionInputs:
+    _get_portfolio_or_404(db, portfolio_id, user_id)
+    return projections.load_inputs(db, portfolio_id)
+
+
+@router.post("/{portfolio_id}/projections", response_model=schemas.ProjectionResult)
+async def project_portfolio(
+    portfolio_id: int,
+    payload: schemas.ProjectionRequest,
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_read_db)],
+) -> ORJSONResponse:
+    """Monte Carlo net-worth percentile bands; the same seed reproduces the same bands."""
+    if payload.paths * payload.horizon_years > settings.projection_max_path_years:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"paths x horizon_years may not exceed {settings.projection_max_path_years}",
+        )
+    inputs = await run_db(db, _projection_inputs, portfolio_id, current_user.id)
+    result = await projections.run_projection(inputs, payload)
+    return ORJSONResponse({"portfolio_id": portfolio_id, **result})
+
+
+def _estimate_rents(db: Session, portfolio_id: int, user_id: int) -> Dict[str, Any]:
+    _get_portfolio_or_404(db, portfolio_id, user_id)
+    return rent_model.estimate_portfolio(db, user_id, portfolio_id)
+
+
+@router.post("/{portfolio_id}/rent-estimates/local", response_model=schemas.LocalRentEstimateRun)
+async def estimate_portfolio_rents(
+    portfolio_id: int,
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_db)],
+) -> ORJSONResponse:
+    """Re-estimate every property's rent from stored comps, without calling RentCast."""
+    return ORJSONResponse(await run_db(db, _estimate_rents, portfolio_id, current_user.id))
+
+
+@router.get("/{portfolio_id}/export")
+async def export_portfolio(
+    portfolio_id: int,
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_read_db)],
+    fmt: str = Query(default="ndjson", alias="format", regex=f"^({'|'.join(exports.FORMATS)})$"),
+    include_history: bool = Query(default=False),
+) -> StreamingResponse:
+    """Stream the portfolio with its properties and holdings, plus rent history on request."""
+    await run_db(db, _get_portfolio_or_404, portfolio_id, current_user.id)
+    return StreamingResponse(
+        exports.stream_export(portfolio_id, fmt, include_history),
+        media_type=exports.MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="portfolio-{portfolio_id}.{fmt}"'
+        },
+    )
+
+
+@router.post(
+    "/{portfolio_id}/refresh-rentcast",
+    response_model=schemas.RefreshJobRead,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def refresh_portfolio_rentcast(
+    portfolio_id: int,
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_db)],
+    provider: Annotated[IAsyncRentalDataProvider, Depends(get_background_rentcast_provider)],
+    max_age_hours: Optional[int] = Query(default=None, ge=0),
+) -> refresh_jobs.RefreshJob:
+    await run_db(db, _get_portfolio_or_404, portfolio_id, current_user.id)
+    return await refresh_jobs.start_portfolio_refresh(
+        current_user.id, portfolio_id, provider, max_age_hours=max_age_hours
+    )
+
+
+@router.get("/{portfolio_id}/refresh-rentcast/{job_id}", response_model=schemas.RefreshJobRead)
+async def get_portfolio_refresh_job(
+    portfolio_id: int,
+    job_id: str,
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_db)],
+) -> PortfolioRefreshJob:
+    job = await run_db(db, refresh_jobs.get_job, job_id)
+    if not job or job.user_id != current_user.id or job.portfolio_id != portfolio_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Refresh job not found")
+    return job
@@ -1,14 +1,29 @@
 from datetime import datetime
-from typing import Annotated, Optional
+from typing import Annotated, Any, Dict, List, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import delete, func, select
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import Select, func, select
 from sqlalchemy.orm import Session
 
 from app import schemas
-from app.deps import get_current_user, get_db
-from app.models import Portfolio, Property, RentComp, RentEstimate, User
-from app.providers.rentcast import RentCastProvider
+from app.core.config import settings
+from app.core.pagination import keyset_page, split_page
+from app.core.serialization import list_page, rows_to_dicts, schema_columns
+from app.db import DbSession, run_db
+from app.deps import Principal, get_current_principal, get_data_etag, get_db, get_read_db
+from app.models import Portfolio, Property
+from app.providers.rental_base import (
+    IAsyncRentalDataProvider,
+    QuotaExceeded,
+    RateLimited,
+    RentalLookup,
+    fetch_rental_lookup,
+    retry_after_headers,
+)
+from app.providers.rentcast import get_rentcast_provider
+from app.services import comps, events, rent_history, snapshots, summary, versions
+from app.services.rentcast_sync import apply_rentcast_lookup, format_address
 
 router = APIRouter(prefix="/properties", tags=["properties"])
 
@@ -20,157 +35,298 @@ def _ensure_portfolio(db: Session, portfolio_id: int, user_id: int) -> Portfolio
     return portfolio
 
 
+def _owned_by(stmt: Select, user_id: int) -> Select:
+    return stmt.join(Portfolio, Portfolio.id == Property.portfolio_id).where(
+        Portfolio.user_id == user_id
+    )
+
+
 def _get_property_or_404(db: Session, property_id: int, user_id: int) -> Property:
-    property_obj = db.get(Property, property_id)
-    if not property_obj or property_obj.portfolio.user_id != user_id:
+    property_obj = db.scalar(_owned_by(select(Property).where(Property.id == property_id), user_id))
+    if not property_obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Property not found")
     return property_obj
 
 
-@router.get("/", response_model=schemas.PropertyList)
-def list_properties(
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
-    page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100),
-    portfolio_id: Optional[int] = Query(default=None),
-) -> schemas.PropertyList:
-    base_filter = Property.portfolio.has(Portfolio.user_id == current_user.id)
-    filters = [base_filter]
+def _list_properties(
+    db: Session,
+    user_id: int,
+    page: int,
+    page_size: int,
+    portfolio_id: Optional[int],
+    cursor: Optional[str],
+    include_total: bool,
+) -> Dict[str, Any]:
+    filters = []
     if portfolio_id is not None:
         filters.append(Property.portfolio_id == portfolio_id)
 
-    total_stmt = select(func.count()).select_from(Property).where(*filters)
-    total = db.scalar(total_stmt) or 0
+    total = None
+    if include_total:
+        total_stmt = _owned_by(select(func.count(Property.id)), user_id).where(*filters)
+        total = db.scalar(total_stmt) or 0
 
-    stmt = (
-        select(Property)
-        .where(*filters)
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .order_by(Property.id.desc())
+    stmt = keyset_page(
+        _owned_by(select(*schema_columns(Property, schemas.PropertyRead)), user_id).where(*filters),
+        Property.id,
+        cursor,
+        page,
+        page_size,
     )
-    items = db.scalars(stmt).all()
-    return schemas.PropertyList(items=items, total=total, page=page, page_size=page_size)
+    rows, next_cursor = split_page(db.execute(stmt).all(), page_size)
+    return list_page(rows_to_dicts(rows, schemas.PropertyRead), total, page, page_size, next_cursor)
 
 
-@router.post("/", response_model=schemas.PropertyRead, status_code=status.HTTP_201_CREATED)
-def create_property(
-    payload: schemas.PropertyCreate,
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
-) -> Property:
-    _ensure_portfolio(db, payload.portfolio_id, current_user.id)
+def _create_property(db: Session, user_id: int, payload: schemas.PropertyCreate) -> Property:
+    _ensure_portfolio(db, payload.portfolio_id, user_id)
     property_obj = Property(**payload.dict())
     db.add(property_obj)
+    if summary.record_property_change(
+        db, user_id, summary.NO_CONTRIBUTION, summary.property_contribution(property_obj)
+    ):
+        snapshots.record_snapshot(db, user_id)
+    versions.bump_data_version(db, user_id)
+    db.commit()
+    db.refresh(property_obj)
+    events.publish_resync([user_id])
+    return property_obj
+
+
+def _update_property(
+    db: Session, property_id: int, user_id: int, payload: schemas.PropertyUpdate
+) -> Property:
+    property_obj = _get_property_or_404(db, property_id, user_id)
+    before = summary.property_contribution(property_obj)
+    before_fields = events.field_values(property_obj, events.PROPERTY_FIELDS)
+    update_data = payload.dict(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(property_obj, field, value)
+    db.add(property_obj)
+    if summary.record_property_change(db, user_id, before, summary.property_contribution(property_obj)):
+        snapshots.record_snapshot(db, user_id)
+    versions.bump_data_version(db, user_id)
     db.commit()
     db.refresh(property_obj)
+    events.publish_changes(
+        db,
+        user_id,
+        [events.entity_change("property", property_obj, events.PROPERTY_FIELDS, before_fields)],
+    )
     return property_obj
 
 
+def _delete_property(db: Session, property_id: int, user_id: int) -> None:
+    property_obj = _get_property_or_404(db, property_id, user_id)
+    changed = summary.record_property_change(
+        db, user_id, summary.property_contribution(property_obj), summary.NO_CONTRIBUTION
+    )
+    db.delete(property_obj)
+    if changed:
+        snapshots.record_snapshot(db, user_id)
+    versions.bump_data_version(db, user_id)
+    db.commit()
+    events.publish_resync([user_id])
+
+
+@router.get("/", response_model=schemas.PropertyList)
+async def list_properties(
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_read_db)],
+    etag: Annotated[str, Depends(get_data_etag)],
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    portfolio_id: Optional[int] = Query(default=None),
+    cursor: Optional[str] = Query(default=None),
+    include_total: bool = Query(default=True),
+) -> ORJSONResponse:
+    page_payload = await run_db(
+        db, _list_properties, current_user.id, page, page_size, portfolio_id, cursor, include_total
+    )
+    return ORJSONResponse(page_payload, headers=versions.cache_headers(etag))
+
+
+@router.post("/", response_model=schemas.PropertyRead, status_code=status.HTTP_201_CREATED)
+async def create_property(
+    payload: schemas.PropertyCreate,
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_db)],
+) -> Property:
+    return await run_db(db, _create_property, current_user.id, payload)
+
+
 @router.get("/{property_id}", response_model=schemas.PropertyRead)
-def get_property(
+async def get_property(
     property_id: int,
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_read_db)],
 ) -> Property:
-    return _get_property_or_404(db, property_id, current_user.id)
+    return await run_db(db, _get_property_or_404, property_id, current_user.id)
 
 
 @router.put("/{property_id}", response_model=schemas.PropertyRead)
-def update_property(
+async def update_property(
     property_id: int,
     payload: schemas.PropertyUpdate,
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_db)],
 ) -> Property:
-    property_obj = _get_property_or_404(db, property_id, current_user.id)
-    update_data = payload.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(property_obj, field, value)
-    db.add(property_obj)
-    db.commit()
-    db.refresh(property_obj)
-    return property_obj
+    return await run_db(db, _update_property, property_id, current_user.id, payload)
 
 
 @router.delete("/{property_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_property(
+async def delete_property(
     property_id: int,
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_db)],
 ) -> None:
-    property_obj = _get_property_or_404(db, property_id, current_user.id)
-    db.delete(property_obj)
+    await run_db(db, _delete_property, property_id, current_user.id)
+
+
+def _save_rentcast_lookup(
+    db: Session, user_id: int, property_obj: Property, lookup: RentalLookup
+) -> Property:
+    before = summary.property_contribution(property_obj)
+    before_fields = events.field_values(property_obj, events.PROPERTY_FIELDS)
+    rent_estimate = apply_rentcast_lookup(db, property_obj, lookup)
+    if summary.record_property_change(db, user_id, before, summary.property_contribution(property_obj)):
+        snapshots.record_snapshot(db, user_id)
+    versions.bump_data_version(db, user_id)
+    db.flush()
+    changes = [
+        events.entity_change("property", property_obj, events.PROPERTY_FIELDS, before_fields),
+        events.entity_change("rent_estimate", rent_estimate, events.RENT_ESTIMATE_FIELDS)
+        if rent_estimate is not None
+        else None,
+    ]
     db.commit()
+    db.refresh(property_obj)
+    events.publish_changes(db, user_id, changes)
+    return property_obj
 
 
 @router.post("/{property_id}/refresh-rentcast", response_model=schemas.PropertyRead)
-def refresh_property_rentcast(
+async def refresh_property_rentcast(
     property_id: int,
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_db)],
+    provider: Annotated[IAsyncRentalDataProvider, Depends(get_rentcast_provider)],
 ) -> Property:
-    property_obj = _get_property_or_404(db, property_id, current_user.id)
-    provider = RentCastProvider()
-    address = f"{property_obj.address}, {property_obj.city}, {property_obj.state} {property_obj.zip}"
-
-    try:
-        details = provider.get_property_details(address)
-        estimate = provider.get_rent_estimate(address)
-        comps = provider.get_rent_comps(address, limit=8)
-    except Exception as exc:  # pragma: no cover - upstream errors
-        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"RentCast error: {exc}") from exc
-
-    if details:
-        if details.get("bedrooms") is not None:
-            property_obj.bedrooms = float(details.get("bedrooms"))
-        if details.get("bathrooms") is not None:
-            property_obj.bathrooms = float(details.get("bathrooms"))
-        sqft = details.get("squareFootage") or details.get("livingAreaSqFt")
-        if sqft is not None:
-            property_obj.living_area_sqft = float(sqft)
-        if details.get("yearBuilt"):
-            property_obj.year_built = int(details.get("yearBuilt"))
-        if details.get("id"):
-            property_obj.rc_source_id = str(details.get("id"))
-
-    if estimate:
-        if estimate.get("confidenceScore") is not None:
-            property_obj.rc_confidence = float(estimate.get("confidenceScore"))
-    property_obj.rc_last_checked_at = datetime.utcnow()
-
-    if estimate:
-        rent_estimate = RentEstimate(
-            property_id=property_obj.id,
-            estimate=float(estimate.get("rent") or 0),
-            low=float(estimate.get("lowRent") or 0),
-            high=float(estimate.get("highRent") or 0),
-        )
-        property_obj.monthly_rent = rent_estimate.estimate
-        valuation_value = details.get("estimatedValue") if details else None
-        if valuation_value is not None:
-            property_obj.last_valuation = float(valuation_value)
-            property_obj.last_valuation_at = datetime.utcnow()
-        db.add(rent_estimate)
-
-    # clear existing comps
-    db.execute(delete(RentComp).where(RentComp.property_id == property_obj.id))
-    for comp in comps or []:
-        db.add(
-            RentComp(
-                property_id=property_obj.id,
-                address=comp.get("address", ""),
-                distance_mi=float(comp.get("distance", 0)),
-                monthly_rent=float(comp.get("rent", 0)),
-                bed=float(comp.get("bedrooms", 0)),
-                bath=float(comp.get("bathrooms", 0)),
-                sqft=float(comp.get("squareFootage", 0)),
-                days_on_market=int(comp.get("daysOnMarket", 0)),
-            )
+    property_obj = await run_db(db, _get_property_or_404, property_id, current_user.id)
+    address = format_address(property_obj)
+
+    lookup = await fetch_rental_lookup(provider, address, comps_limit=8)
+    if lookup.deferred:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="RentCast budget exhausted",
+            headers=retry_after_headers(lookup.retry_after),
         )
+    if lookup.failed:
+        errors = "; ".join(f"{name}: {error}" for name, error in lookup.errors.items())
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"RentCast error: {errors}")
 
-    db.add(property_obj)
-    db.commit()
-    db.refresh(property_obj)
-    return property_obj
+    return await run_db(db, _save_rentcast_lookup, current_user.id, property_obj, lookup)
+
+
+def _property_comps(
+    db: Session,
+    property_id: int,
+    user_id: int,
+    radius_mi: float,
+    bed: Optional[float],
+    limit: int,
+) -> Tuple[str, Optional[List[Dict[str, Any]]]]:
+    """The property's address and its indexed comps (``None`` while it has no coordinates)."""
+    property_obj = _get_property_or_404(db, property_id, user_id)
+    if property_obj.latitude is None or property_obj.longitude is None:
+        return format_address(property_obj), None
+    return format_address(property_obj), comps.nearby(
+        db, property_obj.latitude, property_obj.longitude, radius_mi, bed, limit
+    )
+
+
+@router.get("/{property_id}/comps", response_model=schemas.PropertyComps)
+async def get_property_comps(
+    property_id: int,
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    read_db: Annotated[DbSession, Depends(get_read_db)],
+    db: Annotated[DbSession, Depends(get_db)],
+    provider: Annotated[IAsyncRentalDataProvider, Depends(get_rentcast_provider)],
+    radius_mi: float = Query(1.0, gt=0, le=25),
+    bed: Optional[float] = Query(default=None, ge=0),
+    limit: int = Query(10, ge=1, le=50),
+) -> ORJSONResponse:
+    """Rental comps from the local index, falling back to RentCast when coverage is thin."""
+    args = (property_id, current_user.id, radius_mi, bed, limit)
+    address, items = await run_db(read_db, _property_comps, *args)
+    source = "local"
+    if items is None or len(items) < min(limit, settings.comps_min_local):
+        try:
+            fetched = await provider.get_rent_comps(address, limit=settings.comps_fetch_limit)
+        except (QuotaExceeded, RateLimited) as exc:
+            if not items:
+                # not an upstream failure: tell the client when it is worth asking again
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=(
+                        "RentCast budget exhausted"
+                        if isinstance(exc, QuotaExceeded)
+                        else "RentCast rate limited"
+                    ),
+                    headers=retry_after_headers(exc.retry_after),
+                )
+        except Exception as exc:
+            if not items:
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY, detail=f"RentCast error: {exc}"
+                )
+        else:
+            source = "rentcast"
+            await run_db(db, comps.save_listings, fetched or [])
+            # re-read on the primary, which already holds the comps just indexed
+            _, items = await run_db(db, _property_comps, *args)
+            if items is None:
+                items = comps.upstream_items(fetched or [], radius_mi, bed, limit)
+    return ORJSONResponse(
+        {"property_id": property_id, "source": source, "radius_mi": radius_mi, "items": items}
+    )
+
+
+def _rent_estimate_history(
+    db: Session,
+    property_id: int,
+    user_id: int,
+    resolution: str,
+    provider: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+) -> Dict[str, Any]:
+    _get_property_or_404(db, property_id, user_id)
+    return {
+        "property_id": property_id,
+        "resolution": resolution,
+        "latest": rent_history.latest_estimates(db, [property_id])[property_id],
+        "points": rent_history.estimate_history(
+            db, property_id, resolution, provider=provider, start=start, end=end
+        ),
+    }
+
+
+@router.get("/{property_id}/rent-estimates", response_model=schemas.RentEstimateHistory)
+async def get_rent_estimate_history(
+    property_id: int,
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_read_db)],
+    etag: Annotated[str, Depends(get_data_etag)],
+    resolution: str = Query(
+        "monthly", regex=f"^({'|'.join(rent_history.HISTORY_RESOLUTIONS)})$"
+    ),
+    provider: Optional[str] = Query(default=None, max_length=32),
+    start: Optional[datetime] = Query(default=None),
+    end: Optional[datetime] = Query(default=None),
+) -> ORJSONResponse:
+    """Latest estimate per provider plus bucketed history, raw and compacted months alike."""
+    args = (property_id, current_user.id, resolution, provider, start, end)
+    return ORJSONResponse(
+        await run_db(db, _rent_estimate_history, *args), headers=versions.cache_headers(etag)
+    )
@@ -1,23 +1,47 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
-from app.providers.rentcast import RentCastProvider
-from app.deps import get_current_user
-from app.models import User
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.providers.quota import budget
+from app.providers.rental_base import (
+    IAsyncRentalDataProvider,
+    fetch_rental_lookup,
+    retry_after_headers,
+)
+from app.providers.rentcast import get_rentcast_provider, get_response_cache
+from app.deps import Principal, get_current_principal
 from app import schemas
 
 router = APIRouter(prefix="/integrations/rentcast", tags=["integrations"])
 
 @router.get("/preview", response_model=schemas.RentCastPreview)
-def preview_rent_data(
+async def preview_rent_data(
     address: str,
-    _: Annotated[User, Depends(get_current_user)],
+    _: Annotated[Principal, Depends(get_current_principal)],
+    provider: Annotated[IAsyncRentalDataProvider, Depends(get_rentcast_provider)],
 ):
-    provider = RentCastProvider()
-    try:
-        details = provider.get_property_details(address)
-        estimate = provider.get_rent_estimate(address)
-        comps = provider.get_rent_comps(address, limit=8)
-        return {"details": details, "estimate": estimate, "comps": comps}
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"RentCast error: {e}")
+    lookup = await fetch_rental_lookup(provider, address, comps_limit=8)
+    if lookup.deferred:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="RentCast budget exhausted",
+            headers=retry_after_headers(lookup.retry_after),
+        )
+    if lookup.failed:
+        errors = "; ".join(f"{name}: {error}" for name, error in lookup.errors.items())
+        raise HTTPException(status_code=502, detail=f"RentCast error: {errors}")
+    return {
+        "details": lookup.details,
+        "estimate": lookup.estimate,
+        "comps": lookup.comps,
+        "errors": lookup.errors,
+    }
+
+
+@router.get("/cache", response_model=schemas.RentCastCacheStats)
+def rentcast_cache_stats(_: Annotated[Principal, Depends(get_current_principal)]):
+    return get_response_cache().stats()
+
+
+@router.get("/budget", response_model=schemas.RentCastBudget)
+async def rentcast_budget(_: Annotated[Principal, Depends(get_current_principal)]):
+    return await budget.usage()
@@ -1,12 +1,17 @@
-from typing import Annotated, Optional
+from typing import Annotated, Any, Dict, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func, select
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import Select, func, select
 from sqlalchemy.orm import Session
 
 from app import schemas
-from app.deps import get_current_user, get_db
-from app.models import Portfolio, StockHolding, User
+from app.core.pagination import keyset_page, split_page
+from app.core.serialization import list_page, rows_to_dicts, schema_columns
+from app.db import DbSession, run_db
+from app.deps import Principal, get_current_principal, get_data_etag, get_db, get_read_db
+from app.models import Portfolio, StockHolding
+from app.services import events, snapshots, summary, versions
 
 router = APIRouter(prefix="/stocks", tags=["stocks"])
 
@@ -18,84 +23,145 @@ def _ensure_portfolio(db: Session, portfolio_id: int, user_id: int) -> Portfolio
     return portfolio
 
 
+def _owned_by(stmt: Select, user_id: int) -> Select:
+    return stmt.join(Portfolio, Portfolio.id == StockHolding.portfolio_id).where(
+        Portfolio.user_id == user_id
+    )
+
+
 def _get_stock_or_404(db: Session, stock_id: int, user_id: int) -> StockHolding:
-    holding = db.get(StockHolding, stock_id)
-    if not holding or holding.portfolio.user_id != user_id:
+    holding = db.scalar(_owned_by(select(StockHolding).where(StockHolding.id == stock_id), user_id))
+    if not holding:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stock not found")
     return holding
 
 
-@router.get("/", response_model=schemas.StockList)
-def list_stocks(
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
-    page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100),
-    portfolio_id: Optional[int] = Query(default=None),
-) -> schemas.StockList:
-    filters = [StockHolding.portfolio.has(Portfolio.user_id == current_user.id)]
+def _list_stocks(
+    db: Session,
+    user_id: int,
+    page: int,
+    page_size: int,
+    portfolio_id: Optional[int],
+    cursor: Optional[str],
+    include_total: bool,
+) -> Dict[str, Any]:
+    filters = []
     if portfolio_id is not None:
         filters.append(StockHolding.portfolio_id == portfolio_id)
 
-    total_stmt = select(func.count()).select_from(StockHolding).where(*filters)
-    total = db.scalar(total_stmt) or 0
-
-    stmt = (
-        select(StockHolding)
-        .where(*filters)
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .order_by(StockHolding.id.desc())
+    total = None
+    if include_total:
+        total_stmt = _owned_by(select(func.count(StockHolding.id)), user_id).where(*filters)
+        total = db.scalar(total_stmt) or 0
+
+    stmt = keyset_page(
+        _owned_by(select(*schema_columns(StockHolding, schemas.StockRead)), user_id).where(*filters),
+        StockHolding.id,
+        cursor,
+        page,
+        page_size,
     )
-    items = db.scalars(stmt).all()
-    return schemas.StockList(items=items, total=total, page=page, page_size=page_size)
+    rows, next_cursor = split_page(db.execute(stmt).all(), page_size)
+    return list_page(rows_to_dicts(rows, schemas.StockRead), total, page, page_size, next_cursor)
 
 
-@router.post("/", response_model=schemas.StockRead, status_code=status.HTTP_201_CREATED)
-def create_stock(
-    payload: schemas.StockCreate,
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
-) -> StockHolding:
-    _ensure_portfolio(db, payload.portfolio_id, current_user.id)
+def _create_stock(db: Session, user_id: int, payload: schemas.StockCreate) -> StockHolding:
+    _ensure_portfolio(db, payload.portfolio_id, user_id)
     holding = StockHolding(**payload.dict())
     db.add(holding)
+    if summary.record_stock_change(
+        db, user_id, summary.NO_CONTRIBUTION, summary.stock_contribution(holding)
+    ):
+        snapshots.record_snapshot(db, user_id)
+    versions.bump_data_version(db, user_id)
     db.commit()
     db.refresh(holding)
+    events.publish_resync([user_id])
     return holding
 
 
+def _update_stock(
+    db: Session, stock_id: int, user_id: int, payload: schemas.StockUpdate
+) -> StockHolding:
+    holding = _get_stock_or_404(db, stock_id, user_id)
+    before = summary.stock_contribution(holding)
+    before_fields = events.field_values(holding, events.STOCK_FIELDS)
+    for field, value in payload.dict(exclude_unset=True).items():
+        setattr(holding, field, value)
+    db.add(holding)
+    if summary.record_stock_change(db, user_id, before, summary.stock_contribution(holding)):
+        snapshots.record_snapshot(db, user_id)
+    versions.bump_data_version(db, user_id)
+    db.commit()
+    db.refresh(holding)
+    events.publish_changes(
+        db, user_id, [events.entity_change("stock", holding, events.STOCK_FIELDS, before_fields)]
+    )
+    return holding
+
+
+def _delete_stock(db: Session, stock_id: int, user_id: int) -> None:
+    holding = _get_stock_or_404(db, stock_id, user_id)
+    changed = summary.record_stock_change(
+        db, user_id, summary.stock_contribution(holding), summary.NO_CONTRIBUTION
+    )
+    db.delete(holding)
+    if changed:
+        snapshots.record_snapshot(db, user_id)
+    versions.bump_data_version(db, user_id)
+    db.commit()
+    events.publish_resync([user_id])
+
+
+@router.get("/", response_model=schemas.StockList)
+async def list_stocks(
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_read_db)],
+    etag: Annotated[str, Depends(get_data_etag)],
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    portfolio_id: Optional[int] = Query(default=None),
+    cursor: Optional[str] = Query(default=None),
+    include_total: bool = Query(default=True),
+) -> ORJSONResponse:
+    page_payload = await run_db(
+        db, _list_stocks, current_user.id, page, page_size, portfolio_id, cursor, include_total
+    )
+    return ORJSONResponse(page_payload, headers=versions.cache_headers(etag))
+
+
+@router.post("/", response_model=schemas.StockRead, status_code=status.HTTP_201_CREATED)
+async def create_stock(
+    payload: schemas.StockCreate,
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_db)],
+) -> StockHolding:
+    return await run_db(db, _create_stock, current_user.id, payload)
+
+
 @router.get("/{stock_id}", response_model=schemas.StockRead)
-def get_stock(
+async def get_stock(
     stock_id: int,
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_read_db)],
 ) -> StockHolding:
-    return _get_stock_or_404(db, stock_id, current_user.id)
+    return await run_db(db, _get_stock_or_404, stock_id, current_user.id)
 
 
 @router.put("/{stock_id}", response_model=schemas.StockRead)
-def update_stock(
+async def update_stock(
     stock_id: int,
     payload: schemas.StockUpdate,
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_db)],
 ) -> StockHolding:
-    holding = _get_stock_or_404(db, stock_id, current_user.id)
-    for field, value in payload.dict(exclude_unset=True).items():
-        setattr(holding, field, value)
-    db.add(holding)
-    db.commit()
-    db.refresh(holding)
-    return holding
+    return await run_db(db, _update_stock, stock_id, current_user.id, payload)
 
 
 @router.delete("/{stock_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_stock(
+async def delete_stock(
     stock_id: int,
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[DbSession, Depends(get_db)],
 ) -> None:
-    holding = _get_stock_or_404(db, stock_id, current_user.id)
-    db.delete(holding)
-    db.commit()
+    await run_db(db, _delete_stock, stock_id, current_user.id)
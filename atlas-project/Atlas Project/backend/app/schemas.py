@@ -2,13 +2,50 @@
 from datetime import date, datetime
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, validator
 
 
 class RentCastPreview(BaseModel):
     details: dict
     estimate: dict
     comps: list
+    errors: dict[str, str] = Field(default_factory=dict)
+
+
+class RentCastCacheCounters(BaseModel):
+    hits: int
+    disk_hits: int
+    misses: int
+    coalesced: int
+    stale: int
+
+
+class RentCastCacheStats(BaseModel):
+    entries: int
+    max_entries: int
+    endpoints: dict[str, RentCastCacheCounters]
+    upstream_calls_saved: int
+
+
+class RentCastBudgetCounters(BaseModel):
+    calls: int
+    refused: int
+    waits: int
+
+
+class RentCastBudget(BaseModel):
+    month: str
+    monthly_quota: Optional[int] = None
+    used: int
+    interactive_calls: int
+    background_calls: int
+    remaining: Optional[int] = None
+    background_limit: Optional[int] = None
+    background_remaining: Optional[int] = None
+    per_minute_quota: Optional[int] = None
+    used_last_minute: int
+    cooldown_seconds: float
+    process: dict[str, RentCastBudgetCounters]
 
 
 class TokenPair(BaseModel):
@@ -67,9 +104,45 @@ class PortfolioRead(PortfolioBase):
 
 class PortfolioList(BaseModel):
     items: list[PortfolioRead]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
+
+
+class RefreshJobRead(BaseModel):
+    id: str
+    portfolio_id: int
+    status: str
+    total: int
+    refreshed: int
+    skipped: int
+    failed: int
+    deferred: int = 0
+    errors: dict[int, str]
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: list[str]
+
+
+class ImportReportRead(BaseModel):
+    kind: str
+    format: str
+    imported: int
+    failed: int
+    errors: list[ImportRowError]
+    errors_truncated: bool = False
+
+    class Config:
+        orm_mode = True
 
 
 class PropertyBase(BaseModel):
@@ -93,6 +166,8 @@ class PropertyBase(BaseModel):
     rc_last_checked_at: Optional[datetime] = None
     rc_confidence: float = 0.0
     rc_source_id: Optional[str] = None
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)
 
 
 class PropertyCreate(PropertyBase):
@@ -120,6 +195,8 @@ class PropertyUpdate(BaseModel):
     rc_last_checked_at: Optional[datetime] = None
     rc_confidence: Optional[float] = None
     rc_source_id: Optional[str] = None
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)
 
 
 class PropertyRead(PropertyBase):
@@ -132,9 +209,80 @@ class PropertyRead(PropertyBase):
 
 class PropertyList(BaseModel):
     items: list[PropertyRead]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
+
+
+class CompRead(BaseModel):
+    address: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    distance_mi: Optional[float] = None
+    monthly_rent: float
+    bed: float
+    bath: float
+    sqft: float
+    days_on_market: int
+    last_seen_at: Optional[datetime] = None
+
+
+class PropertyComps(BaseModel):
+    """``source`` is ``local`` when the comps index answered, ``rentcast`` after a fallback."""
+
+    property_id: int
+    source: str
+    radius_mi: float
+    items: list[CompRead]
+
+
+class LocalRentEstimate(BaseModel):
+    property_id: int
+    estimate: float
+    low: float
+    high: float
+    confidence: float
+    comps_used: int
+
+
+class LocalRentEstimateRun(BaseModel):
+    """``stored`` counts estimates that moved and were written; ``skipped`` lacked comps."""
+
+    portfolio_id: int
+    estimated: int
+    stored: int
+    skipped: int
+    items: list[LocalRentEstimate]
+
+
+class LatestRentEstimate(BaseModel):
+    provider: str
+    estimate: float
+    low: float
+    high: float
+    confidence: Optional[float] = None
+    as_of: datetime
+
+
+class RentEstimatePoint(BaseModel):
+    """Averages of the estimates in one bucket; ``min``/``max`` bound the estimate itself."""
+
+    bucket: date
+    provider: str
+    samples: int
+    estimate: float
+    low: float
+    high: float
+    min: float
+    max: float
+
+
+class RentEstimateHistory(BaseModel):
+    property_id: int
+    resolution: str
+    latest: list[LatestRentEstimate]
+    points: list[RentEstimatePoint]
 
 
 class StockBase(BaseModel):
@@ -169,9 +317,10 @@ class StockRead(StockBase):
 
 class StockList(BaseModel):
     items: list[StockRead]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 class DashboardAllocation(BaseModel):
@@ -184,6 +333,125 @@ class DashboardTimelinePoint(BaseModel):
     net_worth: float
 
 
+class NetWorthHistoryPoint(BaseModel):
+    as_of: datetime
+    net_worth: float
+    properties_value: float
+    stocks_value: float
+
+    class Config:
+        orm_mode = True
+
+
+class NetWorthHistory(BaseModel):
+    resolution: str
+    points: list[NetWorthHistoryPoint]
+
+
+class AnalyticsTotals(BaseModel):
+    net_worth: float
+    properties_value: float
+    stocks_value: float
+    equity: float
+    annual_noi: float
+    annual_cash_flow: float
+    cap_rate: Optional[float] = None
+    unrealized_pnl: float
+
+
+class PropertyAnalytics(BaseModel):
+    """Columnar: element ``i`` of every list belongs to property ``id[i]``."""
+
+    id: list[int]
+    value: list[float]
+    annual_noi: list[float]
+    cap_rate: list[Optional[float]]
+    cash_on_cash: list[Optional[float]]
+    equity: list[float]
+    rent_to_price: list[Optional[float]]
+
+
+class StockAnalytics(BaseModel):
+    """Columnar: element ``i`` of every list belongs to holding ``id[i]``."""
+
+    id: list[int]
+    symbol: list[str]
+    market_value: list[float]
+    cost_basis: list[float]
+    unrealized_pnl: list[float]
+    unrealized_pnl_pct: list[Optional[float]]
+
+
+class AllocationGroup(BaseModel):
+    key: str
+    value: float
+    share: float
+    weight: float
+
+
+class AllocationBreakdown(BaseModel):
+    groups: list[AllocationGroup]
+    hhi: Optional[float] = None
+    top_share: Optional[float] = None
+
+
+class PortfolioAllocation(BaseModel):
+    by_state: AllocationBreakdown
+    by_city: AllocationBreakdown
+    by_symbol: AllocationBreakdown
+
+
+class PortfolioAnalytics(BaseModel):
+    portfolio_id: int
+    totals: AnalyticsTotals
+    properties: PropertyAnalytics
+    stocks: StockAnalytics
+    allocation: PortfolioAllocation
+
+
+class ProjectionAssumptions(BaseModel):
+    """Annual rates; means are expected arithmetic returns, volatilities their std devs."""
+
+    appreciation_mean: float = 0.03
+    appreciation_volatility: float = Field(default=0.05, ge=0)
+    rent_growth_mean: float = 0.025
+    rent_growth_volatility: float = Field(default=0.02, ge=0)
+    vacancy_rate: float = Field(default=0.05, ge=0, le=1)
+    expense_growth: float = 0.025
+    mortgage_rate: float = Field(default=0.06, ge=0)
+    stock_return_mean: float = 0.07
+    stock_return_volatility: float = Field(default=0.16, ge=0)
+
+
+class ProjectionRequest(BaseModel):
+    horizon_years: int = Field(default=10, ge=1, le=50)
+    paths: int = Field(default=2000, ge=1)
+    seed: Optional[int] = Field(default=None, ge=0)
+    percentiles: list[float] = Field(default_factory=lambda: [5.0, 25.0, 50.0, 75.0, 95.0])
+    assumptions: ProjectionAssumptions = Field(default_factory=ProjectionAssumptions)
+
+    @validator("percentiles")
+    def _percentiles_in_range(cls, value: list[float]) -> list[float]:
+        if not value or any(not 0 <= p <= 100 for p in value):
+            raise ValueError("percentiles must be a non-empty list of values between 0 and 100")
+        return sorted(value)
+
+
+class ProjectionResult(BaseModel):
+    """Each band list holds one series per requested percentile, indexed by ``years``."""
+
+    portfolio_id: int
+    paths: int
+    horizon_years: int
+    seed: int
+    years: list[int]
+    percentiles: list[float]
+    net_worth: list[list[float]]
+    property_equity: list[list[float]]
+    stocks_value: list[list[float]]
+    cash: list[list[float]]
+
+
 class DashboardSummary(BaseModel):
     total_net_worth: float
     liquid_cashflow_monthly: float
@@ -191,3 +459,12 @@ class DashboardSummary(BaseModel):
     stock_count: int
     allocation: DashboardAllocation
     timeline: list[DashboardTimelinePoint]
+
+
+class Bootstrap(BaseModel):
+    """Everything the first screen needs: the dashboard plus page one of each list."""
+
+    dashboard: DashboardSummary
+    portfolios: PortfolioList
+    properties: PropertyList
+    stocks: StockList
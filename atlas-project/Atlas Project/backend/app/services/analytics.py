@@ -0,0 +1,154 @@
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Property, StockHolding
+
+PROPERTY_COLUMNS = (
+    Property.id,
+    Property.state,
+    Property.city,
+    Property.purchase_price,
+    Property.last_valuation,
+    Property.monthly_rent,
+    Property.monthly_operating_expenses,
+    Property.monthly_mortgage,
+    Property.mortgage_balance,
+)
+STOCK_COLUMNS = (
+    StockHolding.id,
+    StockHolding.symbol,
+    StockHolding.shares,
+    StockHolding.average_cost,
+    StockHolding.last_price,
+)
+
+
+def _floats(values: Sequence[Any]) -> np.ndarray:
+    return np.nan_to_num(np.array(values, dtype=float))
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise division with NaN (serialized as ``null``) where the base is zero."""
+    out = np.full(numerator.shape, np.nan)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out
+
+
+def _records(columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*(column.tolist() for column in columns.values()))]
+
+
+def _breakdown(keys: Sequence[str], values: np.ndarray, total: float) -> Dict[str, Any]:
+    """Value per key, largest first, plus concentration (HHI and top share) within the group."""
+    if not len(keys):
+        return {"groups": [], "hhi": None, "top_share": None}
+    # factorize through a dict: far cheaper than sorting object arrays for few distinct keys
+    index: Dict[str, int] = {}
+    codes = np.fromiter((index.setdefault(key, len(index)) for key in keys), np.intp, len(keys))
+    labels = np.array(list(index), dtype=object)
+    sums = np.bincount(codes, weights=values, minlength=len(labels))
+    order = np.argsort(-sums, kind="stable")
+    group_total = sums.sum()
+    shares = sums / group_total if group_total else np.zeros_like(sums)
+    weights = sums / total if total else np.zeros_like(sums)
+    return {
+        "groups": _records(
+            {
+                "key": labels[order],
+                "value": np.round(sums[order], 2),
+                "share": np.round(shares[order], 4),
+                "weight": np.round(weights[order], 4),
+            }
+        ),
+        "hhi": round(float(np.square(shares).sum()), 4),
+        "top_share": round(float(shares.max()), 4),
+    }
+
+
+def portfolio_analytics(db: Session, portfolio_id: int) -> Dict[str, Any]:
+    """Per-line metrics and breakdowns for one portfolio, computed column-wise in NumPy.
+
+    Per-line metrics stay columnar (parallel arrays keyed by metric, ``NaN``
+    where a ratio has no base) so ``ORJSONResponse`` encodes them directly.
+
+    Property value is ``last_valuation`` falling back to ``purchase_price``
+    (as on the dashboard). Cash-on-cash uses ``purchase_price -
+    mortgage_balance`` as the cash invested, since down payments are not
+    stored. ``share`` is a group's part of its own asset class, ``weight``
+    its part of the whole portfolio.
+    """
+    conn = db.connection()
+    property_rows = conn.execute(
+        select(*PROPERTY_COLUMNS).where(Property.portfolio_id == portfolio_id).order_by(Property.id)
+    ).all()
+    stock_rows = conn.execute(
+        select(*STOCK_COLUMNS)
+        .where(StockHolding.portfolio_id == portfolio_id)
+        .order_by(StockHolding.id)
+    ).all()
+
+    ids, states, cities, price, valuation, rent, opex, mortgage, balance = (
+        zip(*property_rows) if property_rows else [()] * len(PROPERTY_COLUMNS)
+    )
+    price, valuation, rent, opex, mortgage, balance = map(
+        _floats, (price, valuation, rent, opex, mortgage, balance)
+    )
+    value = np.where(valuation > 0, valuation, price)
+    noi = 12 * (rent - opex)
+    cash_flow = noi - 12 * mortgage
+    equity = value - balance
+    cash_invested = np.clip(price - balance, 0, None)
+
+    stock_ids, symbols, shares, average_cost, last_price = (
+        zip(*stock_rows) if stock_rows else [()] * len(STOCK_COLUMNS)
+    )
+    shares, average_cost, last_price = map(_floats, (shares, average_cost, last_price))
+    symbols = [(symbol or "").strip().upper() for symbol in symbols]
+    market_value = shares * last_price
+    cost_basis = shares * average_cost
+    unrealized = market_value - cost_basis
+
+    properties_value = float(value.sum())
+    stocks_value = float(market_value.sum())
+    total = properties_value + stocks_value
+    return {
+        "portfolio_id": portfolio_id,
+        "totals": {
+            "net_worth": round(total, 2),
+            "properties_value": round(properties_value, 2),
+            "stocks_value": round(stocks_value, 2),
+            "equity": round(float(equity.sum()), 2),
+            "annual_noi": round(float(noi.sum()), 2),
+            "annual_cash_flow": round(float(cash_flow.sum()), 2),
+            "cap_rate": round(float(noi.sum()) / properties_value, 4) if properties_value else None,
+            "unrealized_pnl": round(float(unrealized.sum()), 2),
+        },
+        "properties": {
+            "id": np.array(ids, dtype=np.int64),
+            "value": np.round(value, 2),
+            "annual_noi": np.round(noi, 2),
+            "cap_rate": np.round(_ratio(noi, value), 4),
+            "cash_on_cash": np.round(_ratio(cash_flow, cash_invested), 4),
+            "equity": np.round(equity, 2),
+            "rent_to_price": np.round(_ratio(rent, value), 4),
+        },
+        "stocks": {
+            "id": np.array(stock_ids, dtype=np.int64),
+            "symbol": symbols,
+            "market_value": np.round(market_value, 2),
+            "cost_basis": np.round(cost_basis, 2),
+            "unrealized_pnl": np.round(unrealized, 2),
+            "unrealized_pnl_pct": np.round(_ratio(unrealized, cost_basis), 4),
+        },
+        "allocation": {
+            "by_state": _breakdown(states, value, total),
+            "by_city": _breakdown(
+                [f"{city}, {state}" for city, state in zip(cities, states)], value, total
+            ),
+            "by_symbol": _breakdown(symbols, market_value, total),
+        },
+    }
@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Select, and_, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core import geo
+from app.core.config import settings
+from app.models import CompListing
+from app.providers.cache import normalize_address
+
+COMP_COLUMNS = (
+    CompListing.address,
+    CompListing.latitude,
+    CompListing.longitude,
+    CompListing.monthly_rent,
+    CompListing.bed,
+    CompListing.bath,
+    CompListing.sqft,
+    CompListing.days_on_market,
+    CompListing.last_seen_at,
+)
+
+
+def _float(value: Any) -> float:
+    return float(value or 0)
+
+
+def listing_values(comp: Dict[str, Any], seen_at: datetime) -> Optional[Dict[str, Any]]:
+    """``CompListing`` columns for one RentCast comp; ``None`` without address or coordinates."""
+    address = comp.get("formattedAddress") or comp.get("address")
+    latitude, longitude = comp.get("latitude"), comp.get("longitude")
+    if not address or latitude is None or longitude is None:
+        return None
+    latitude, longitude = float(latitude), float(longitude)
+    return {
+        "address_key": normalize_address(address),
+        "address": address,
+        "latitude": latitude,
+        "longitude": longitude,
+        "geohash": geo.encode(latitude, longitude),
+        "monthly_rent": _float(comp.get("rent", comp.get("price"))),
+        "bed": _float(comp.get("bedrooms")),
+        "bath": _float(comp.get("bathrooms")),
+        "sqft": _float(comp.get("squareFootage")),
+        "days_on_market": int(comp.get("daysOnMarket") or 0),
+        "last_seen_at": seen_at,
+    }
+
+
+def upsert_listings(db: Session, comps: Sequence[Dict[str, Any]]) -> int:
+    """Insert or refresh comps in the shared index, in the caller's transaction.
+
+    Runs in a savepoint: losing an insert race to a concurrent refresh only
+    skips this round of index updates instead of failing the caller.
+    """
+    seen_at = datetime.utcnow()
+    rows = {
+        values["address_key"]: values
+        for values in (listing_values(comp, seen_at) for comp in comps)
+        if values is not None
+    }
+    if not rows:
+        return 0
+    try:
+        with db.begin_nested():
+            existing = {
+                listing.address_key: listing
+                for listing in db.scalars(
+                    select(CompListing).where(CompListing.address_key.in_(rows))
+                )
+            }
+            for key, values in rows.items():
+                listing = existing.get(key)
+                if listing is None:
+                    db.add(CompListing(**values))
+                else:
+                    for name, value in values.items():
+                        setattr(listing, name, value)
+    except IntegrityError:
+        return 0
+    return len(rows)
+
+
+def save_listings(db: Session, comps: Sequence[Dict[str, Any]]) -> int:
+    indexed = upsert_listings(db, comps)
+    db.commit()
+    return indexed
+
+
+def nearby_statement(prefixes: Sequence[str], bed: Optional[float]) -> Select:
+    """Fresh comps inside the geohash cells, one index range scan per prefix."""
+    cells = [
+        and_(CompListing.geohash >= prefix, CompListing.geohash < prefix + "~")
+        for prefix in prefixes
+    ]
+    stmt = select(*COMP_COLUMNS).where(
+        or_(*cells),
+        CompListing.last_seen_at >= datetime.utcnow() - timedelta(days=settings.comps_max_age_days),
+    )
+    if bed is not None:
+        stmt = stmt.where(CompListing.bed == bed)
+    return stmt
+
+
+def nearby(
+    db: Session,
+    latitude: float,
+    longitude: float,
+    radius_mi: float,
+    bed: Optional[float],
+    limit: int,
+) -> List[Dict[str, Any]]:
+    """Closest indexed comps within ``radius_mi``, nearest first.
+
+    The geohash cover turns the radius into a few index range scans; exact
+    haversine distance then trims the cells' corners.
+    """
+    items = []
+    for row in db.execute(nearby_statement(geo.cover(latitude, longitude, radius_mi), bed)):
+        distance = geo.haversine_mi(latitude, longitude, row.latitude, row.longitude)
+        if distance <= radius_mi:
+            items.append({**row._asdict(), "distance_mi": round(distance, 3)})
+    items.sort(key=lambda item: item["distance_mi"])
+    return items[:limit]
+
+
+def upstream_items(
+    comps: Sequence[Dict[str, Any]], radius_mi: float, bed: Optional[float], limit: int
+) -> List[Dict[str, Any]]:
+    """RentCast comps in ``CompRead`` shape, for properties without coordinates."""
+    items = []
+    for comp in comps:
+        distance = comp.get("distance")
+        if distance is not None and float(distance) > radius_mi:
+            continue
+        if bed is not None and _float(comp.get("bedrooms")) != bed:
+            continue
+        items.append(
+            {
+                "address": comp.get("formattedAddress") or comp.get("address") or "",
+                "latitude": comp.get("latitude"),
+                "longitude": comp.get("longitude"),
+                "distance_mi": float(distance) if distance is not None else None,
+                "monthly_rent": _float(comp.get("rent", comp.get("price"))),
+                "bed": _float(comp.get("bedrooms")),
+                "bath": _float(comp.get("bathrooms")),
+                "sqft": _float(comp.get("squareFootage")),
+                "days_on_market": int(comp.get("daysOnMarket") or 0),
+                "last_seen_at": None,
+            }
+        )
+    items.sort(key=lambda item: (item["distance_mi"] is None, item["distance_mi"] or 0.0))
+    return items[:limit]
@@ -0,0 +1,117 @@
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Set
+
+import orjson
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services import summary
+
+PROPERTY_FIELDS = ("last_valuation", "last_valuation_at", "monthly_rent")
+RENT_ESTIMATE_FIELDS = ("property_id", "estimate", "low", "high", "confidence", "provider")
+STOCK_FIELDS = ("last_price", "last_price_at")
+
+RESYNC = {"event": "resync"}
+
+
+class EventBroker:
+    """In-process fan-out of change events to each user's open streams.
+
+    Subscribers live on the event loop; ``publish`` may be called from any
+    thread (sync ORM helpers run in the threadpool). A stream that falls
+    ``events_queue_size`` events behind is flushed and told to resync.
+    """
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queues: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+
+    def has_subscribers(self, user_id: int) -> bool:
+        return bool(self._queues.get(user_id))
+
+    def subscribed_users(self) -> List[int]:
+        return [user_id for user_id, queues in list(self._queues.items()) if queues]
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int) -> AsyncIterator[asyncio.Queue]:
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.events_queue_size)
+        self._queues[user_id].add(queue)
+        try:
+            yield queue
+        finally:
+            self._queues[user_id].discard(queue)
+            if not self._queues[user_id]:
+                del self._queues[user_id]
+
+    def publish(self, user_id: int, event: Dict[str, Any]) -> None:
+        if self._loop is not None and self.has_subscribers(user_id):
+            self._loop.call_soon_threadsafe(self._deliver, user_id, event)
+
+    def _deliver(self, user_id: int, event: Optional[Dict[str, Any]]) -> None:
+        for queue in self._queues.get(user_id, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC if event is not None else None)
+
+    def close(self) -> None:
+        """End every open stream (``None`` tells the stream to finish)."""
+        for user_id in list(self._queues):
+            self._deliver(user_id, None)
+
+
+broker = EventBroker()
+
+
+def field_values(obj: Any, fields: Sequence[str]) -> Dict[str, Any]:
+    return {name: getattr(obj, name) for name in fields}
+
+
+def entity_change(
+    entity: str, obj: Any, fields: Sequence[str], before: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """The fields that differ from ``before`` (all of them for new rows), or ``None``."""
+    values = field_values(obj, fields)
+    if before is not None:
+        values = {name: value for name, value in values.items() if before.get(name) != value}
+    if not values:
+        return None
+    return {"entity": entity, "id": obj.id, "fields": values}
+
+
+def publish_changes(
+    db: Session, user_id: int, changes: Iterable[Optional[Dict[str, Any]]]
+) -> None:
+    """Push committed changes plus fresh dashboard totals to the user's streams.
+
+    Call after commit; a no-op (no totals query) when the user has no open stream.
+    """
+    changes = [change for change in changes if change is not None]
+    if not changes or not broker.has_subscribers(user_id):
+        return
+    totals = summary.read_summary(db, user_id) or summary.compute_summary(db, user_id)
+    broker.publish(
+        user_id,
+        {"event": "changes", "changes": changes, "totals": summary.totals_payload(totals)},
+    )
+
+
+def publish_resync(user_ids: Iterable[int]) -> None:
+    """Tell the users' streams to refetch after writes ``changes`` cannot describe.
+
+    ``changes`` patches rows a client already holds; creates, deletes,
+    imports and the bulk jobs add or remove rows, so call this after their commit.
+    """
+    for user_id in user_ids:
+        broker.publish(user_id, RESYNC)
+
+
+def encode_event(event: Dict[str, Any]) -> bytes:
+    name = event["event"]
+    data = {key: value for key, value in event.items() if key != "event"}
+    return b"event: " + name.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
@@ -0,0 +1,85 @@
+import csv
+import io
+from datetime import date, datetime
+from typing import Any, Iterator, List, Sequence, Tuple
+
+import orjson
+from sqlalchemy import Select, select
+
+from app import schemas
+from app.core.config import settings
+from app.core.serialization import schema_columns
+from app.db import ReadSessionLocal
+from app.models import Portfolio, Property, RentComp, RentEstimate, StockHolding
+
+FORMATS = ("csv", "ndjson")
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _sections(portfolio_id: int, include_history: bool) -> List[Tuple[str, Select]]:
+    sections = [
+        ("portfolio", select(Portfolio.id, Portfolio.name).where(Portfolio.id == portfolio_id)),
+        (
+            "property",
+            select(*schema_columns(Property, schemas.PropertyRead))
+            .where(Property.portfolio_id == portfolio_id)
+            .order_by(Property.id),
+        ),
+        (
+            "stock",
+            select(*schema_columns(StockHolding, schemas.StockRead))
+            .where(StockHolding.portfolio_id == portfolio_id)
+            .order_by(StockHolding.id),
+        ),
+    ]
+    if include_history:
+        for name, model in (("rent_estimate", RentEstimate), ("rent_comp", RentComp)):
+            sections.append(
+                (
+                    name,
+                    select(*model.__table__.columns)
+                    .join(Property, Property.id == model.property_id)
+                    .where(Property.portfolio_id == portfolio_id)
+                    .order_by(model.id),
+                )
+            )
+    return sections
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _csv_chunk(rows: Sequence[Sequence[Any]]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+def stream_export(portfolio_id: int, fmt: str, include_history: bool = False) -> Iterator[bytes]:
+    """Yield the portfolio's records as CSV sections or NDJSON lines, one chunk per fetch.
+
+    Each section is read with ``yield_per`` (a server-side cursor where the
+    driver supports it), so memory stays bounded by ``export_chunk_rows``.
+    CSV output starts every record type with its own ``record_type`` header
+    row; NDJSON tags each object with a ``record_type`` key.
+    """
+    with ReadSessionLocal() as db:
+        for record_type, stmt in _sections(portfolio_id, include_history):
+            result = db.execute(stmt.execution_options(yield_per=settings.export_chunk_rows))
+            keys = list(result.keys())
+            if fmt == "csv":
+                yield _csv_chunk([["record_type", *keys]])
+            for partition in result.partitions():
+                if fmt == "csv":
+                    yield _csv_chunk([(record_type, *row) for row in partition])
+                else:
+                    yield b"".join(
+                        orjson.dumps({"record_type": record_type, **dict(zip(keys, row))}) + b"\n"
+                        for row in partition
+                    )
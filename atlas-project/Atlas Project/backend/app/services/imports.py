@@ -0,0 +1,138 @@
+import codecs
+import csv
+import json
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Type
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.core.config import settings
+from app.db import DbSession, run_db
+from app.models import Property, StockHolding
+from app.services import events, snapshots, summary, versions
+
+FORMATS = ("csv", "ndjson")
+KINDS: Dict[str, Tuple[Type[BaseModel], type]] = {
+    "stocks": (schemas.StockCreate, StockHolding),
+    "properties": (schemas.PropertyCreate, Property),
+}
+
+
+@dataclass
+class ImportReport:
+    kind: str
+    format: str
+    imported: int = 0
+    failed: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    errors_truncated: bool = False
+
+    def add_error(self, row: int, messages: List[str]) -> None:
+        self.failed += 1
+        if len(self.errors) < settings.import_max_errors:
+            self.errors.append({"row": row, "errors": messages})
+        else:
+            self.errors_truncated = True
+
+
+def detect_format(filename: str, content_type: str) -> str:
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in (content_type or ""):
+        return "ndjson"
+    return "csv"
+
+
+def _csv_records(stream: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    lines = codecs.iterdecode(stream, "utf-8-sig")
+    for row_number, record in enumerate(csv.DictReader(lines), start=1):
+        # blank cells fall back to the schema defaults instead of failing to parse
+        yield row_number, {
+            key: value for key, value in record.items() if key and value not in ("", None)
+        }
+
+
+def _ndjson_records(stream: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    row_number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            yield row_number, json.loads(line)
+        except ValueError as exc:
+            yield row_number, exc
+
+
+def _messages(exc: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()]
+
+
+def _next_batch(
+    records: Iterator[Tuple[int, Any]],
+    schema: Type[BaseModel],
+    portfolio_id: int,
+    report: ImportReport,
+) -> Optional[List[Dict[str, Any]]]:
+    """Validate the next ``import_batch_size`` records; ``None`` once the upload is exhausted."""
+    batch = list(islice(records, settings.import_batch_size))
+    if not batch:
+        return None
+    valid = []
+    for row_number, record in batch:
+        if isinstance(record, ValueError):
+            report.add_error(row_number, [f"invalid JSON: {record}"])
+            continue
+        if not isinstance(record, dict):
+            report.add_error(row_number, ["expected an object"])
+            continue
+        try:
+            valid.append(schema(**{**record, "portfolio_id": portfolio_id}).dict())
+        except ValidationError as exc:
+            report.add_error(row_number, _messages(exc))
+    return valid
+
+
+def _insert_batch(db: Session, user_id: int, model: type, rows: List[Dict[str, Any]]) -> None:
+    db.execute(insert(model), rows)
+    summary.invalidate_summary(db, user_id)
+    versions.bump_data_version(db, user_id)
+    db.commit()
+
+
+def _record_snapshot(db: Session, user_id: int) -> None:
+    snapshots.record_snapshot(db, user_id)
+    db.commit()
+
+
+async def import_records(
+    db: DbSession, user_id: int, portfolio_id: int, kind: str, fmt: str, stream: BinaryIO
+) -> ImportReport:
+    """Stream-parse ``stream`` and bulk insert valid rows, one transaction per batch.
+
+    Rows always land in ``portfolio_id``; invalid rows are reported by their
+    1-based record number and never abort the rest of the upload. Reading
+    and validating run in the threadpool, so the session only sees batches
+    of rows to insert.
+    """
+    schema, model = KINDS[kind]
+    report = ImportReport(kind=kind, format=fmt)
+    records = _ndjson_records(stream) if fmt == "ndjson" else _csv_records(stream)
+    try:
+        while (
+            rows := await run_in_threadpool(_next_batch, records, schema, portfolio_id, report)
+        ) is not None:
+            if rows:
+                await run_db(db, _insert_batch, user_id, model, rows)
+                report.imported += len(rows)
+        if report.imported:
+            await run_db(db, _record_snapshot, user_id)
+    finally:
+        # batches committed before a parse error stay imported; clients must refetch them
+        if report.imported:
+            events.publish_resync([user_id])
+    return report
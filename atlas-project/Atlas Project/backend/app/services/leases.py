@@ -0,0 +1,55 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+from app.db import SessionLocal
+from app.models import JobLease
+
+# identifies this process among every worker sharing the database
+HOLDER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def acquire(name: str, ttl_seconds: float) -> bool:
+    """Take or renew the lease on job ``name``; ``False`` while another worker holds it.
+
+    The holder keeps the lease by renewing it each run. When it stops, any
+    worker takes over once ``ttl_seconds`` have passed.
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    with SessionLocal() as db:
+        taken = db.execute(
+            update(JobLease)
+            .where(
+                JobLease.name == name,
+                or_(JobLease.holder == HOLDER, JobLease.expires_at < now),
+            )
+            .values(holder=HOLDER, expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if taken:
+            db.commit()
+            return True
+        if db.get(JobLease, name) is not None:
+            return False
+        db.add(JobLease(name=name, holder=HOLDER, expires_at=expires_at))
+        try:
+            db.commit()
+        except IntegrityError:  # another worker created the lease first
+            db.rollback()
+            return False
+    return True
+
+
+async def hold(name: str, interval_seconds: float) -> bool:
+    """Whether this worker should run this tick of a job repeating every ``interval_seconds``.
+
+    The lease lasts two intervals, so a holder that runs late still renews it
+    before anyone else can take over.
+    """
+    return await asyncio.to_thread(acquire, name, 2 * interval_seconds)
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import case, distinct, func, or_, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models import Portfolio, StockHolding
+from app.providers.price_base import IAsyncPriceProvider, Quote
+from app.services import events, leases, snapshots, summary, versions
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PriceRefreshResult:
+    symbols: int = 0
+    quoted: int = 0
+    holdings_updated: int = 0
+
+
+def normalize_symbol(symbol: str) -> str:
+    return symbol.strip().upper()
+
+
+def _load_symbols() -> Dict[str, List[str]]:
+    """Distinct stored symbols across every holding, grouped by normalized ticker."""
+    with SessionLocal() as db:
+        stored = db.scalars(select(distinct(StockHolding.symbol))).all()
+    variants: Dict[str, List[str]] = defaultdict(list)
+    for symbol in stored:
+        if symbol and symbol.strip():
+            variants[normalize_symbol(symbol)].append(symbol)
+    return variants
+
+
+def _publish_prices(
+    db: Session,
+    repriced: Sequence[Row],
+    prices: Dict[str, float],
+    as_of: Dict[str, datetime],
+    user_ids: List[int],
+) -> None:
+    """One event per subscribed holder listing their repriced holdings."""
+    owners = dict(
+        db.execute(
+            select(Portfolio.id, Portfolio.user_id).where(
+                Portfolio.id.in_({row.portfolio_id for row in repriced}),
+                Portfolio.user_id.in_(user_ids),
+            )
+        ).all()
+    )
+    changes: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for holding_id, portfolio_id, symbol in repriced:
+        if portfolio_id not in owners:
+            continue
+        changes[owners[portfolio_id]].append(
+            {
+                "entity": "stock",
+                "id": holding_id,
+                "fields": {"last_price": prices[symbol], "last_price_at": as_of[symbol]},
+            }
+        )
+    for user_id, user_changes in changes.items():
+        events.publish_changes(db, user_id, user_changes)
+
+
+def _apply_quotes(quotes: Dict[str, Quote], variants: Dict[str, List[str]]) -> int:
+    """One UPDATE for the whole symbol batch, moving holders' summaries and snapshots with it.
+
+    Each holder's stock value shifts by ``(new - old price) * shares`` summed
+    over the batch, read in the same transaction as the UPDATE, so the
+    materialized summary stays current without a rebuild.
+    """
+    prices = {
+        stored: quote.price for symbol, quote in quotes.items() for stored in variants[symbol]
+    }
+    as_of = {
+        stored: quote.as_of for symbol, quote in quotes.items() for stored in variants[symbol]
+    }
+    with SessionLocal() as db:
+        deltas = {
+            user_id: delta
+            for user_id, delta in db.execute(
+                select(
+                    Portfolio.user_id,
+                    func.sum(
+                        (
+                            case(prices, value=StockHolding.symbol)
+                            - func.coalesce(StockHolding.last_price, 0.0)
+                        )
+                        * func.coalesce(StockHolding.shares, 0.0)
+                    ),
+                )
+                .join(StockHolding, StockHolding.portfolio_id == Portfolio.id)
+                .where(StockHolding.symbol.in_(prices))
+                .group_by(Portfolio.user_id)
+            )
+            if delta
+        }
+        new_price = case(prices, value=StockHolding.symbol)
+        new_as_of = case(as_of, value=StockHolding.symbol)
+        # rows already at this quote are left alone, so they are neither counted nor published
+        repriced = db.execute(
+            update(StockHolding)
+            .where(
+                StockHolding.symbol.in_(prices),
+                or_(
+                    StockHolding.last_price.is_(None),
+                    StockHolding.last_price != new_price,
+                    StockHolding.last_price_at.is_(None),
+                    StockHolding.last_price_at != new_as_of,
+                ),
+            )
+            .values(last_price=new_price, last_price_at=new_as_of)
+            .returning(StockHolding.id, StockHolding.portfolio_id, StockHolding.symbol)
+            .execution_options(synchronize_session=False)
+        ).all()
+        holders = (
+            select(Portfolio.user_id)
+            .join(StockHolding, StockHolding.portfolio_id == Portfolio.id)
+            .where(StockHolding.symbol.in_(prices))
+        )
+        summary.record_stock_values(db, deltas)
+        snapshots.record_snapshots(db, sorted(deltas))
+        versions.bump_data_versions(db, holders)
+        db.commit()
+        subscribed = events.broker.subscribed_users()
+        if subscribed and repriced:
+            _publish_prices(db, repriced, prices, as_of, subscribed)
+    return len(repriced)
+
+
+def _batches(symbols: Sequence[str], size: int) -> List[Sequence[str]]:
+    return [symbols[start : start + size] for start in range(0, len(symbols), size)]
+
+
+async def refresh_prices(provider: IAsyncPriceProvider) -> PriceRefreshResult:
+    """Quote each distinct symbol once and write the prices to every holding of it.
+
+    Lookups are deduplicated across users, so a symbol held in a thousand
+    portfolios costs one quote. Holders whose stock value moved get a
+    net-worth snapshot in the same batch.
+    """
+    variants = await asyncio.to_thread(_load_symbols)
+    result = PriceRefreshResult(symbols=len(variants))
+    size = max(1, min(settings.price_batch_size, provider.max_batch_size))
+    for batch in _batches(sorted(variants), size):
+        quotes = await provider.get_quotes(batch)
+        quotes = {symbol: quote for symbol, quote in quotes.items() if symbol in variants}
+        if not quotes:
+            continue
+        result.quoted += len(quotes)
+        result.holdings_updated += await asyncio.to_thread(_apply_quotes, quotes, variants)
+    return result
+
+
+async def run_periodic_refresh(provider: IAsyncPriceProvider) -> None:
+    interval = settings.price_refresh_interval_minutes * 60
+    while True:
+        try:
+            # one worker quotes per tick; the others would only pay for the same quotes
+            if await leases.hold("price_refresh", interval):
+                result = await refresh_prices(provider)
+                logger.info(
+                    "Quoted %s of %s symbols, updated %s holdings",
+                    result.quoted,
+                    result.symbols,
+                    result.holdings_updated,
+                )
+        except Exception:  # pragma: no cover - keep the loop alive
+            logger.exception("Stock price refresh failed")
+        await asyncio.sleep(interval)
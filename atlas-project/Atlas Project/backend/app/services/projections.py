@@ -0,0 +1,213 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.core.config import settings
+from app.models import Property, StockHolding
+
+COMPONENTS = ("net_worth", "property_equity", "stocks_value", "cash")
+# what a chunk returns; net worth is their sum, rebuilt where the bands are taken
+SIMULATED = ("property_equity", "stocks_value", "cash")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+@dataclass(frozen=True)
+class ProjectionInputs:
+    """Starting point of a projection: per-property arrays plus the stock total."""
+
+    property_value: np.ndarray
+    monthly_rent: np.ndarray
+    monthly_expenses: np.ndarray
+    monthly_payment: np.ndarray
+    mortgage_balance: np.ndarray
+    stocks_value: float
+
+
+def load_inputs(db: Session, portfolio_id: int) -> ProjectionInputs:
+    rows = db.execute(
+        select(
+            Property.purchase_price,
+            Property.last_valuation,
+            Property.monthly_rent,
+            Property.monthly_operating_expenses,
+            Property.monthly_mortgage,
+            Property.mortgage_balance,
+        ).where(Property.portfolio_id == portfolio_id)
+    ).all()
+    columns = [np.nan_to_num(np.array(column, dtype=float)) for column in zip(*rows)] or [
+        np.zeros(0) for _ in range(6)
+    ]
+    price, valuation, rent, expenses, payment, balance = columns
+    stocks_value = db.scalar(
+        select(
+            func.coalesce(
+                func.sum(
+                    func.coalesce(StockHolding.last_price, 0.0)
+                    * func.coalesce(StockHolding.shares, 0.0)
+                ),
+                0.0,
+            )
+        ).where(StockHolding.portfolio_id == portfolio_id)
+    )
+    return ProjectionInputs(
+        property_value=np.where(valuation > 0, valuation, price),
+        monthly_rent=rent,
+        monthly_expenses=expenses,
+        monthly_payment=payment,
+        mortgage_balance=balance,
+        stocks_value=float(stocks_value or 0.0),
+    )
+
+
+def amortize(balance: np.ndarray, payment: np.ndarray, annual_rate: float, years: int) -> np.ndarray:
+    """Year-end balances, shape ``(years + 1, n)``, paying ``payment`` monthly until paid off."""
+    rate = annual_rate / 12
+    growth = (1 + rate) ** 12
+    annuity = (growth - 1) / rate if rate else 12.0
+    balances = np.empty((years + 1, balance.size))
+    balances[0] = balance
+    for year in range(1, years + 1):
+        balances[year] = np.maximum(balances[year - 1] * growth - payment * annuity, 0.0)
+    return balances
+
+
+def simulate_chunk(
+    inputs: ProjectionInputs,
+    assumptions: schemas.ProjectionAssumptions,
+    years: int,
+    paths: int,
+    seed: np.random.SeedSequence,
+) -> Dict[str, np.ndarray]:
+    """Simulate ``paths`` yearly trajectories of ``SIMULATED``; each is ``(paths, years + 1)``.
+
+    Appreciation, rent growth, vacancy and stock returns are drawn per path
+    and year (one market factor for the whole portfolio). Mortgage paydown is
+    deterministic; payments stop once a loan is paid off, and net cash flow
+    accumulates as uninvested cash.
+    """
+    rng = np.random.default_rng(seed)
+    balances = amortize(
+        inputs.mortgage_balance, inputs.monthly_payment, assumptions.mortgage_rate, years
+    )
+    debt = balances.sum(axis=1)
+    annual_payments = np.array(
+        [12 * inputs.monthly_payment[balances[year] > 0].sum() for year in range(years)]
+    )
+    base_value = inputs.property_value.sum()
+    base_rent = 12 * inputs.monthly_rent.sum()
+    base_expenses = 12 * inputs.monthly_expenses.sum()
+
+    def lognormal(mean: float, volatility: float) -> np.ndarray:
+        return np.exp(rng.normal(mean - volatility**2 / 2, volatility, size=(paths, years)))
+
+    appreciation = np.cumprod(
+        lognormal(assumptions.appreciation_mean, assumptions.appreciation_volatility), axis=1
+    )
+    rent_growth = np.cumprod(
+        lognormal(assumptions.rent_growth_mean, assumptions.rent_growth_volatility), axis=1
+    )
+    stock_growth = np.cumprod(
+        lognormal(assumptions.stock_return_mean, assumptions.stock_return_volatility), axis=1
+    )
+    occupancy = 1 - rng.binomial(12, assumptions.vacancy_rate, size=(paths, years)) / 12
+    expense_growth = (1 + assumptions.expense_growth) ** np.arange(1, years + 1)
+
+    cash_flow = (
+        base_rent * rent_growth * occupancy - base_expenses * expense_growth - annual_payments
+    )
+    zeros = np.zeros((paths, 1))
+    property_value = base_value * np.hstack([np.ones((paths, 1)), appreciation])
+    property_equity = property_value - debt
+    stocks_value = inputs.stocks_value * np.hstack([np.ones((paths, 1)), stock_growth])
+    cash = np.hstack([zeros, np.cumsum(cash_flow, axis=1)])
+    return {
+        "property_equity": property_equity,
+        "stocks_value": stocks_value,
+        "cash": cash,
+    }
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.projection_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_projection_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+    _pool = None
+
+
+def _chunks(paths: int, seed: int) -> List[Tuple[int, np.random.SeedSequence]]:
+    """Fixed-size chunks with spawned seeds, so results do not depend on the worker count."""
+    sizes = [settings.projection_chunk_paths] * (paths // settings.projection_chunk_paths)
+    if paths % settings.projection_chunk_paths:
+        sizes.append(paths % settings.projection_chunk_paths)
+    return list(zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))))
+
+
+def _bands(results: List[Dict[str, np.ndarray]], percentiles: List[float]) -> Dict[str, np.ndarray]:
+    """Percentiles per year of every component over all chunks' paths (off the event loop)."""
+    paths = {
+        component: np.vstack([result[component] for result in results]) for component in SIMULATED
+    }
+    paths["net_worth"] = paths["property_equity"] + paths["stocks_value"] + paths["cash"]
+    return {
+        component: np.round(np.percentile(paths[component], percentiles, axis=0), 2)
+        for component in COMPONENTS
+    }
+
+
+async def run_projection(
+    inputs: ProjectionInputs, request: schemas.ProjectionRequest
+) -> Dict[str, Any]:
+    """Percentile bands per year for each net-worth component.
+
+    Runs inline for small requests and fans chunks out to the process pool
+    once ``paths * horizon_years`` reaches ``projection_parallel_threshold``.
+    """
+    seed = request.seed
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % 2**63)
+    years = request.horizon_years
+    chunks = _chunks(request.paths, seed)
+    if request.paths * years < settings.projection_parallel_threshold:
+        results = await asyncio.to_thread(
+            lambda: [
+                simulate_chunk(inputs, request.assumptions, years, size, chunk_seed)
+                for size, chunk_seed in chunks
+            ]
+        )
+    else:
+        loop, pool = asyncio.get_running_loop(), _get_pool()
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    pool, simulate_chunk, inputs, request.assumptions, years, size, chunk_seed
+                )
+                for size, chunk_seed in chunks
+            )
+        )
+    bands = await asyncio.to_thread(_bands, results, request.percentiles)
+    return {
+        "paths": request.paths,
+        "horizon_years": years,
+        "seed": seed,
+        "years": list(range(years + 1)),
+        "percentiles": request.percentiles,
+        **bands,
+    }
@@ -0,0 +1,269 @@
+import asyncio
+import logging
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models import PortfolioRefreshJob, Property
+from app.providers.rental_base import IAsyncRentalDataProvider, RentalLookup, fetch_rental_lookup
+from app.services import events, leases, snapshots, summary, versions
+from app.services.rentcast_sync import apply_rentcast_lookup, format_address
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = ("queued", "running")
+# heartbeats a job may miss before its worker counts as dead
+ABANDONED_AFTER_HEARTBEATS = 3
+
+
+@dataclass
+class RefreshJob:
+    """Live state of a refresh; ``_save`` copies it to ``portfolio_refresh_jobs`` as it goes."""
+
+    id: str
+    user_id: int
+    portfolio_id: int
+    status: str = "queued"
+    total: int = 0
+    refreshed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    # refused by the RentCast budget; left as they were for a later refresh
+    deferred: int = 0
+    errors: Dict[int, str] = field(default_factory=dict)
+    # why the job as a whole failed, beside the per-property ``errors``
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+
+
+_tasks: Dict[str, asyncio.Task] = {}
+
+
+def _save(job: RefreshJob) -> None:
+    job.heartbeat_at = datetime.utcnow()
+    with SessionLocal() as db:
+        db.merge(PortfolioRefreshJob(**asdict(job)))
+        db.commit()
+
+
+def get_job(db: Session, job_id: str) -> Optional[PortfolioRefreshJob]:
+    return db.get(PortfolioRefreshJob, job_id)
+
+
+def _forget_finished_jobs() -> None:
+    """Drop jobs finished more than ``refresh_job_retention_hours`` ago."""
+    cutoff = datetime.utcnow() - timedelta(hours=settings.refresh_job_retention_hours)
+    with SessionLocal() as db:
+        db.execute(
+            delete(PortfolioRefreshJob)
+            .where(PortfolioRefreshJob.finished_at < cutoff)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+
+def _heartbeat(job_ids: List[str]) -> None:
+    with SessionLocal() as db:
+        db.execute(
+            update(PortfolioRefreshJob)
+            .where(PortfolioRefreshJob.id.in_(job_ids), PortfolioRefreshJob.status.in_(ACTIVE))
+            .values(heartbeat_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+
+def _fail_abandoned_jobs(silent_since: datetime) -> int:
+    """Mark failed the unfinished jobs no worker has renewed since ``silent_since``."""
+    with SessionLocal() as db:
+        abandoned = db.execute(
+            update(PortfolioRefreshJob)
+            .where(
+                PortfolioRefreshJob.status.in_(ACTIVE),
+                func.coalesce(PortfolioRefreshJob.heartbeat_at, PortfolioRefreshJob.created_at)
+                < silent_since,
+            )
+            .values(
+                status="failed",
+                error="The worker running this job stopped before it finished",
+                finished_at=datetime.utcnow(),
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+    return abandoned
+
+
+def _load_targets(portfolio_id: int, fresh_after: datetime) -> Tuple[List[Tuple[int, str]], int]:
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(
+                Property.id,
+                Property.address,
+                Property.city,
+                Property.state,
+                Property.zip,
+                Property.rc_last_checked_at,
+            ).where(Property.portfolio_id == portfolio_id)
+        ).all()
+    targets = [
+        (row.id, format_address(row))
+        for row in rows
+        if row.rc_last_checked_at is None or row.rc_last_checked_at < fresh_after
+    ]
+    return targets, len(rows)
+
+
+def _write_batch(user_id: int, batch: List[Tuple[int, RentalLookup]]) -> None:
+    with SessionLocal() as db:
+        valuation_changed = False
+        updated = []
+        for property_id, lookup in batch:
+            property_obj = db.get(Property, property_id)
+            if property_obj is not None:
+                before = summary.property_contribution(property_obj)
+                before_fields = events.field_values(property_obj, events.PROPERTY_FIELDS)
+                rent_estimate = apply_rentcast_lookup(db, property_obj, lookup)
+                valuation_changed |= summary.record_property_change(
+                    db, user_id, before, summary.property_contribution(property_obj)
+                )
+                updated.append((property_obj, before_fields, rent_estimate))
+        if valuation_changed:
+            snapshots.record_snapshot(db, user_id)
+        versions.bump_data_version(db, user_id)
+        db.flush()
+        changes = []
+        for property_obj, before_fields, rent_estimate in updated:
+            changes.append(
+                events.entity_change("property", property_obj, events.PROPERTY_FIELDS, before_fields)
+            )
+            if rent_estimate is not None:
+                changes.append(
+                    events.entity_change(
+                        "rent_estimate", rent_estimate, events.RENT_ESTIMATE_FIELDS
+                    )
+                )
+        db.commit()
+        events.publish_changes(db, user_id, changes)
+
+
+async def _write(job: RefreshJob, batch: List[Tuple[int, RentalLookup]]) -> None:
+    """Save one batch; a batch that fails counts its properties as failed, not the job."""
+    try:
+        await asyncio.to_thread(_write_batch, job.user_id, batch)
+    except Exception as exc:
+        logger.exception("Saving a RentCast refresh batch for job %s failed", job.id)
+        job.failed += len(batch)
+        for property_id, _ in batch:
+            job.errors[property_id] = f"save failed: {exc}"
+    else:
+        job.refreshed += len(batch)
+
+
+async def _run(job: RefreshJob, provider: IAsyncRentalDataProvider, max_age: timedelta) -> None:
+    job.status = "running"
+    targets, job.total = await asyncio.to_thread(
+        _load_targets, job.portfolio_id, datetime.utcnow() - max_age
+    )
+    job.skipped = job.total - len(targets)
+    await asyncio.to_thread(_save, job)
+
+    semaphore = asyncio.Semaphore(settings.rentcast_refresh_concurrency)
+
+    async def fetch(property_id: int, address: str) -> Tuple[int, RentalLookup]:
+        async with semaphore:
+            return property_id, await fetch_rental_lookup(provider, address, comps_limit=8)
+
+    pending: List[Tuple[int, RentalLookup]] = []
+    for next_result in asyncio.as_completed([fetch(*target) for target in targets]):
+        property_id, lookup = await next_result
+        if lookup.deferred:
+            job.deferred += 1
+            continue
+        if lookup.failed:
+            job.failed += 1
+            job.errors[property_id] = "; ".join(f"{k}: {v}" for k, v in lookup.errors.items())
+            continue
+        pending.append((property_id, lookup))
+        if len(pending) >= settings.rentcast_refresh_batch_size:
+            await _write(job, pending)
+            pending = []
+            await asyncio.to_thread(_save, job)
+    if pending:
+        await _write(job, pending)
+
+
+async def _supervise(job: RefreshJob, provider: IAsyncRentalDataProvider, max_age: timedelta) -> None:
+    try:
+        await _run(job, provider, max_age)
+        job.status = "completed"
+    except asyncio.CancelledError:
+        job.status = "cancelled"
+        raise
+    except Exception as exc:  # pragma: no cover - surfaced through the job status
+        job.status = "failed"
+        job.error = str(exc)
+    finally:
+        job.finished_at = datetime.utcnow()
+        _tasks.pop(job.id, None)
+        await asyncio.to_thread(_save, job)
+
+
+async def start_portfolio_refresh(
+    user_id: int,
+    portfolio_id: int,
+    provider: IAsyncRentalDataProvider,
+    max_age_hours: Optional[int] = None,
+) -> RefreshJob:
+    """Queue a background RentCast refresh for every stale property in the portfolio.
+
+    The job runs in this worker; its progress is stored as it goes, so a
+    status poll served by any worker sees it.
+    """
+    await asyncio.to_thread(_forget_finished_jobs)
+    if max_age_hours is None:
+        max_age_hours = settings.rentcast_refresh_max_age_hours
+    job = RefreshJob(id=uuid.uuid4().hex, user_id=user_id, portfolio_id=portfolio_id)
+    await asyncio.to_thread(_save, job)
+    _tasks[job.id] = asyncio.create_task(_supervise(job, provider, timedelta(hours=max_age_hours)))
+    return job
+
+
+async def shutdown() -> None:
+    tasks = list(_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def run_periodic_sweep() -> None:
+    """Renew this worker's running jobs and fail the ones whose worker died.
+
+    Every worker renews its own jobs each ``refresh_job_heartbeat_seconds``;
+    the worker holding the lease also fails unfinished jobs that have not been
+    renewed for ``ABANDONED_AFTER_HEARTBEATS`` of those intervals, starting at
+    startup.
+    """
+    interval = settings.refresh_job_heartbeat_seconds
+    while True:
+        try:
+            if _tasks:
+                await asyncio.to_thread(_heartbeat, list(_tasks))
+            if await leases.hold("refresh_job_sweep", interval):
+                silent_since = datetime.utcnow() - timedelta(
+                    seconds=ABANDONED_AFTER_HEARTBEATS * interval
+                )
+                abandoned = await asyncio.to_thread(_fail_abandoned_jobs, silent_since)
+                if abandoned:
+                    logger.warning("Marked %s abandoned RentCast refresh jobs failed", abandoned)
+        except Exception:  # pragma: no cover - keep the loop alive
+            logger.exception("RentCast refresh job sweep failed")
+        await asyncio.sleep(interval)
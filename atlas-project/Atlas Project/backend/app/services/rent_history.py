@@ -0,0 +1,334 @@
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, delete, distinct, func, select, union_all
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models import LatestRentEstimate, Portfolio, Property, RentEstimate, RentEstimateRollup
+from app.services import events, leases, versions
+from app.services.timeseries import time_bucket
+
+logger = logging.getLogger(__name__)
+
+HISTORY_RESOLUTIONS = ("weekly", "monthly")
+LATEST_FIELDS = ("estimate", "low", "high", "confidence", "as_of")
+
+
+def _as_date(value: Any) -> date:
+    """A bucket as a date: SQLite buckets are ISO strings, PostgreSQL's are timestamps."""
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def record_latest(db: Session, estimates: Sequence[RentEstimate]) -> None:
+    """Point each property's latest-estimate row at ``estimates``, in the caller's transaction.
+
+    ``as_of`` and ``provider`` must be set on the estimates (not left to the
+    column defaults), so no flush is needed to read them back.
+    """
+    if not estimates:
+        return
+    existing = {
+        (row.property_id, row.provider): row
+        for row in db.scalars(
+            select(LatestRentEstimate).where(
+                LatestRentEstimate.property_id.in_({estimate.property_id for estimate in estimates})
+            )
+        )
+    }
+    for estimate in estimates:
+        key = (estimate.property_id, estimate.provider)
+        latest = existing.get(key)
+        if latest is None:
+            latest = existing[key] = LatestRentEstimate(
+                property_id=estimate.property_id, provider=estimate.provider
+            )
+            db.add(latest)
+        elif latest.as_of > estimate.as_of:
+            continue
+        for name in LATEST_FIELDS:
+            setattr(latest, name, getattr(estimate, name))
+
+
+def latest_statement(property_ids: Sequence[int]) -> Select:
+    return (
+        select(
+            LatestRentEstimate.property_id,
+            LatestRentEstimate.provider,
+            *(getattr(LatestRentEstimate, name) for name in LATEST_FIELDS),
+        )
+        .where(LatestRentEstimate.property_id.in_(property_ids))
+        .order_by(LatestRentEstimate.property_id, LatestRentEstimate.provider)
+    )
+
+
+def latest_estimates(db: Session, property_ids: Sequence[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """Newest estimate per provider for each property, by primary key however long the history."""
+    latest: Dict[int, List[Dict[str, Any]]] = {property_id: [] for property_id in property_ids}
+    for row in db.execute(latest_statement(property_ids)):
+        latest[row.property_id].append(
+            {
+                "provider": row.provider,
+                "estimate": row.estimate,
+                "low": row.low,
+                "high": row.high,
+                "confidence": row.confidence,
+                "as_of": row.as_of,
+            }
+        )
+    return latest
+
+
+def history_statement(
+    property_id: int,
+    resolution: str,
+    dialect: str,
+    provider: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Select:
+    """Per-bucket aggregates of raw estimates and compacted months, newest first, in SQL.
+
+    Months already compacted contribute their rollup at whatever bucket
+    holds the month's first day, so weekly history beyond the retention
+    window shows one point per month.
+    """
+    raw_filters = [RentEstimate.property_id == property_id]
+    rollup_filters = [RentEstimateRollup.property_id == property_id]
+    if provider is not None:
+        raw_filters.append(RentEstimate.provider == provider)
+        rollup_filters.append(RentEstimateRollup.provider == provider)
+    if start is not None:
+        raw_filters.append(RentEstimate.as_of >= start)
+        rollup_filters.append(RentEstimateRollup.month >= _month_start(start))
+    if end is not None:
+        raw_filters.append(RentEstimate.as_of <= end)
+        rollup_filters.append(RentEstimateRollup.month <= end)
+
+    raw_bucket = time_bucket(RentEstimate.as_of, resolution, dialect)
+    raw = (
+        select(
+            raw_bucket.label("bucket"),
+            RentEstimate.provider.label("provider"),
+            func.count().label("samples"),
+            func.sum(RentEstimate.estimate).label("estimate_sum"),
+            func.sum(RentEstimate.low).label("low_sum"),
+            func.sum(RentEstimate.high).label("high_sum"),
+            func.min(RentEstimate.estimate).label("estimate_min"),
+            func.max(RentEstimate.estimate).label("estimate_max"),
+        )
+        .where(*raw_filters)
+        .group_by(raw_bucket, RentEstimate.provider)
+    )
+    rollup_bucket = time_bucket(RentEstimateRollup.month, resolution, dialect)
+    rollups = (
+        select(
+            rollup_bucket.label("bucket"),
+            RentEstimateRollup.provider.label("provider"),
+            func.sum(RentEstimateRollup.samples).label("samples"),
+            func.sum(RentEstimateRollup.estimate_sum).label("estimate_sum"),
+            func.sum(RentEstimateRollup.low_sum).label("low_sum"),
+            func.sum(RentEstimateRollup.high_sum).label("high_sum"),
+            func.min(RentEstimateRollup.estimate_min).label("estimate_min"),
+            func.max(RentEstimateRollup.estimate_max).label("estimate_max"),
+        )
+        .where(*rollup_filters)
+        .group_by(rollup_bucket, RentEstimateRollup.provider)
+    )
+    combined = union_all(raw, rollups).subquery()
+    samples = func.sum(combined.c.samples)
+    return (
+        select(
+            combined.c.bucket,
+            combined.c.provider,
+            samples.label("samples"),
+            (func.sum(combined.c.estimate_sum) / samples).label("estimate"),
+            (func.sum(combined.c.low_sum) / samples).label("low"),
+            (func.sum(combined.c.high_sum) / samples).label("high"),
+            func.min(combined.c.estimate_min).label("min"),
+            func.max(combined.c.estimate_max).label("max"),
+        )
+        .group_by(combined.c.bucket, combined.c.provider)
+        .order_by(combined.c.bucket.desc(), combined.c.provider)
+        .limit(settings.history_max_points)
+    )
+
+
+def estimate_history(
+    db: Session,
+    property_id: int,
+    resolution: str,
+    provider: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    stmt = history_statement(
+        property_id,
+        resolution,
+        db.get_bind().dialect.name,
+        provider=provider,
+        start=start,
+        end=end,
+    )
+    return [
+        {
+            "bucket": _as_date(row.bucket),
+            "provider": row.provider,
+            "samples": int(row.samples),
+            "estimate": round(float(row.estimate), 2),
+            "low": round(float(row.low), 2),
+            "high": round(float(row.high), 2),
+            "min": round(float(row.min), 2),
+            "max": round(float(row.max), 2),
+        }
+        for row in reversed(db.execute(stmt).all())
+    ]
+
+
+def _seed_latest(db: Session, property_ids: Sequence[int]) -> None:
+    """Latest rows for properties whose estimates predate the ``latest_rent_estimates`` table."""
+    ranked = (
+        select(
+            RentEstimate.property_id,
+            RentEstimate.provider,
+            *(getattr(RentEstimate, name) for name in LATEST_FIELDS),
+            func.row_number()
+            .over(
+                partition_by=(RentEstimate.property_id, RentEstimate.provider),
+                order_by=(RentEstimate.as_of.desc(), RentEstimate.id.desc()),
+            )
+            .label("rank"),
+        )
+        .where(RentEstimate.property_id.in_(property_ids))
+        .subquery()
+    )
+    columns = ("property_id", "provider", *LATEST_FIELDS)
+    newest = select(*(ranked.c[name] for name in columns)).where(ranked.c.rank == 1)
+    db.add_all(
+        LatestRentEstimate(**{name: getattr(row, name) for name in columns})
+        for row in db.execute(newest)
+    )
+    db.commit()
+
+
+def _compact_batch(db: Session, property_ids: Sequence[int], cutoff: datetime) -> int:
+    """Fold these properties' raw rows older than ``cutoff`` into monthly rollups and drop them."""
+    month = time_bucket(RentEstimate.as_of, "monthly", db.get_bind().dialect.name)
+    raw = [RentEstimate.property_id.in_(property_ids), RentEstimate.as_of < cutoff]
+    rows = db.execute(
+        select(
+            RentEstimate.property_id,
+            RentEstimate.provider,
+            month.label("month"),
+            func.count().label("samples"),
+            func.sum(RentEstimate.estimate).label("estimate_sum"),
+            func.sum(RentEstimate.low).label("low_sum"),
+            func.sum(RentEstimate.high).label("high_sum"),
+            func.min(RentEstimate.estimate).label("estimate_min"),
+            func.max(RentEstimate.estimate).label("estimate_max"),
+        )
+        .where(*raw)
+        .group_by(RentEstimate.property_id, RentEstimate.provider, month)
+    ).all()
+    rollups: Dict[Tuple[int, str, date], RentEstimateRollup] = {
+        (rollup.property_id, rollup.provider, _as_date(rollup.month)): rollup
+        for rollup in db.scalars(
+            select(RentEstimateRollup).where(
+                RentEstimateRollup.property_id.in_(property_ids),
+                RentEstimateRollup.month < cutoff,
+            )
+        )
+    }
+    compacted = 0
+    for row in rows:
+        key = (row.property_id, row.provider, _as_date(row.month))
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollup = rollups[key] = RentEstimateRollup(
+                property_id=row.property_id,
+                provider=row.provider,
+                month=datetime.combine(key[2], datetime.min.time()),
+                samples=0,
+                estimate_sum=0.0,
+                low_sum=0.0,
+                high_sum=0.0,
+                estimate_min=row.estimate_min,
+                estimate_max=row.estimate_max,
+            )
+            db.add(rollup)
+        rollup.samples += row.samples
+        rollup.estimate_sum += row.estimate_sum
+        rollup.low_sum += row.low_sum
+        rollup.high_sum += row.high_sum
+        rollup.estimate_min = min(rollup.estimate_min, row.estimate_min)
+        rollup.estimate_max = max(rollup.estimate_max, row.estimate_max)
+        compacted += row.samples
+    db.execute(delete(RentEstimate).where(*raw).execution_options(synchronize_session=False))
+    # weekly history of these months turns monthly; the owners' ETags must move
+    owners = (
+        select(Portfolio.user_id)
+        .join(Property, Property.portfolio_id == Portfolio.id)
+        .where(Property.id.in_(property_ids))
+    )
+    versions.bump_data_versions(db, owners)
+    db.commit()
+    subscribed = events.broker.subscribed_users()
+    if subscribed:
+        events.publish_resync(
+            db.scalars(owners.where(Portfolio.user_id.in_(subscribed)).distinct()).all()
+        )
+    return compacted
+
+
+def compact_rent_estimates(now: Optional[datetime] = None) -> int:
+    """Compact whole months older than ``rent_estimate_retention_days``; returns raw rows folded.
+
+    The cutoff is a month boundary, so a month is never split between raw
+    rows and its rollup. Properties are processed in batches, one
+    transaction each. Latest estimates live in their own table and survive;
+    properties missing from it are seeded from their raw rows first.
+    """
+    now = now or datetime.utcnow()
+    cutoff = _month_start(now - timedelta(days=settings.rent_estimate_retention_days))
+    size = settings.rent_estimate_compaction_batch_size
+    with SessionLocal() as db:
+        unseeded = db.scalars(
+            select(distinct(RentEstimate.property_id)).where(
+                RentEstimate.property_id.not_in(select(LatestRentEstimate.property_id))
+            )
+        ).all()
+        property_ids = db.scalars(
+            select(distinct(RentEstimate.property_id)).where(RentEstimate.as_of < cutoff)
+        ).all()
+    for start in range(0, len(unseeded), size):
+        with SessionLocal() as db:
+            _seed_latest(db, unseeded[start : start + size])
+    compacted = 0
+    for start in range(0, len(property_ids), size):
+        with SessionLocal() as db:
+            compacted += _compact_batch(db, property_ids[start : start + size], cutoff)
+    return compacted
+
+
+async def run_periodic_compaction() -> None:
+    interval = settings.rent_estimate_compaction_interval_hours * 3600
+    while True:
+        try:
+            # every worker runs this loop; the lease lets only one of them compact
+            if await leases.hold("rent_estimate_compaction", interval):
+                compacted = await asyncio.to_thread(compact_rent_estimates)
+                logger.info("Compacted %s rent estimates into monthly rollups", compacted)
+        except Exception:  # pragma: no cover - keep the loop alive
+            logger.exception("Rent estimate compaction failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,421 @@
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Select, and_, bindparam, or_, select
+from sqlalchemy.orm import Session
+
+from app.core import geo
+from app.core.config import settings
+from app.models import CompListing, LatestRentEstimate, Property, RentComp, RentEstimate
+from app.services import events, rent_history, versions
+
+PROVIDER = "local"
+# similarity kernel: weight halves at DISTANCE_SCALE_MI, each penalty unit costs a factor of e
+DISTANCE_SCALE_MI = 0.5
+BED_PENALTY = 0.5
+BATH_PENALTY = 0.35
+SQFT_PENALTY = 2.0
+# rent scales with the square root of the floor-area ratio when adjusting a comp to the subject
+SQFT_ELASTICITY = 0.5
+# rows x candidates per distance matrix, bounds memory for large portfolios
+MAX_MATRIX_CELLS = 2_000_000
+# 6 parameters per cell, under SQLite's historical 999 bound-parameter limit
+CELLS_PER_QUERY = 150
+LISTING_COLUMNS = (
+    CompListing.latitude,
+    CompListing.longitude,
+    CompListing.monthly_rent,
+    CompListing.bed,
+    CompListing.bath,
+    CompListing.sqft,
+)
+
+
+@dataclass(frozen=True)
+class Candidates:
+    """Comp features, each broadcastable to ``(subjects, comps)``."""
+
+    distance: np.ndarray
+    rent: np.ndarray
+    bed: np.ndarray
+    bath: np.ndarray
+    sqft: np.ndarray
+
+
+def _floats(values: Sequence[Any]) -> np.ndarray:
+    return np.nan_to_num(np.array(values, dtype=float))
+
+
+def haversine_matrix(
+    latitude: np.ndarray,
+    longitude: np.ndarray,
+    comp_latitude: np.ndarray,
+    comp_longitude: np.ndarray,
+) -> np.ndarray:
+    """Miles from every subject (rows) to every comp (columns)."""
+    phi1 = np.radians(latitude)[:, None]
+    phi2 = np.radians(comp_latitude)[None, :]
+    d_lambda = np.radians(comp_longitude[None, :] - longitude[:, None])
+    a = np.sin((phi2 - phi1) / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    return 2 * geo.EARTH_RADIUS_MI * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _penalty(subject: np.ndarray, comp: np.ndarray, scale: float) -> np.ndarray:
+    """Absolute difference times ``scale``, zero where either side is unknown (0)."""
+    known = (subject[:, None] > 0) & (comp > 0)
+    return np.where(known, np.abs(subject[:, None] - comp) * scale, 0.0)
+
+
+def estimate_rents(
+    bed: np.ndarray, bath: np.ndarray, sqft: np.ndarray, candidates: Candidates
+) -> Dict[str, np.ndarray]:
+    """Weighted kNN rent for every subject at once; all outputs have shape ``(subjects,)``.
+
+    Each comp is weighted by ``1 / (1 + (distance / DISTANCE_SCALE_MI)^2)``
+    times ``exp(-penalty)`` for bed, bath and log floor-area differences, and
+    its rent is scaled to the subject's size. The top
+    ``local_estimate_neighbors`` weights give the estimate (weighted mean) and
+    ``low``/``high`` (one weighted standard deviation). ``confidence`` in
+    ``[0, 1]`` multiplies coverage (effective comp count over k), mean
+    similarity and ``1 - coefficient of variation``. Subjects with fewer than
+    ``local_estimate_min_comps`` usable comps get ``NaN``.
+    """
+    n = bed.size
+    shape = (n, np.broadcast(candidates.distance, candidates.rent).shape[-1])
+    if n == 0 or shape[1] == 0:
+        nan = np.full(n, np.nan)
+        return {
+            "estimate": nan,
+            "low": nan,
+            "high": nan,
+            "confidence": nan,
+            "comps_used": np.zeros(n, dtype=int),
+        }
+
+    distance = np.broadcast_to(candidates.distance, shape)
+    comp_rent = np.broadcast_to(candidates.rent, shape)
+    comp_sqft = np.broadcast_to(candidates.sqft, shape)
+    sized = (sqft[:, None] > 0) & (comp_sqft > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(sized, sqft[:, None] / np.where(comp_sqft > 0, comp_sqft, 1.0), 1.0)
+    penalty = (
+        _penalty(bed, np.broadcast_to(candidates.bed, shape), BED_PENALTY)
+        + _penalty(bath, np.broadcast_to(candidates.bath, shape), BATH_PENALTY)
+        + SQFT_PENALTY * np.abs(np.log(ratio))
+    )
+    score = np.exp(-penalty) / (1 + (distance / DISTANCE_SCALE_MI) ** 2)
+    score[(distance > settings.local_estimate_radius_mi) | ~(comp_rent > 0)] = 0.0
+    adjusted = comp_rent * ratio**SQFT_ELASTICITY
+
+    k = min(settings.local_estimate_neighbors, shape[1])
+    top = np.argpartition(-score, k - 1, axis=1)[:, :k]
+    weights = np.take_along_axis(score, top, axis=1)
+    rents = np.take_along_axis(adjusted, top, axis=1)
+
+    used = (weights > 0).sum(axis=1)
+    total = weights.sum(axis=1)
+    valid = used >= settings.local_estimate_min_comps
+    safe_total = np.where(valid, total, 1.0)
+    mean = (weights * rents).sum(axis=1) / safe_total
+    std = np.sqrt((weights * (rents - mean[:, None]) ** 2).sum(axis=1) / safe_total)
+    effective = total**2 / np.where(valid, (weights**2).sum(axis=1), 1.0)
+    similarity = total / np.where(valid, used, 1)
+    variation = np.minimum(std / np.where(mean > 0, mean, 1.0), 1.0)
+    confidence = np.minimum(effective / k, 1.0) * similarity * (1 - variation)
+    return {
+        "estimate": np.where(valid, mean, np.nan),
+        "low": np.where(valid, np.maximum(mean - std, 0.0), np.nan),
+        "high": np.where(valid, mean + std, np.nan),
+        "confidence": np.where(valid, confidence, np.nan),
+        "comps_used": used,
+    }
+
+
+Box = Tuple[float, float, float, float]
+
+
+def _union(a: Box, b: Box) -> Box:
+    return min(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3])
+
+
+def _cells(latitude: np.ndarray, longitude: np.ndarray) -> Dict[str, Box]:
+    """Geohash cover of every subject's radius, each cell trimmed to the boxes that need it.
+
+    Prefixes already covered by a shorter one are folded into it, so no
+    listing is fetched twice.
+    """
+    radius = settings.local_estimate_radius_mi
+    d_lat = radius / geo.MILES_PER_DEGREE_LAT
+    boxes: Dict[str, Box] = {}
+    for lat, lon in zip(latitude.tolist(), longitude.tolist()):
+        d_lon = d_lat / math.cos(math.radians(min(abs(lat) + d_lat, 89.9)))
+        box = (lat - d_lat, lat + d_lat, lon - d_lon, lon + d_lon)
+        for prefix in geo.cover(lat, lon, radius):
+            boxes[prefix] = _union(boxes[prefix], box) if prefix in boxes else box
+    cells: Dict[str, Box] = {}
+    last = ""
+    for prefix in sorted(boxes):
+        if last and prefix.startswith(last):
+            cells[last] = _union(cells[last], boxes[prefix])
+        else:
+            cells[prefix], last = boxes[prefix], prefix
+    return cells
+
+
+@lru_cache(maxsize=None)
+def _cells_statement(size: int) -> Select:
+    """``size`` boxed geohash ranges as one statement with bound parameters.
+
+    Built once per size so every batch reuses SQLAlchemy's compiled form;
+    each range is one scan of the covering geohash index.
+    """
+    cells = [
+        and_(
+            CompListing.geohash >= bindparam(f"low_{i}"),
+            CompListing.geohash < bindparam(f"high_{i}"),
+            CompListing.latitude.between(bindparam(f"south_{i}"), bindparam(f"north_{i}")),
+            CompListing.longitude.between(bindparam(f"west_{i}"), bindparam(f"east_{i}")),
+        )
+        for i in range(size)
+    ]
+    return select(*LISTING_COLUMNS).where(
+        or_(*cells), CompListing.last_seen_at >= bindparam("seen_since")
+    )
+
+
+def _cells_params(cells: Sequence[Tuple[str, Box]]) -> Dict[str, Any]:
+    params: Dict[str, Any] = {
+        "seen_since": datetime.utcnow() - timedelta(days=settings.comps_max_age_days)
+    }
+    for i, (prefix, (south, north, west, east)) in enumerate(cells):
+        if west < -180.0 or east > 180.0:  # across the antimeridian: keep the whole cell
+            west, east = -180.0, 180.0
+        params.update(
+            {
+                f"low_{i}": prefix,
+                f"high_{i}": prefix + "~",
+                f"south_{i}": south,
+                f"north_{i}": north,
+                f"west_{i}": west,
+                f"east_{i}": east,
+            }
+        )
+    return params
+
+
+def _load_listings(
+    db: Session, latitude: np.ndarray, longitude: np.ndarray
+) -> Dict[str, np.ndarray]:
+    cells = list(_cells(latitude, longitude).items())
+    rows = []
+    conn = db.connection()
+    for start in range(0, len(cells), CELLS_PER_QUERY):
+        batch = cells[start : start + CELLS_PER_QUERY]
+        # pad with the last cell so every batch shares one statement shape
+        batch += batch[-1:] * (CELLS_PER_QUERY - len(batch))
+        rows.extend(conn.execute(_cells_statement(CELLS_PER_QUERY), _cells_params(batch)).all())
+    columns = zip(*rows) if rows else [()] * len(LISTING_COLUMNS)
+    return {column.key: _floats(values) for column, values in zip(LISTING_COLUMNS, columns)}
+
+
+def _row_chunks(rows: np.ndarray, candidates: int) -> Iterator[np.ndarray]:
+    size = max(1, MAX_MATRIX_CELLS // max(candidates, 1))
+    for start in range(0, rows.size, size):
+        yield rows[start : start + size]
+
+
+def _estimate_located(
+    db: Session, subjects: Dict[str, np.ndarray], index: np.ndarray, results: Dict[str, np.ndarray]
+) -> None:
+    """Properties with coordinates, against the shared comp index.
+
+    Subjects are grouped by coarse geohash cell and only compared with the
+    listings inside their group's bounding box, so a spread-out portfolio
+    never builds a portfolio-by-country distance matrix.
+    """
+    latitude, longitude = subjects["latitude"][index], subjects["longitude"][index]
+    listings = _load_listings(db, latitude, longitude)
+    groups: Dict[str, List[int]] = defaultdict(list)
+    for position, (lat, lon) in enumerate(zip(latitude.tolist(), longitude.tolist())):
+        groups[geo.encode(lat, lon, 5)].append(position)
+    d_lat = settings.local_estimate_radius_mi / geo.MILES_PER_DEGREE_LAT
+    for members in groups.values():
+        rows = np.array(members)
+        edge = min(np.abs(latitude[rows]).max() + d_lat, 89.9)
+        d_lon = d_lat / np.cos(np.radians(edge))
+        nearby = (
+            (listings["latitude"] >= latitude[rows].min() - d_lat)
+            & (listings["latitude"] <= latitude[rows].max() + d_lat)
+            & (listings["longitude"] >= longitude[rows].min() - d_lon)
+            & (listings["longitude"] <= longitude[rows].max() + d_lon)
+        )
+        local = {name: values[nearby] for name, values in listings.items()}
+        for chunk in _row_chunks(rows, int(nearby.sum())):
+            targets = index[chunk]
+            estimated = estimate_rents(
+                subjects["bed"][targets],
+                subjects["bath"][targets],
+                subjects["sqft"][targets],
+                Candidates(
+                    distance=haversine_matrix(
+                        latitude[chunk], longitude[chunk], local["latitude"], local["longitude"]
+                    ),
+                    rent=local["monthly_rent"][None, :],
+                    bed=local["bed"][None, :],
+                    bath=local["bath"][None, :],
+                    sqft=local["sqft"][None, :],
+                ),
+            )
+            for name, values in estimated.items():
+                results[name][targets] = values
+
+
+def _estimate_unlocated(
+    db: Session, subjects: Dict[str, np.ndarray], index: np.ndarray, results: Dict[str, np.ndarray]
+) -> None:
+    """Properties without coordinates, against their own stored comps (distance is given)."""
+    ids = subjects["id"][index]
+    rows = db.connection().execute(
+        select(
+            RentComp.property_id,
+            RentComp.distance_mi,
+            RentComp.monthly_rent,
+            RentComp.bed,
+            RentComp.bath,
+            RentComp.sqft,
+        ).where(RentComp.property_id.in_(ids.tolist()))
+    ).all()
+    if not rows:
+        return
+    position = {property_id: i for i, property_id in enumerate(ids.tolist())}
+    owner = np.array([position[row[0]] for row in rows])
+    slot = np.zeros(len(rows), dtype=int)
+    counts = np.zeros(ids.size, dtype=int)
+    for i, row_owner in enumerate(owner.tolist()):
+        slot[i] = counts[row_owner]
+        counts[row_owner] += 1
+    # ragged comps become padded (subjects, max comps) matrices; padding is infinitely far away
+    padded = {name: np.zeros((ids.size, counts.max())) for name in ("rent", "bed", "bath", "sqft")}
+    distance = np.full((ids.size, counts.max()), np.inf)
+    values = _floats([row[1:] for row in rows])
+    distance[owner, slot] = values[:, 0]
+    for column, name in enumerate(("rent", "bed", "bath", "sqft"), start=1):
+        padded[name][owner, slot] = values[:, column]
+    estimated = estimate_rents(
+        subjects["bed"][index],
+        subjects["bath"][index],
+        subjects["sqft"][index],
+        Candidates(distance=distance, **padded),
+    )
+    for name, column_values in estimated.items():
+        results[name][index] = column_values
+
+
+def _latest_local(db: Session, property_ids: List[int]) -> Dict[int, Tuple[float, float, float]]:
+    rows = db.execute(
+        select(
+            LatestRentEstimate.property_id,
+            LatestRentEstimate.estimate,
+            LatestRentEstimate.low,
+            LatestRentEstimate.high,
+        ).where(
+            LatestRentEstimate.property_id.in_(property_ids),
+            LatestRentEstimate.provider == PROVIDER,
+        )
+    )
+    return {property_id: (estimate, low, high) for property_id, estimate, low, high in rows}
+
+
+def estimate_portfolio(db: Session, user_id: int, portfolio_id: int) -> Dict[str, Any]:
+    """Estimate every property in the portfolio locally and store the changed estimates.
+
+    No RentCast calls are made. A new ``RentEstimate`` row (``provider="local"``)
+    is written only when the rounded estimate, low or high moved since the
+    property's last local estimate, so routine re-runs write nothing.
+    """
+    rows = db.connection().execute(
+        select(
+            Property.id,
+            Property.latitude,
+            Property.longitude,
+            Property.bedrooms,
+            Property.bathrooms,
+            Property.living_area_sqft,
+        )
+        .where(Property.portfolio_id == portfolio_id)
+        .order_by(Property.id)
+    ).all()
+    ids, latitude, longitude, bed, bath, sqft = zip(*rows) if rows else [()] * 6
+    located = np.array(
+        [lat is not None and lon is not None for lat, lon in zip(latitude, longitude)], dtype=bool
+    )
+    subjects = {
+        "id": np.array(ids, dtype=np.int64),
+        "latitude": np.array([lat if lat is not None else np.nan for lat in latitude], dtype=float),
+        "longitude": np.array([lon if lon is not None else np.nan for lon in longitude], dtype=float),
+        "bed": _floats(bed),
+        "bath": _floats(bath),
+        "sqft": _floats(sqft),
+    }
+    n = len(ids)
+    results = {name: np.full(n, np.nan) for name in ("estimate", "low", "high", "confidence")}
+    results["comps_used"] = np.zeros(n, dtype=int)
+    if located.any():
+        _estimate_located(db, subjects, np.flatnonzero(located), results)
+    if (~located).any():
+        _estimate_unlocated(db, subjects, np.flatnonzero(~located), results)
+
+    items = []
+    valid = np.flatnonzero(~np.isnan(results["estimate"]))
+    for i in valid.tolist():
+        items.append(
+            {
+                "property_id": int(subjects["id"][i]),
+                "estimate": round(float(results["estimate"][i]), 2),
+                "low": round(float(results["low"][i]), 2),
+                "high": round(float(results["high"][i]), 2),
+                "confidence": round(float(results["confidence"][i]), 3),
+                "comps_used": int(results["comps_used"][i]),
+            }
+        )
+    latest = _latest_local(db, [item["property_id"] for item in items])
+    changed = [
+        item
+        for item in items
+        if latest.get(item["property_id"]) != (item["estimate"], item["low"], item["high"])
+    ]
+    if changed:
+        now = datetime.utcnow()
+        stored = [
+            RentEstimate(
+                property_id=item["property_id"],
+                estimate=item["estimate"],
+                low=item["low"],
+                high=item["high"],
+                confidence=item["confidence"],
+                provider=PROVIDER,
+                as_of=now,
+            )
+            for item in changed
+        ]
+        db.add_all(stored)
+        rent_history.record_latest(db, stored)
+        versions.bump_data_version(db, user_id)
+        db.flush()
+        changes = [
+            events.entity_change("rent_estimate", row, events.RENT_ESTIMATE_FIELDS) for row in stored
+        ]
+        db.commit()
+        events.publish_changes(db, user_id, changes)
+    return {
+        "portfolio_id": portfolio_id,
+        "estimated": len(items),
+        "stored": len(changed),
+        "skipped": n - len(items),
+        "items": items,
+    }
@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.models import Property, RentComp, RentEstimate
+from app.providers.rental_base import RentalLookup
+from app.services import comps as comp_index, rent_history
+
+
+def format_address(property_obj: Property) -> str:
+    return f"{property_obj.address}, {property_obj.city}, {property_obj.state} {property_obj.zip}"
+
+
+def apply_rentcast_lookup(
+    db: Session, property_obj: Property, lookup: RentalLookup
+) -> Optional[RentEstimate]:
+    """Copy a RentCast lookup onto the property; the caller owns the transaction.
+
+    Returns the new ``RentEstimate`` row, if the lookup carried an estimate.
+    """
+    rent_estimate = None
+    details, estimate, comps = lookup.details, lookup.estimate, lookup.comps
+
+    if details:
+        if details.get("bedrooms") is not None:
+            property_obj.bedrooms = float(details.get("bedrooms"))
+        if details.get("bathrooms") is not None:
+            property_obj.bathrooms = float(details.get("bathrooms"))
+        sqft = details.get("squareFootage") or details.get("livingAreaSqFt")
+        if sqft is not None:
+            property_obj.living_area_sqft = float(sqft)
+        if details.get("yearBuilt"):
+            property_obj.year_built = int(details.get("yearBuilt"))
+        if details.get("id"):
+            property_obj.rc_source_id = str(details.get("id"))
+        if details.get("latitude") is not None and details.get("longitude") is not None:
+            property_obj.latitude = float(details.get("latitude"))
+            property_obj.longitude = float(details.get("longitude"))
+
+    if estimate:
+        if estimate.get("confidenceScore") is not None:
+            property_obj.rc_confidence = float(estimate.get("confidenceScore"))
+    property_obj.rc_last_checked_at = datetime.utcnow()
+
+    if estimate:
+        rent_estimate = RentEstimate(
+            property_id=property_obj.id,
+            estimate=float(estimate.get("rent") or 0),
+            low=float(estimate.get("lowRent") or 0),
+            high=float(estimate.get("highRent") or 0),
+            provider="rentcast",
+            as_of=datetime.utcnow(),
+        )
+        property_obj.monthly_rent = rent_estimate.estimate
+        valuation_value = details.get("estimatedValue") if details else None
+        if valuation_value is not None:
+            property_obj.last_valuation = float(valuation_value)
+            property_obj.last_valuation_at = datetime.utcnow()
+        db.add(rent_estimate)
+        rent_history.record_latest(db, [rent_estimate])
+
+    # keep the stored comps when the comps lookup itself failed
+    if "comps" not in lookup.errors:
+        db.execute(delete(RentComp).where(RentComp.property_id == property_obj.id))
+        for comp in comps or []:
+            db.add(
+                RentComp(
+                    property_id=property_obj.id,
+                    address=comp.get("address", ""),
+                    distance_mi=float(comp.get("distance", 0)),
+                    monthly_rent=float(comp.get("rent", 0)),
+                    bed=float(comp.get("bedrooms", 0)),
+                    bath=float(comp.get("bathrooms", 0)),
+                    sqft=float(comp.get("squareFootage", 0)),
+                    days_on_market=int(comp.get("daysOnMarket", 0)),
+                )
+            )
+        comp_index.upsert_listings(db, comps or [])
+
+    db.add(property_obj)
+    return rent_estimate
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import Select, and_, func, insert, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models import Portfolio, PortfolioValueSnapshot, Property, StockHolding, User
+from app.services import events, leases, versions
+from app.services.timeseries import time_bucket
+
+logger = logging.getLogger(__name__)
+
+
+SNAPSHOT_BATCH_SIZE = 500
+
+
+def _net_worth_by_user(
+    db: Session, user_ids: Optional[Sequence[int]] = None
+) -> Dict[int, Dict[str, float]]:
+    """Property and stock value per user from grouped aggregates (every user when omitted)."""
+    users = select(User.id)
+    if user_ids is not None:
+        users = users.where(User.id.in_(user_ids))
+    values = {
+        user_id: {"properties_value": 0.0, "stocks_value": 0.0}
+        for user_id in db.scalars(users)
+    }
+    property_rows = db.execute(
+        select(
+            Portfolio.user_id,
+            func.sum(
+                func.coalesce(
+                    func.nullif(Property.last_valuation, 0), Property.purchase_price, 0.0
+                )
+            ),
+        )
+        .join(Portfolio, Portfolio.id == Property.portfolio_id)
+        .where(Portfolio.user_id.in_(values))
+        .group_by(Portfolio.user_id)
+    )
+    for user_id, total in property_rows:
+        values[user_id]["properties_value"] = total or 0.0
+    stock_rows = db.execute(
+        select(
+            Portfolio.user_id,
+            func.sum(
+                func.coalesce(StockHolding.last_price, 0.0)
+                * func.coalesce(StockHolding.shares, 0.0)
+            ),
+        )
+        .join(Portfolio, Portfolio.id == StockHolding.portfolio_id)
+        .where(Portfolio.user_id.in_(values))
+        .group_by(Portfolio.user_id)
+    )
+    for user_id, total in stock_rows:
+        values[user_id]["stocks_value"] = total or 0.0
+    return values
+
+
+def record_snapshots(db: Session, user_ids: Sequence[int]) -> None:
+    """Snapshot these users' current net worth in the caller's transaction.
+
+    Writes within ``snapshot_min_interval_minutes`` of the latest row update
+    its values but keep its ``as_of``, so a burst of edits stays one point
+    and steady editing still appends one point per interval.
+    """
+    db.flush()
+    now = datetime.utcnow()
+    cutoff = now - timedelta(minutes=settings.snapshot_min_interval_minutes)
+    for start in range(0, len(user_ids), SNAPSHOT_BATCH_SIZE):
+        values = _net_worth_by_user(db, user_ids[start : start + SNAPSHOT_BATCH_SIZE])
+        newest = (
+            select(
+                PortfolioValueSnapshot.user_id,
+                func.max(PortfolioValueSnapshot.as_of).label("as_of"),
+            )
+            .where(PortfolioValueSnapshot.user_id.in_(values))
+            .group_by(PortfolioValueSnapshot.user_id)
+            .subquery()
+        )
+        latest = {
+            snapshot.user_id: snapshot
+            for snapshot in db.scalars(
+                select(PortfolioValueSnapshot).join(
+                    newest,
+                    and_(
+                        PortfolioValueSnapshot.user_id == newest.c.user_id,
+                        PortfolioValueSnapshot.as_of == newest.c.as_of,
+                    ),
+                )
+            )
+        }
+        for user_id, totals in values.items():
+            snapshot = latest.get(user_id)
+            if snapshot is None or snapshot.as_of < cutoff:
+                snapshot = PortfolioValueSnapshot(user_id=user_id, as_of=now)
+                db.add(snapshot)
+            snapshot.properties_value = totals["properties_value"]
+            snapshot.stocks_value = totals["stocks_value"]
+            snapshot.net_worth = totals["properties_value"] + totals["stocks_value"]
+
+
+def record_snapshot(db: Session, user_id: int) -> None:
+    record_snapshots(db, [user_id])
+
+
+def snapshot_all_users() -> int:
+    """Append one snapshot per user using grouped aggregates; returns rows written."""
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        rows = [
+            {
+                "user_id": user_id,
+                "as_of": now,
+                "net_worth": totals["properties_value"] + totals["stocks_value"],
+                **totals,
+            }
+            for user_id, totals in _net_worth_by_user(db).items()
+        ]
+        if rows:
+            db.execute(insert(PortfolioValueSnapshot), rows)
+            # every dashboard timeline gains a point
+            versions.bump_data_versions(db)
+            db.commit()
+            events.publish_resync(events.broker.subscribed_users())
+    return len(rows)
+
+
+def _seconds_until_next_run(now: datetime) -> float:
+    next_run = now.replace(hour=settings.snapshot_daily_hour_utc, minute=0, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+async def run_daily_snapshots() -> None:
+    while True:
+        await asyncio.sleep(_seconds_until_next_run(datetime.utcnow()))
+        try:
+            if await leases.hold("daily_snapshots", 24 * 3600):
+                written = await asyncio.to_thread(snapshot_all_users)
+                logger.info("Wrote %s daily portfolio value snapshots", written)
+        except Exception:  # pragma: no cover - keep the loop alive
+            logger.exception("Daily portfolio value snapshot failed")
+
+
+def net_worth_history_statement(
+    user_id: int,
+    resolution: str,
+    dialect: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Select:
+    """Last snapshot per bucket in [start, end], newest first, downsampled in SQL."""
+    filters = [PortfolioValueSnapshot.user_id == user_id]
+    if start is not None:
+        filters.append(PortfolioValueSnapshot.as_of >= start)
+    if end is not None:
+        filters.append(PortfolioValueSnapshot.as_of <= end)
+
+    bucket = time_bucket(PortfolioValueSnapshot.as_of, resolution, dialect)
+    ranked = (
+        select(
+            PortfolioValueSnapshot.as_of,
+            PortfolioValueSnapshot.net_worth,
+            PortfolioValueSnapshot.properties_value,
+            PortfolioValueSnapshot.stocks_value,
+            func.row_number()
+            .over(partition_by=bucket, order_by=PortfolioValueSnapshot.as_of.desc())
+            .label("rank"),
+        )
+        .where(*filters)
+        .subquery()
+    )
+    return (
+        select(ranked.c.as_of, ranked.c.net_worth, ranked.c.properties_value, ranked.c.stocks_value)
+        .where(ranked.c.rank == 1)
+        .order_by(ranked.c.as_of.desc())
+        .limit(settings.history_max_points)
+    )
+
+
+def net_worth_history(
+    db: Session,
+    user_id: int,
+    resolution: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[Row]:
+    stmt = net_worth_history_statement(
+        user_id, resolution, db.get_bind().dialect.name, start=start, end=end
+    )
+    return list(reversed(db.execute(stmt).all()))
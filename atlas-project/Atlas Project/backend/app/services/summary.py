@@ -0,0 +1,331 @@
+import asyncio
+import logging
+import math
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+
+from sqlalchemy import Select, case, delete, func, select, true, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models import Portfolio, Property, StockHolding, User, UserSummary
+from app.services import events, leases, versions
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_ATTEMPTS = 3
+RECONCILE_BATCH_SIZE = 500
+
+
+class SummaryTotals(NamedTuple):
+    properties_value: float = 0.0
+    stocks_value: float = 0.0
+    monthly_cashflow: float = 0.0
+    property_count: int = 0
+    stock_count: int = 0
+
+
+class Contribution(NamedTuple):
+    value: float = 0.0
+    cashflow: float = 0.0
+    count: int = 0
+
+
+NO_CONTRIBUTION = Contribution()
+
+
+def property_contribution(property_obj: Optional[Property]) -> Contribution:
+    if property_obj is None:
+        return NO_CONTRIBUTION
+    return Contribution(
+        value=property_obj.last_valuation or property_obj.purchase_price or 0.0,
+        cashflow=(property_obj.monthly_rent or 0.0)
+        - (property_obj.monthly_operating_expenses or 0.0)
+        - (property_obj.monthly_mortgage or 0.0),
+        count=1,
+    )
+
+
+def stock_contribution(holding: Optional[StockHolding]) -> Contribution:
+    if holding is None:
+        return NO_CONTRIBUTION
+    return Contribution(value=(holding.last_price or 0.0) * (holding.shares or 0.0), count=1)
+
+
+def summary_statement(user_id: int) -> Select:
+    """Single-round-trip aggregate of the user's property and stock totals."""
+    property_totals = (
+        select(
+            func.coalesce(
+                func.sum(
+                    func.coalesce(
+                        func.nullif(Property.last_valuation, 0), Property.purchase_price, 0.0
+                    )
+                ),
+                0.0,
+            ).label("properties_value"),
+            func.coalesce(
+                func.sum(
+                    func.coalesce(Property.monthly_rent, 0.0)
+                    - func.coalesce(Property.monthly_operating_expenses, 0.0)
+                    - func.coalesce(Property.monthly_mortgage, 0.0)
+                ),
+                0.0,
+            ).label("monthly_cashflow"),
+            func.count(Property.id).label("property_count"),
+        )
+        .join(Portfolio, Portfolio.id == Property.portfolio_id)
+        .where(Portfolio.user_id == user_id)
+        .subquery()
+    )
+    stock_totals = (
+        select(
+            func.coalesce(
+                func.sum(
+                    func.coalesce(StockHolding.last_price, 0.0)
+                    * func.coalesce(StockHolding.shares, 0.0)
+                ),
+                0.0,
+            ).label("stocks_value"),
+            func.count(StockHolding.id).label("stock_count"),
+        )
+        .join(Portfolio, Portfolio.id == StockHolding.portfolio_id)
+        .where(Portfolio.user_id == user_id)
+        .subquery()
+    )
+    return select(
+        property_totals.c.properties_value,
+        stock_totals.c.stocks_value,
+        property_totals.c.monthly_cashflow,
+        property_totals.c.property_count,
+        stock_totals.c.stock_count,
+    ).select_from(property_totals.join(stock_totals, true()))
+
+
+def compute_summary(db: Session, user_id: int) -> SummaryTotals:
+    return SummaryTotals(*db.execute(summary_statement(user_id)).one())
+
+
+def read_summary(db: Session, user_id: int) -> Optional[SummaryTotals]:
+    """Totals without writing; ``None`` when the materialized row still needs a backfill."""
+    if not settings.dashboard_materialized_summary:
+        return compute_summary(db, user_id)
+    row = db.get(UserSummary, user_id)
+    if row is None:
+        return None
+    return SummaryTotals(
+        properties_value=row.properties_value,
+        stocks_value=row.stocks_value,
+        monthly_cashflow=row.monthly_cashflow,
+        property_count=row.property_count,
+        stock_count=row.stock_count,
+    )
+
+
+def backfill_summary(db: Session, user_id: int) -> SummaryTotals:
+    """Materialize the summary row from SQL aggregates; must run on the primary.
+
+    A write that lands between the aggregate read and the insert would have
+    its delta lost (no row to apply it to yet), so the user's
+    ``data_version`` is checked around both: when it moved, the row is
+    dropped and rebuilt.
+    """
+    for _ in range(BACKFILL_ATTEMPTS):
+        version = versions.load_data_version(db, user_id)
+        totals = compute_summary(db, user_id)
+        db.add(UserSummary(user_id=user_id, **totals._asdict()))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # a concurrent request backfilled it first
+        if versions.load_data_version(db, user_id) == version:
+            return read_summary(db, user_id) or totals
+        invalidate_summary(db, user_id)
+        db.commit()
+    return totals
+
+
+def _grouped_totals(db: Session, user_ids: Sequence[int]) -> Dict[int, SummaryTotals]:
+    """``compute_summary`` for many users at once, from two grouped aggregates."""
+    properties = {
+        user_id: (value, cashflow, count)
+        for user_id, value, cashflow, count in db.execute(
+            select(
+                Portfolio.user_id,
+                func.sum(
+                    func.coalesce(
+                        func.nullif(Property.last_valuation, 0), Property.purchase_price, 0.0
+                    )
+                ),
+                func.sum(
+                    func.coalesce(Property.monthly_rent, 0.0)
+                    - func.coalesce(Property.monthly_operating_expenses, 0.0)
+                    - func.coalesce(Property.monthly_mortgage, 0.0)
+                ),
+                func.count(Property.id),
+            )
+            .join(Portfolio, Portfolio.id == Property.portfolio_id)
+            .where(Portfolio.user_id.in_(user_ids))
+            .group_by(Portfolio.user_id)
+        )
+    }
+    stocks = {
+        user_id: (value, count)
+        for user_id, value, count in db.execute(
+            select(
+                Portfolio.user_id,
+                func.sum(
+                    func.coalesce(StockHolding.last_price, 0.0)
+                    * func.coalesce(StockHolding.shares, 0.0)
+                ),
+                func.count(StockHolding.id),
+            )
+            .join(Portfolio, Portfolio.id == StockHolding.portfolio_id)
+            .where(Portfolio.user_id.in_(user_ids))
+            .group_by(Portfolio.user_id)
+        )
+    }
+    totals = {}
+    for user_id in user_ids:
+        value, cashflow, property_count = properties.get(user_id, (0.0, 0.0, 0))
+        stocks_value, stock_count = stocks.get(user_id, (0.0, 0))
+        totals[user_id] = SummaryTotals(
+            properties_value=value or 0.0,
+            stocks_value=stocks_value or 0.0,
+            monthly_cashflow=cashflow or 0.0,
+            property_count=property_count,
+            stock_count=stock_count,
+        )
+    return totals
+
+
+def _drifted(row: UserSummary, totals: SummaryTotals) -> bool:
+    return (
+        row.property_count != totals.property_count
+        or row.stock_count != totals.stock_count
+        or not math.isclose(row.properties_value, totals.properties_value, abs_tol=0.01)
+        or not math.isclose(row.stocks_value, totals.stocks_value, abs_tol=0.01)
+        or not math.isclose(row.monthly_cashflow, totals.monthly_cashflow, abs_tol=0.01)
+    )
+
+
+def reconcile_summaries() -> int:
+    """Drop summary rows that drifted from their aggregates; returns how many.
+
+    Deltas keep the rows current, so this is a safety net: a dropped row is
+    rebuilt by the next dashboard read. A write racing the comparison can
+    only cause a needless rebuild, never a wrong row.
+    """
+    with SessionLocal() as db:
+        user_ids = db.scalars(select(UserSummary.user_id).order_by(UserSummary.user_id)).all()
+    drifted = 0
+    for start in range(0, len(user_ids), RECONCILE_BATCH_SIZE):
+        batch = user_ids[start : start + RECONCILE_BATCH_SIZE]
+        with SessionLocal() as db:
+            rows = db.scalars(select(UserSummary).where(UserSummary.user_id.in_(batch))).all()
+            totals = _grouped_totals(db, batch)
+            stale = [row.user_id for row in rows if _drifted(row, totals[row.user_id])]
+            if stale:
+                db.execute(
+                    delete(UserSummary)
+                    .where(UserSummary.user_id.in_(stale))
+                    .execution_options(synchronize_session=False)
+                )
+                versions.bump_data_versions(db, select(User.id).where(User.id.in_(stale)))
+                db.commit()
+                events.publish_resync(stale)
+                drifted += len(stale)
+    return drifted
+
+
+async def run_periodic_reconcile() -> None:
+    while True:
+        interval = settings.summary_reconcile_interval_minutes * 60
+        await asyncio.sleep(interval)
+        try:
+            if not await leases.hold("summary_reconcile", interval):
+                continue
+            drifted = await asyncio.to_thread(reconcile_summaries)
+            if drifted:
+                logger.warning("Rebuilding %s drifted dashboard summaries", drifted)
+        except Exception:  # pragma: no cover - keep the loop alive
+            logger.exception("Dashboard summary reconcile failed")
+
+
+def totals_payload(totals: SummaryTotals) -> Dict[str, Any]:
+    """The totals part of ``DashboardSummary`` (everything but the timeline)."""
+    properties_value = float(totals.properties_value)
+    stocks_value = float(totals.stocks_value)
+    return {
+        "total_net_worth": round(properties_value + stocks_value, 2),
+        "liquid_cashflow_monthly": round(float(totals.monthly_cashflow), 2),
+        "property_count": int(totals.property_count),
+        "stock_count": int(totals.stock_count),
+        "allocation": {
+            "stocks_value": round(stocks_value, 2),
+            "properties_value": round(properties_value, 2),
+        },
+    }
+
+
+def get_summary(db: Session, user_id: int) -> SummaryTotals:
+    """Read the materialized summary row, backfilling it from SQL aggregates when missing."""
+    totals = read_summary(db, user_id)
+    return totals if totals is not None else backfill_summary(db, user_id)
+
+
+def record_property_change(db: Session, user_id: int, before: Contribution, after: Contribution) -> bool:
+    """Apply a property's before/after delta to the summary row in the caller's transaction.
+
+    Returns whether the valuation changed, i.e. whether a new net-worth snapshot is due.
+    """
+    if before == after:
+        return False
+    db.execute(
+        update(UserSummary)
+        .where(UserSummary.user_id == user_id)
+        .values(
+            properties_value=UserSummary.properties_value + (after.value - before.value),
+            monthly_cashflow=UserSummary.monthly_cashflow + (after.cashflow - before.cashflow),
+            property_count=UserSummary.property_count + (after.count - before.count),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return before.value != after.value
+
+
+def record_stock_change(db: Session, user_id: int, before: Contribution, after: Contribution) -> bool:
+    if before == after:
+        return False
+    db.execute(
+        update(UserSummary)
+        .where(UserSummary.user_id == user_id)
+        .values(
+            stocks_value=UserSummary.stocks_value + (after.value - before.value),
+            stock_count=UserSummary.stock_count + (after.count - before.count),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return before.value != after.value
+
+
+def record_stock_values(db: Session, deltas: Dict[int, float]) -> None:
+    """Shift each user's stock value by its repricing delta, in the caller's transaction."""
+    if not deltas:
+        return
+    db.execute(
+        update(UserSummary)
+        .where(UserSummary.user_id.in_(deltas))
+        .values(stocks_value=UserSummary.stocks_value + case(deltas, value=UserSummary.user_id))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def invalidate_summary(db: Session, user_id: int) -> None:
+    """Drop the summary row so the next read rebuilds it (used for bulk changes)."""
+    db.execute(
+        delete(UserSummary)
+        .where(UserSummary.user_id == user_id)
+        .execution_options(synchronize_session=False)
+    )
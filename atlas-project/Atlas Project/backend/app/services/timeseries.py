@@ -0,0 +1,19 @@
+from sqlalchemy import func
+from sqlalchemy.sql.elements import ColumnElement
+
+RESOLUTIONS = ("daily", "weekly", "monthly")
+
+_POSTGRES_UNITS = {"daily": "day", "weekly": "week", "monthly": "month"}
+
+
+def time_bucket(column: ColumnElement, resolution: str, dialect: str) -> ColumnElement:
+    """Truncate a timestamp column to the start of its day, ISO week or month."""
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unsupported resolution: {resolution}")
+    if dialect == "sqlite":
+        if resolution == "daily":
+            return func.date(column)
+        if resolution == "weekly":
+            return func.date(column, "-6 days", "weekday 1")
+        return func.strftime("%Y-%m-01", column)
+    return func.date_trunc(_POSTGRES_UNITS[resolution], column)
@@ -0,0 +1,48 @@
+from typing import Dict, Optional
+
+from sqlalchemy import Select, select, update
+from sqlalchemy.orm import Session
+
+from app.models import User
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def bump_data_version(db: Session, user_id: int) -> None:
+    """Mark the user's data as changed, in the caller's transaction."""
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(data_version=User.data_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def bump_data_versions(db: Session, user_ids: Optional[Select] = None) -> None:
+    """Bump every user selected by ``user_ids`` (all users when omitted) in one UPDATE."""
+    stmt = update(User).values(data_version=User.data_version + 1)
+    if user_ids is not None:
+        stmt = stmt.where(User.id.in_(user_ids))
+    db.execute(stmt.execution_options(synchronize_session=False))
+
+
+def load_data_version(db: Session, user_id: int) -> int:
+    return db.scalar(select(User.data_version).where(User.id == user_id)) or 0
+
+
+def make_etag(user_id: int, data_version: int) -> str:
+    # weak: the same version may be encoded with different (equivalent) bytes
+    return f'W/"{user_id}-{data_version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+    # weak comparison, as RFC 9110 requires for If-None-Match
+    return "*" in candidates or etag in candidates or etag[2:] in candidates
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    """Let browsers keep the body but revalidate it on every request."""
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
@@ -0,0 +1,89 @@
+"""Rows/second of the list serialization paths.
+
+``python -m benchmarks.serialization_bench [rows]``, run from ``backend/``,
+fills an in-memory SQLite database with one user's properties, then times
+the ORM + ``orm_mode`` validation + ``JSONResponse`` path against the
+column-projected ``rows_to_dicts`` + ``ORJSONResponse`` path used by the
+list endpoints, and checks that both produce the same JSON document.
+"""
+import json
+import sys
+import time
+from typing import Callable, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.core.serialization import list_page, rows_to_dicts, schema_columns
+from app.models import Base, Portfolio, Property, User
+
+ROUNDS = 5
+
+
+def _seed(db: Session, rows: int) -> None:
+    db.add(User(id=1, email="bench@example.com", password_hash="x"))
+    db.add(Portfolio(id=1, user_id=1, name="Bench"))
+    db.flush()
+    db.execute(
+        insert(Property),
+        [
+            {
+                "portfolio_id": 1,
+                "address": f"{n} Main St",
+                "city": "Austin",
+                "state": "TX",
+                "zip": "78701",
+                "purchase_price": 250_000.0 + n,
+                "last_valuation": 300_000.5 + n,
+                "monthly_rent": 2_100.0,
+                "year_built": 1990 + n % 30,
+            }
+            for n in range(rows)
+        ],
+    )
+    db.commit()
+
+
+def _orm_path(db: Session) -> bytes:
+    items = db.scalars(select(Property).order_by(Property.id.desc())).all()
+    payload = schemas.PropertyList(items=items, total=len(items), page=1, page_size=len(items))
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def _projected_path(db: Session) -> bytes:
+    stmt = select(*schema_columns(Property, schemas.PropertyRead)).order_by(Property.id.desc())
+    rows = db.execute(stmt).all()
+    payload = list_page(rows_to_dicts(rows, schemas.PropertyRead), len(rows), 1, len(rows), None)
+    return ORJSONResponse(payload).body
+
+
+def _rows_per_second(db: Session, path: Callable[[Session], bytes], rows: int) -> Tuple[float, bytes]:
+    best = float("inf")
+    body = b""
+    for _ in range(ROUNDS):
+        db.expunge_all()
+        started = time.perf_counter()
+        body = path(db)
+        best = min(best, time.perf_counter() - started)
+    return rows / best, body
+
+
+def main(rows: int = 5_000) -> int:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        _seed(db, rows)
+        orm_rate, orm_body = _rows_per_second(db, _orm_path, rows)
+        projected_rate, projected_body = _rows_per_second(db, _projected_path, rows)
+    same = json.loads(orm_body) == json.loads(projected_body)
+    print(f"orm + pydantic: {orm_rate:,.0f} rows/s")
+    print(f"projected:      {projected_rate:,.0f} rows/s ({projected_rate / orm_rate:.1f}x)")
+    print("responses identical" if same else "RESPONSES DIFFER")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:2])))
@@ -0,0 +1,18 @@
+import os
+import tempfile
+
+import pytest
+
+# app.db binds its engines at import; point them at a scratch database first
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+
+
+@pytest.fixture
+def db():
+    from app.db import SessionLocal, engine
+    from app.models import Base
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with SessionLocal() as session:
+        yield session
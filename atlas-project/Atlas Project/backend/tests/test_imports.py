@@ -0,0 +1,35 @@
+import asyncio
+import io
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models import Portfolio, PortfolioValueSnapshot, StockHolding, User
+from app.services import imports
+
+
+def test_import_inserts_valid_rows_batch_by_batch(db, monkeypatch):
+    monkeypatch.setattr(settings, "import_batch_size", 2)
+    user = User(email="a@example.com", password_hash="x")
+    user.portfolios = [Portfolio(name="P")]
+    db.add(user)
+    db.commit()
+    portfolio_id = user.portfolios[0].id
+    upload = io.BytesIO(
+        b"symbol,shares,last_price\nAAPL,10,100\nMSFT,not-a-number,50\nNVDA,2,400\n"
+    )
+
+    report = asyncio.run(
+        imports.import_records(db, user.id, portfolio_id, "stocks", "csv", upload)
+    )
+
+    assert (report.imported, report.failed) == (2, 1)
+    assert report.errors[0]["row"] == 2
+    symbols = db.scalars(
+        select(StockHolding.symbol).where(StockHolding.portfolio_id == portfolio_id)
+    ).all()
+    assert sorted(symbols) == ["AAPL", "NVDA"]
+    snapshot = db.scalar(
+        select(PortfolioValueSnapshot).where(PortfolioValueSnapshot.user_id == user.id)
+    )
+    assert snapshot.stocks_value == 1800.0
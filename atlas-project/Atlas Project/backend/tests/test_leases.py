@@ -0,0 +1,19 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.models import JobLease
+from app.services import leases
+
+
+def test_one_holder_at_a_time(db, monkeypatch):
+    assert leases.acquire("compaction", 60)
+    assert leases.acquire("compaction", 60)  # the holder renews
+
+    monkeypatch.setattr(leases, "HOLDER", "other-worker")
+    assert not leases.acquire("compaction", 60)
+    assert leases.acquire("snapshots", 60)  # leases are per job
+
+    db.execute(update(JobLease).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.commit()
+    assert leases.acquire("compaction", 60)  # taken over once expired
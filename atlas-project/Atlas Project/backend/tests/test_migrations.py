@@ -0,0 +1,25 @@
+from sqlalchemy import create_engine, inspect
+
+from app import migrations
+from app.models import Base
+
+
+def test_upgrade_adds_missing_columns_and_indexes():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE users DROP COLUMN data_version")
+        conn.exec_driver_sql("ALTER TABLE users DROP COLUMN token_version")
+        conn.exec_driver_sql("ALTER TABLE properties DROP COLUMN latitude")
+        conn.exec_driver_sql("DROP INDEX ix_portfolios_user_id_id")
+        conn.exec_driver_sql("INSERT INTO users (email, password_hash) VALUES ('a@example.com', 'x')")
+
+    migrations.upgrade(engine)
+    migrations.upgrade(engine)  # a second run finds nothing to do
+
+    inspector = inspect(engine)
+    assert {"data_version", "token_version"} <= {c["name"] for c in inspector.get_columns("users")}
+    assert "latitude" in {c["name"] for c in inspector.get_columns("properties")}
+    assert "ix_portfolios_user_id_id" in {i["name"] for i in inspector.get_indexes("portfolios")}
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT data_version, token_version FROM users").one() == (0, 0)
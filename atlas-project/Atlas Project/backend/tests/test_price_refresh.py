@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.models import Portfolio, PortfolioValueSnapshot, StockHolding, User
+from app.providers.price_base import Quote
+from app.providers.prices import FakePriceProvider
+from app.services import events, price_refresh, summary
+
+
+def _holder(db, email, holdings):
+    user = User(email=email, password_hash="x")
+    user.portfolios = [Portfolio(name="P")]
+    db.add(user)
+    db.flush()
+    for symbol, shares, price in holdings:
+        db.add(
+            StockHolding(
+                portfolio_id=user.portfolios[0].id, symbol=symbol, shares=shares, last_price=price
+            )
+        )
+    db.commit()
+    return user.id
+
+
+def test_refresh_quotes_each_symbol_once_and_moves_summaries(db):
+    first = _holder(db, "a@example.com", [("AAPL", 10, 100.0), ("MSFT", 2, 50.0)])
+    second = _holder(db, "b@example.com", [("aapl ", 5, 100.0)])
+    for user_id in (first, second):
+        summary.get_summary(db, user_id)
+    provider = FakePriceProvider({"AAPL": 110.0, "MSFT": 50.0}, max_batch_size=10)
+
+    result = asyncio.run(price_refresh.refresh_prices(provider))
+
+    assert provider.calls == [["AAPL", "MSFT"]]
+    assert (result.symbols, result.quoted, result.holdings_updated) == (2, 2, 3)
+    db.expire_all()
+    for user_id in (first, second):
+        assert summary.read_summary(db, user_id) == summary.compute_summary(db, user_id)
+    assert summary.read_summary(db, first).stocks_value == 1200.0
+    snapshots = db.execute(
+        select(PortfolioValueSnapshot.user_id, PortfolioValueSnapshot.stocks_value)
+    ).all()
+    assert sorted(snapshots) == [(first, 1200.0), (second, 550.0)]
+
+
+def test_unchanged_prices_record_no_snapshot(db):
+    _holder(db, "a@example.com", [("AAPL", 10, 100.0)])
+
+    asyncio.run(price_refresh.refresh_prices(FakePriceProvider({"AAPL": 100.0})))
+
+    assert db.scalars(select(PortfolioValueSnapshot)).all() == []
+
+
+def test_only_repriced_holdings_are_counted_and_published(db):
+    as_of = datetime(2026, 1, 2, 16)
+    user_id = _holder(db, "a@example.com", [("AAPL", 10, 100.0), ("MSFT", 2, 50.0)])
+    db.execute(StockHolding.__table__.update().values(last_price_at=as_of))
+    db.commit()
+    aapl = db.scalar(select(StockHolding.id).where(StockHolding.symbol == "AAPL"))
+    quotes = {"AAPL": Quote("AAPL", 110.0, as_of), "MSFT": Quote("MSFT", 50.0, as_of)}
+    variants = {"AAPL": ["AAPL"], "MSFT": ["MSFT"]}
+
+    async def scenario():
+        async with events.broker.subscribe(user_id) as queue:
+            updated = await asyncio.to_thread(price_refresh._apply_quotes, quotes, variants)
+            event = await asyncio.wait_for(queue.get(), timeout=1)
+            # the same quotes again change nothing and publish nothing
+            again = await asyncio.to_thread(price_refresh._apply_quotes, quotes, variants)
+            await asyncio.sleep(0)
+            return updated, event, again, queue.empty()
+
+    updated, event, again, drained = asyncio.run(scenario())
+
+    assert (updated, again, drained) == (1, 0, True)
+    assert [change["id"] for change in event["changes"]] == [aapl]
@@ -0,0 +1,173 @@
+"""EXPLAIN QUERY PLAN checks for the hot, ownership-scoped queries.
+
+Each case runs the router or service helper an endpoint runs, records every
+statement it sends to the database and fails when SQLite plans any of them
+as a full scan of a model table.
+"""
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Iterator, List, Tuple
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.core import geo
+from app.core.pagination import encode_cursor
+from app.models import (
+    Base,
+    CompListing,
+    Portfolio,
+    Property,
+    RentComp,
+    RentEstimate,
+    StockHolding,
+    User,
+)
+from app.providers.price_base import Quote
+from app.routers.bootstrap import _bootstrap
+from app.routers.dashboard import _build_dashboard_summary, _net_worth_history
+from app.routers.portfolios import (
+    _estimate_rents,
+    _get_portfolio_or_404,
+    _list_portfolios,
+    _portfolio_analytics,
+    _projection_inputs,
+)
+from app.routers.properties import (
+    _get_property_or_404,
+    _list_properties,
+    _property_comps,
+    _rent_estimate_history,
+)
+from app.routers.stocks import _get_stock_or_404, _list_stocks
+from app.services import price_refresh, refresh_jobs, summary
+
+LATITUDE, LONGITUDE = 37.7749, -122.4194
+CURSOR = encode_cursor(100)
+_SCAN = re.compile(r"^SCAN (\w+)")
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    """Plan steps that walk a whole base table (a covering-index scan counts too)."""
+    tables = set(Base.metadata.tables)
+    return [step for step in plan if (match := _SCAN.match(step)) and match.group(1) in tables]
+
+
+@contextmanager
+def recorded(db) -> Iterator[List[Tuple[str, Any]]]:
+    """Every explainable statement executed on ``db``'s engine inside the block."""
+    engine = db.get_bind()
+    statements: List[Tuple[str, Any]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(_EXPLAINABLE):
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def explain(db, statement: str, parameters: Any) -> List[str]:
+    conn = db.get_bind().raw_connection()
+    try:
+        return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def seeded(db):
+    user = User(email="a@example.com", password_hash="x")
+    portfolio = Portfolio(name="P")
+    user.portfolios = [portfolio]
+    located = Property(
+        address="1 Main St", city="SF", state="CA", zip="94103",
+        latitude=LATITUDE, longitude=LONGITUDE, bedrooms=2.0,
+    )
+    unlocated = Property(address="2 Main St", city="SF", state="CA", zip="94103", bedrooms=2.0)
+    portfolio.properties = [located, unlocated]
+    portfolio.stock_holdings = [StockHolding(symbol="AAPL", shares=10, last_price=100.0)]
+    db.add(user)
+    db.flush()
+    now = datetime.utcnow()
+    db.add_all(
+        [
+            RentEstimate(property_id=located.id, estimate=2000, low=1800, high=2200, as_of=now),
+            RentComp(property_id=located.id, address="3 Main St", monthly_rent=2100),
+            CompListing(
+                address_key="3 main st", address="3 Main St",
+                latitude=LATITUDE + 0.001, longitude=LONGITUDE,
+                geohash=geo.encode(LATITUDE + 0.001, LONGITUDE),
+                monthly_rent=2100, bed=2.0, last_seen_at=now,
+            ),
+        ]
+    )
+    db.commit()
+    summary.get_summary(db, user.id)
+    return db, user.id, portfolio.id, located.id, portfolio.stock_holdings[0].id
+
+
+def _or_404(call):
+    try:
+        call()
+    except HTTPException:
+        pass
+
+
+CASES = {
+    "portfolios.list": lambda db, u, p, h, s: _list_portfolios(db, u, 2, 20, None, True),
+    "portfolios.list_after_cursor": lambda db, u, p, h, s: _list_portfolios(
+        db, u, 1, 20, CURSOR, False
+    ),
+    "portfolios.get": lambda db, u, p, h, s: _or_404(lambda: _get_portfolio_or_404(db, p, u + 1)),
+    "properties.list": lambda db, u, p, h, s: _list_properties(db, u, 2, 20, None, None, True),
+    "properties.list_after_cursor": lambda db, u, p, h, s: _list_properties(
+        db, u, 1, 20, None, CURSOR, False
+    ),
+    "properties.list_by_portfolio": lambda db, u, p, h, s: _list_properties(
+        db, u, 1, 20, p, CURSOR, True
+    ),
+    "properties.get": lambda db, u, p, h, s: _or_404(lambda: _get_property_or_404(db, h, u + 1)),
+    "properties.comps": lambda db, u, p, h, s: _property_comps(db, h, u, 1.0, 2.0, 10),
+    "properties.rent_estimate_history": lambda db, u, p, h, s: _rent_estimate_history(
+        db, h, u, "weekly", None, datetime.utcnow() - timedelta(days=90), None
+    ),
+    "stocks.list": lambda db, u, p, h, s: _list_stocks(db, u, 2, 20, None, None, True),
+    "stocks.list_after_cursor": lambda db, u, p, h, s: _list_stocks(
+        db, u, 1, 20, None, CURSOR, False
+    ),
+    "stocks.list_by_portfolio": lambda db, u, p, h, s: _list_stocks(db, u, 1, 20, p, CURSOR, True),
+    "stocks.get": lambda db, u, p, h, s: _or_404(lambda: _get_stock_or_404(db, s, u + 1)),
+    "portfolios.analytics": lambda db, u, p, h, s: _portfolio_analytics(db, p, u),
+    "portfolios.projection_inputs": lambda db, u, p, h, s: _projection_inputs(db, p, u),
+    "portfolios.local_rent_estimates": lambda db, u, p, h, s: _estimate_rents(db, p, u),
+    "portfolios.refresh_targets": lambda db, u, p, h, s: refresh_jobs._load_targets(
+        p, datetime.utcnow()
+    ),
+    "dashboard.summary": lambda db, u, p, h, s: _build_dashboard_summary(
+        db, u, summary.compute_summary(db, u)
+    ),
+    "dashboard.history": lambda db, u, p, h, s: _net_worth_history(db, u, "monthly", None, None),
+    "bootstrap": lambda db, u, p, h, s: _bootstrap(db, u, 20, None),
+    "prices.apply_quotes": lambda db, u, p, h, s: price_refresh._apply_quotes(
+        {"AAPL": Quote("AAPL", 110.0, datetime.utcnow())}, {"AAPL": ["AAPL"]}
+    ),
+}
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_endpoint_queries_use_indexes(seeded, name):
+    db, *ids = seeded
+    with recorded(db) as statements:
+        CASES[name](db, *ids)
+        db.rollback()
+
+    assert statements, f"{name} ran no queries"
+    scans = {sql: full_scans(explain(db, sql, params)) for sql, params in statements}
+    assert {sql: steps for sql, steps in scans.items() if steps} == {}
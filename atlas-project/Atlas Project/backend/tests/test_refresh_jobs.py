@@ -0,0 +1,51 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.models import Portfolio, PortfolioRefreshJob, User
+from app.providers.rental_base import RentalLookup
+from app.services import refresh_jobs
+
+
+def test_sweep_fails_only_jobs_whose_worker_went_silent(db):
+    user = User(email="a@example.com", password_hash="x")
+    user.portfolios = [Portfolio(name="P")]
+    db.add(user)
+    db.flush()
+    now = datetime.utcnow()
+    for job_id, status, heartbeat_at in (
+        ("dead", "running", now - timedelta(hours=1)),
+        ("alive", "running", now),
+        ("done", "completed", now - timedelta(hours=1)),
+    ):
+        db.add(
+            PortfolioRefreshJob(
+                id=job_id,
+                user_id=user.id,
+                portfolio_id=user.portfolios[0].id,
+                status=status,
+                errors={},
+                created_at=now - timedelta(hours=2),
+                heartbeat_at=heartbeat_at,
+            )
+        )
+    db.commit()
+
+    assert refresh_jobs._fail_abandoned_jobs(now - timedelta(minutes=3)) == 1
+
+    db.expire_all()
+    statuses = {job.id: job.status for job in db.query(PortfolioRefreshJob)}
+    assert statuses == {"dead": "failed", "alive": "running", "done": "completed"}
+    assert db.get(PortfolioRefreshJob, "dead").finished_at is not None
+
+
+def test_failed_batch_is_counted_and_the_job_goes_on(monkeypatch):
+    def broken_write(user_id, batch):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(refresh_jobs, "_write_batch", broken_write)
+    job = refresh_jobs.RefreshJob(id="job", user_id=1, portfolio_id=1)
+
+    asyncio.run(refresh_jobs._write(job, [(7, RentalLookup()), (8, RentalLookup())]))
+
+    assert (job.refreshed, job.failed) == (0, 2)
+    assert job.errors == {property_id: "save failed: database is locked" for property_id in (7, 8)}
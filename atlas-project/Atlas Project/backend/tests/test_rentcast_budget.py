@@ -0,0 +1,128 @@
+import asyncio
+
+from app.providers.cache import CachedRentalDataProvider, RentalResponseCache
+from app.providers.quota import BACKGROUND, INTERACTIVE, BudgetedRentalDataProvider
+from app.providers.rental_base import (
+    IAsyncRentalDataProvider,
+    QuotaExceeded,
+    fetch_rental_lookup,
+    retry_after_headers,
+)
+
+
+class HeldBackgroundBudget:
+    """Grants interactive calls at once and holds background ones until released."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def acquire(self, priority):
+        if priority == BACKGROUND:
+            await self.release.wait()
+
+    def cool_down(self, seconds):
+        pass
+
+
+class CountingProvider(IAsyncRentalDataProvider):
+    def __init__(self):
+        self.calls = 0
+
+    async def get_property_details(self, address):
+        self.calls += 1
+        return {"address": address}
+
+    async def get_rent_estimate(self, address):
+        self.calls += 1
+        return {"rent": 2000}
+
+    async def get_rent_comps(self, address, limit=10):
+        self.calls += 1
+        return []
+
+
+def test_interactive_lookup_does_not_wait_on_background_load():
+    async def scenario():
+        budget = HeldBackgroundBudget()
+        inner = CountingProvider()
+        cache = RentalResponseCache(ttls={"estimate": 60}, max_entries=10)
+
+        def provider(priority):
+            budgeted = BudgetedRentalDataProvider(inner, budget, priority)
+            return CachedRentalDataProvider(budgeted, cache, lane=priority)
+
+        background = asyncio.create_task(provider(BACKGROUND).get_rent_estimate("1 Main St"))
+        await asyncio.sleep(0)
+        estimate = await asyncio.wait_for(
+            provider(INTERACTIVE).get_rent_estimate("1 Main Street"), timeout=1
+        )
+        assert estimate == {"rent": 2000}
+        assert not background.done()
+
+        budget.release.set()
+        assert await background == {"rent": 2000}
+        assert inner.calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_loads_within_a_lane_are_merged():
+    async def scenario():
+        budget = HeldBackgroundBudget()
+        inner = CountingProvider()
+        cache = RentalResponseCache(ttls={"estimate": 60}, max_entries=10)
+        provider = CachedRentalDataProvider(
+            BudgetedRentalDataProvider(inner, budget, BACKGROUND), cache, lane=BACKGROUND
+        )
+
+        lookups = [asyncio.create_task(provider.get_rent_estimate("1 Main St")) for _ in range(3)]
+        await asyncio.sleep(0)
+        budget.release.set()
+        assert await asyncio.gather(*lookups) == [{"rent": 2000}] * 3
+        assert inner.calls == 1
+        assert cache.counters["estimate"].coalesced == 2
+
+    asyncio.run(scenario())
+
+
+def test_waiters_survive_the_first_caller_going_away():
+    async def scenario():
+        budget = HeldBackgroundBudget()
+        inner = CountingProvider()
+        cache = RentalResponseCache(ttls={"estimate": 60}, max_entries=10)
+        provider = CachedRentalDataProvider(
+            BudgetedRentalDataProvider(inner, budget, BACKGROUND), cache, lane=BACKGROUND
+        )
+
+        first = asyncio.create_task(provider.get_rent_estimate("1 Main St"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(provider.get_rent_estimate("1 Main St"))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        budget.release.set()
+        assert await second == {"rent": 2000}
+        assert first.cancelled()
+        assert inner.calls == 1
+
+    asyncio.run(scenario())
+
+
+class RefusingProvider(IAsyncRentalDataProvider):
+    async def get_property_details(self, address):
+        raise QuotaExceeded("per-minute", retry_after=3.0)
+
+    async def get_rent_estimate(self, address):
+        raise QuotaExceeded("per-minute", retry_after=12.5)
+
+    async def get_rent_comps(self, address, limit=10):
+        raise QuotaExceeded("monthly")
+
+
+def test_refused_lookup_carries_the_longest_retry_after():
+    lookup = asyncio.run(fetch_rental_lookup(RefusingProvider(), "1 Main St"))
+
+    assert lookup.deferred
+    assert lookup.retry_after == 12.5
+    assert retry_after_headers(lookup.retry_after) == {"Retry-After": "13"}
+    assert retry_after_headers(None) is None
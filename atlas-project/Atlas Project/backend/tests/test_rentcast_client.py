@@ -0,0 +1,39 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.providers.rental_base import RateLimited
+from app.providers.rentcast import AsyncRentCastProvider
+
+
+def _provider(statuses):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(statuses[len(requests) - 1], json={"rent": 2000})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://rc.test")
+    return AsyncRentCastProvider(client), requests
+
+
+def test_retries_past_rate_limits(monkeypatch):
+    monkeypatch.setattr(settings, "rentcast_max_retries", 3)
+    monkeypatch.setattr(settings, "rentcast_backoff_max", 0.0)
+    provider, requests = _provider([429, 503, 200])
+
+    assert asyncio.run(provider.get_rent_estimate("1 Main St")) == {"rent": 2000}
+    assert len(requests) == 3
+
+
+def test_zero_retries_still_calls_once(monkeypatch):
+    monkeypatch.setattr(settings, "rentcast_max_retries", 0)
+    provider, requests = _provider([200])
+    assert asyncio.run(provider.get_rent_estimate("1 Main St")) == {"rent": 2000}
+
+    provider, requests = _provider([429])
+    with pytest.raises(RateLimited):
+        asyncio.run(provider.get_rent_estimate("1 Main St"))
+    assert len(requests) == 1
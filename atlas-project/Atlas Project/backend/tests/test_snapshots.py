@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models import Portfolio, PortfolioValueSnapshot, StockHolding, User
+from app.services import snapshots
+
+
+def test_steady_edits_append_a_point_per_interval(db, monkeypatch):
+    user = User(email="a@example.com", password_hash="x")
+    user.portfolios = [Portfolio(name="P")]
+    db.add(user)
+    db.flush()
+    holding = StockHolding(
+        portfolio_id=user.portfolios[0].id, symbol="AAPL", shares=1, last_price=1.0
+    )
+    db.add(holding)
+    db.commit()
+
+    start = datetime(2026, 1, 1)
+    step = timedelta(minutes=settings.snapshot_min_interval_minutes / 3)
+    for edit in range(7):
+        clock = start + edit * step
+
+        class FrozenDatetime(datetime):
+            @classmethod
+            def utcnow(cls):
+                return clock
+
+        monkeypatch.setattr(snapshots, "datetime", FrozenDatetime)
+        holding.last_price = float(edit + 1)
+        snapshots.record_snapshot(db, user.id)
+        db.commit()
+
+    points = db.execute(
+        select(PortfolioValueSnapshot.as_of, PortfolioValueSnapshot.stocks_value).order_by(
+            PortfolioValueSnapshot.as_of
+        )
+    ).all()
+    interval = timedelta(minutes=settings.snapshot_min_interval_minutes)
+    assert [as_of for as_of, _ in points] == [start, start + interval + step]
+    assert points[-1].stocks_value == 7.0
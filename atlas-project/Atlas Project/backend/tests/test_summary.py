@@ -0,0 +1,60 @@
+from sqlalchemy import update
+
+from app.db import SessionLocal
+from app.models import Portfolio, StockHolding, User, UserSummary
+from app.services import summary, versions
+
+
+def _user_with_stock(db):
+    user = User(email="a@example.com", password_hash="x")
+    user.portfolios = [Portfolio(name="P")]
+    db.add(user)
+    db.flush()
+    db.add(
+        StockHolding(portfolio_id=user.portfolios[0].id, symbol="AAPL", shares=10, last_price=100.0)
+    )
+    db.commit()
+    return user
+
+
+def test_backfill_rebuilds_when_a_write_lands_mid_backfill(db, monkeypatch):
+    user = _user_with_stock(db)
+    compute = summary.compute_summary
+    calls = []
+
+    def racing_compute(session, user_id):
+        totals = compute(session, user_id)
+        if not calls:
+            # another request adds a holding after the aggregate read, before the insert
+            with SessionLocal() as other:
+                other.add(
+                    StockHolding(
+                        portfolio_id=user.portfolios[0].id, symbol="MSFT", shares=1, last_price=50.0
+                    )
+                )
+                versions.bump_data_version(other, user_id)
+                other.commit()
+        calls.append(totals)
+        return totals
+
+    monkeypatch.setattr(summary, "compute_summary", racing_compute)
+    totals = summary.backfill_summary(db, user.id)
+
+    assert len(calls) == 2
+    assert totals.stocks_value == 1050.0
+    assert summary.read_summary(db, user.id) == compute(db, user.id)
+
+
+def test_reconcile_drops_drifted_rows(db):
+    user = _user_with_stock(db)
+    summary.get_summary(db, user.id)
+    assert summary.reconcile_summaries() == 0
+
+    db.execute(update(UserSummary).values(stocks_value=1.0))
+    db.commit()
+    version = versions.load_data_version(db, user.id)
+    assert summary.reconcile_summaries() == 1
+    db.expire_all()
+    assert summary.read_summary(db, user.id) is None
+    assert versions.load_data_version(db, user.id) == version + 1
+    assert summary.get_summary(db, user.id).stocks_value == 1000.0
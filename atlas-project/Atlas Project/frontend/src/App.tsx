@@ -1,5 +1,6 @@
 import { Navigate, Route, Routes } from "react-router-dom";
 
+import { useLiveUpdates } from "./api/hooks";
 import AppHeader from "./components/AppHeader";
 import { useAuth } from "./context/AuthContext";
 import DashboardPage from "./pages/Dashboard";
@@ -23,6 +24,7 @@ const ProtectedRoute = ({ children }: { children: JSX.Element }) => {
 
 const App = () => {
   const { isAuthenticated, isLoading, user, logout } = useAuth();
+  useLiveUpdates(isAuthenticated);
 
   if (isLoading) {
     return <div className="container" style={{ padding: "3rem 0" }}>Loading...</div>;
@@ -6,7 +6,7 @@ import {
   storeTokens,
 } from "../utils/auth-storage";
 
-const baseURL = import.meta.env.VITE_API_BASE_URL ?? "/api";
+export const baseURL = import.meta.env.VITE_API_BASE_URL ?? "/api";
 
 type RetriableConfig = AxiosRequestConfig & { _retry?: boolean };
 
@@ -24,7 +24,7 @@ api.interceptors.request.use((config) => {
 
 let refreshPromise: Promise<string | null> | null = null;
 
-const refreshAccessToken = async (): Promise<string | null> => {
+export const refreshAccessToken = async (): Promise<string | null> => {
   const tokens = getStoredTokens();
   if (!tokens.refreshToken) {
     return null;
@@ -1,8 +1,13 @@
-import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
+import { QueryClient, useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
+import { useEffect } from "react";
 
-import api from "./client";
+import { getStoredTokens } from "../utils/auth-storage";
+import api, { baseURL, refreshAccessToken } from "./client";
 import {
+  Bootstrap,
   DashboardSummary,
+  LiveChange,
+  LiveChangesEvent,
   Paginated,
   Portfolio,
   PortfolioPayload,
@@ -13,14 +18,57 @@ import {
   StockPayload,
 } from "./types";
 
-export const useDashboard = () =>
-  useQuery({
+// One /bootstrap request feeds the first load of the dashboard and the unfiltered lists;
+// each key is served from it once, later refetches go to the regular endpoints.
+let bootstrapRequest: Promise<Bootstrap | null> | null = null;
+let bootstrapServed = new Set<keyof Bootstrap>();
+
+export const resetBootstrap = () => {
+  bootstrapRequest = null;
+  bootstrapServed = new Set();
+};
+
+const fromBootstrap = async <K extends keyof Bootstrap>(
+  queryClient: QueryClient,
+  key: K,
+): Promise<Bootstrap[K] | null> => {
+  if (bootstrapServed.has(key)) {
+    return null;
+  }
+  if (!bootstrapRequest) {
+    bootstrapRequest = api
+      .get<Bootstrap>("/bootstrap")
+      .then((response) => {
+        const data = response.data;
+        // seed the lists no page has asked for yet, so navigating to them is instant
+        queryClient.setQueryData(["dashboard"], data.dashboard);
+        queryClient.setQueryData(["portfolios"], data.portfolios);
+        queryClient.setQueryData(["properties", "all"], data.properties);
+        queryClient.setQueryData(["stocks", "all"], data.stocks);
+        return data;
+      })
+      .catch(() => null);
+  }
+  const data = await bootstrapRequest;
+  bootstrapServed.add(key);
+  return data ? data[key] : null;
+};
+
+export const useDashboard = () => {
+  const queryClient = useQueryClient();
+
+  return useQuery({
     queryKey: ["dashboard"],
     queryFn: async () => {
+      const seeded = await fromBootstrap(queryClient, "dashboard");
+      if (seeded) {
+        return seeded;
+      }
       const response = await api.get<DashboardSummary>("/dashboard");
       return response.data;
     },
   });
+};
 
 export const usePortfolios = () => {
   const queryClient = useQueryClient();
@@ -28,7 +76,13 @@ export const usePortfolios = () => {
   const listQuery = useQuery({
     queryKey: ["portfolios"],
     queryFn: async () => {
-      const response = await api.get<Paginated<Portfolio>>("/portfolios");
+      const seeded = await fromBootstrap(queryClient, "portfolios");
+      if (seeded) {
+        return seeded;
+      }
+      const response = await api.get<Paginated<Portfolio>>("/portfolios", {
+        params: { include_total: false },
+      });
       return response.data;
     },
   });
@@ -74,8 +128,12 @@ export const useProperties = (portfolioId?: number) => {
   const listQuery = useQuery({
     queryKey: ["properties", portfolioId ?? "all"],
     queryFn: async () => {
+      const seeded = portfolioId ? null : await fromBootstrap(queryClient, "properties");
+      if (seeded) {
+        return seeded;
+      }
       const response = await api.get<Paginated<Property>>("/properties", {
-        params: portfolioId ? { portfolio_id: portfolioId } : undefined,
+        params: { include_total: false, ...(portfolioId ? { portfolio_id: portfolioId } : {}) },
       });
       return response.data;
     },
@@ -146,8 +204,12 @@ export const useStocks = (portfolioId?: number) => {
   const listQuery = useQuery({
     queryKey: ["stocks", portfolioId ?? "all"],
     queryFn: async () => {
+      const seeded = portfolioId ? null : await fromBootstrap(queryClient, "stocks");
+      if (seeded) {
+        return seeded;
+      }
       const response = await api.get<Paginated<StockHolding>>("/stocks", {
-        params: portfolioId ? { portfolio_id: portfolioId } : undefined,
+        params: { include_total: false, ...(portfolioId ? { portfolio_id: portfolioId } : {}) },
       });
       return response.data;
     },
@@ -190,3 +252,122 @@ export const useStocks = (portfolioId?: number) => {
     deleteMutation,
   };
 };
+
+const patchItems = <T extends { id: number }>(
+  queryClient: QueryClient,
+  queryKey: string,
+  changes: LiveChange[],
+) => {
+  const fields = new Map(changes.map((change) => [change.id, change.fields]));
+  if (!fields.size) {
+    return;
+  }
+  queryClient.setQueriesData<Paginated<T>>({ queryKey: [queryKey] }, (page) =>
+    page && {
+      ...page,
+      items: page.items.map((item) =>
+        fields.has(item.id) ? { ...item, ...fields.get(item.id) } : item,
+      ),
+    },
+  );
+};
+
+const applyLiveChanges = (queryClient: QueryClient, event: LiveChangesEvent) => {
+  const byEntity = (entity: LiveChange["entity"]) =>
+    event.changes.filter((change) => change.entity === entity);
+  patchItems<Property>(queryClient, "properties", byEntity("property"));
+  patchItems<StockHolding>(queryClient, "stocks", byEntity("stock"));
+  queryClient.setQueryData<DashboardSummary>(
+    ["dashboard"],
+    (summary) => summary && { ...summary, ...event.totals },
+  );
+};
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Follows /events (Server-Sent Events) and patches cached lists and dashboard totals in place,
+// so valuation and price refreshes don't refetch whole lists. fetch() is used instead of
+// EventSource because the stream needs the bearer token header.
+export const useLiveUpdates = (enabled: boolean) => {
+  const queryClient = useQueryClient();
+
+  useEffect(() => {
+    if (!enabled) {
+      return;
+    }
+    const controller = new AbortController();
+
+    const handleFrame = (frame: string) => {
+      let name = "message";
+      const data: string[] = [];
+      for (const line of frame.split("\n")) {
+        if (line.startsWith("event:")) {
+          name = line.slice(6).trim();
+        } else if (line.startsWith("data:")) {
+          data.push(line.slice(5).trim());
+        }
+      }
+      if (name === "resync") {
+        queryClient.invalidateQueries();
+      } else if (name === "changes" && data.length) {
+        applyLiveChanges(queryClient, JSON.parse(data.join("\n")) as LiveChangesEvent);
+      }
+    };
+
+    const follow = async () => {
+      let delay = 1000;
+      let connectedBefore = false;
+      while (!controller.signal.aborted) {
+        try {
+          const response = await fetch(`${baseURL}/events`, {
+            headers: {
+              Accept: "text/event-stream",
+              Authorization: `Bearer ${getStoredTokens().accessToken}`,
+            },
+            signal: controller.signal,
+          });
+          if (response.status === 401) {
+            if (!(await refreshAccessToken())) {
+              return;
+            }
+            continue;
+          }
+          if (!response.ok || !response.body) {
+            throw new Error(`events stream failed with ${response.status}`);
+          }
+          if (connectedBefore) {
+            // changes made while disconnected were never pushed
+            queryClient.invalidateQueries();
+          }
+          connectedBefore = true;
+          delay = 1000;
+
+          const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+          let buffer = "";
+          for (;;) {
+            const { value, done } = await reader.read();
+            if (done) {
+              break;
+            }
+            buffer += value;
+            let boundary = buffer.indexOf("\n\n");
+            while (boundary !== -1) {
+              handleFrame(buffer.slice(0, boundary));
+              buffer = buffer.slice(boundary + 2);
+              boundary = buffer.indexOf("\n\n");
+            }
+          }
+        } catch {
+          if (controller.signal.aborted) {
+            return;
+          }
+        }
+        await sleep(delay);
+        delay = Math.min(delay * 2, 30000);
+      }
+    };
+
+    follow();
+    return () => controller.abort();
+  }, [enabled, queryClient]);
+};
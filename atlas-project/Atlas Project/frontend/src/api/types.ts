@@ -24,9 +24,10 @@ export type PortfolioPayload = {
 
 export type Paginated<T> = {
   items: T[];
-  total: number;
+  total: number | null;
   page: number;
   page_size: number;
+  next_cursor: string | null;
 };
 
 export type Property = {
@@ -52,6 +53,8 @@ export type Property = {
   rc_last_checked_at: string | null;
   rc_confidence: number;
   rc_source_id: string | null;
+  latitude: number | null;
+  longitude: number | null;
 };
 
 export type PropertyPayload = {
@@ -111,8 +114,27 @@ export type DashboardSummary = {
   }>;
 };
 
+export type LiveChange = {
+  entity: "property" | "rent_estimate" | "stock";
+  id: number;
+  fields: Record<string, unknown>;
+};
+
+export type LiveChangesEvent = {
+  changes: LiveChange[];
+  totals: Omit<DashboardSummary, "timeline">;
+};
+
+export type Bootstrap = {
+  dashboard: DashboardSummary;
+  portfolios: Paginated<Portfolio>;
+  properties: Paginated<Property>;
+  stocks: Paginated<StockHolding>;
+};
+
 export type RentCastPreview = {
   details: Record<string, unknown>;
   estimate: Record<string, unknown>;
   comps: Array<Record<string, unknown>>;
+  errors: Record<string, string>;
 };
@@ -9,6 +9,7 @@ import {
 } from "react";
 
 import api from "../api/client";
+import { resetBootstrap } from "../api/hooks";
 import { AuthResponse } from "../api/types";
 import {
   StoredUser,
@@ -65,6 +66,7 @@ export const AuthProvider = ({ children }: PropsWithChildren) => {
     const { user: nextUser, tokens } = authResponse;
     storeTokens(tokens.access_token, tokens.refresh_token);
     storeUser(nextUser);
+    resetBootstrap();
     setUser(nextUser);
   }, []);
 
@@ -92,6 +94,7 @@ export const AuthProvider = ({ children }: PropsWithChildren) => {
 
   const logout = useCallback(() => {
     clearSession();
+    resetBootstrap();
     setUser(null);
   }, []);
 